@@ -10,6 +10,9 @@ class BaseAgent:
         """Returns the description of the agent."""
         return self.__doc__ or "No description available."
     
+    async def warm_up(self) -> None:
+        """Open backend connections ahead of the first request. Agents without a persistent client have nothing to warm."""
+
     @staticmethod
     async def ask(message: str, caller: str) -> str:
         """
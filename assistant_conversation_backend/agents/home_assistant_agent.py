@@ -1,30 +1,22 @@
-import requests
-from typing import List
+import time
+from typing import List, Optional
 from pydantic import BaseModel, Field
-import os
-import asyncio
 from ..state import MAIN_AI_QUEUE
 from ..data_models import AIMessage
 from .base_agent import BaseAgent
+from ..home_assistant.client import HOME_ASSISTANT, HomeAssistantError
+from ..home_assistant.state_mirror import STATE_MIRROR
+from ..home_assistant.entity_fetch import ENTITY_FETCHER, NOT_FOUND
+from ..home_assistant.resolver import RESOLVER, HA_COMMAND_SECONDS
 
 TOOL_NAME = "home_assistant"
 
-HOME_ASSISTANT_TOKEN = os.getenv("HOME_ASSISTANT_TOKEN")
-HOME_ASSISTANT_URL = os.getenv("HOME_ASSISTANT_URL")
 
-# Constants for the Home Assistant URL and Token
-BASE_URL = HOME_ASSISTANT_URL
-HEADERS = {
-    "Authorization": f"Bearer {HOME_ASSISTANT_TOKEN}",
-    "content-type": "application/json",
-}
-
-
-def get_all_entity_ids() -> List[str]:
+async def get_all_entity_ids() -> List[str]:
     """Fetches all entity IDs from Home Assistant."""
-    url = f"{BASE_URL}/states"
-    response = requests.get(url, headers=HEADERS, verify=False)
-    data = response.json()
+    if STATE_MIRROR.is_fresh():
+        return list(STATE_MIRROR.states)
+    data = await HOME_ASSISTANT.get_states()
     entity_ids = [entity['entity_id'] for entity in data]
     return entity_ids
 
@@ -33,16 +25,12 @@ class GetEntityStatesInput(BaseModel):
     entity_ids: List[str] = Field(description="List of entity IDs to fetch states for.")
 
 
-def get_entity_states(entity_ids) -> List[dict]:
+async def get_entity_states(entity_ids) -> List[dict]:
     """Fetches states for a list of entity IDs."""
-    entity_states = []
-    for entity_id in entity_ids:
-        url = f"{BASE_URL}/states/{entity_id}"
-        response = requests.get(url, headers=HEADERS, verify=False)
-        data = response.json()
-        
-        entity_states.append(data)
-    return entity_states
+    if STATE_MIRROR.is_fresh():
+        # Same shape as the REST API's answer for an unknown entity
+        return [STATE_MIRROR.get(entity_id) or NOT_FOUND for entity_id in entity_ids]
+    return await ENTITY_FETCHER.fetch(entity_ids)
 
 class SetEntityStatesInput(BaseModel):
     """Input for the set_entity_states tool."""
@@ -50,7 +38,7 @@ class SetEntityStatesInput(BaseModel):
     new_state: str = Field(description="The new state value.")
     attributes: dict = Field(default=None, description="Additional attributes to set for the entity.")
 
-def set_entity_state(entity_id, new_state, attributes=None) -> bool:
+async def set_entity_state(entity_id, new_state, attributes=None) -> bool:
     """
     Changes the state of an entity in Home Assistant.
     
@@ -62,48 +50,70 @@ def set_entity_state(entity_id, new_state, attributes=None) -> bool:
     Returns:
         bool: True if the state was updated successfully, False otherwise.
     """
-    url = f"{BASE_URL}/states/{entity_id}"
-    data = {"state": new_state}
-    if attributes:
-        data['attributes'] = attributes
-    
-    response = requests.post(url, headers=HEADERS, json=data, verify=False)
-    return response.status_code == 200
+    ENTITY_FETCHER.invalidate(entity_id)
+    try:
+        await HOME_ASSISTANT.set_state(entity_id, new_state, attributes)
+    except HomeAssistantError as e:
+        print(f"Error setting {entity_id}: {e}")
+        return False
+    return True
     
 class HomeAssistantAgent(BaseAgent):
     """This is the Home Assistant AI agent that interacts with the Home Assistant API.
     It can perform actions or get information in the smart home and write scripts to automate tasks.
     """
 
+    async def warm_up(self) -> None:
+        await HOME_ASSISTANT.request("GET", "/", endpoint="api")
+
     async def ask(self, message: str, caller: str) -> str:
         """
         Sends a message to the Home Assistant AI. The home assistant ai is able to perform actions or get information in the smart home.
         """
-        url = f"{BASE_URL}/conversation/process"
-        data = {"text": message}
-        
-        data['agent_id'] = "261036381fb56fe719dac933c703ff68"
-        
-        try:
-            response = await asyncio.get_event_loop().run_in_executor(None, lambda: requests.post(url, json=data, headers=HEADERS, verify=False))
-
-            if response.status_code != 200:
-                message = f"Unable to get response from Home Assistant. {response.status_code}, [{response.json()['message']}]"
-            
-            else:
-                data = response.json()
-                message = data["response"]["speech"]["plain"]["speech"]
-                
-                if not message:
-                    message = "No response from Home Assistant."
-
-        except Exception as e:
-            message = f"Error occurred while processing the message: {e}"
+        start = time.perf_counter()
+        reply = await self._direct(message)
+        if reply is not None:
+            HA_COMMAND_SECONDS.observe(time.perf_counter() - start, path="direct")
+        else:
+            reply = await self._conversation(message)
+            HA_COMMAND_SECONDS.observe(time.perf_counter() - start, path="conversation")
         
         await MAIN_AI_QUEUE.put(
             AIMessage(
-                message=message + ", Remember to update Users on status.",
+                message=reply + ", Remember to update Users on status.",
                 from_user=self.name,
                 to_user=caller,
             )
-        )
\ No newline at end of file
+        )
+
+    async def _direct(self, message: str) -> Optional[str]:
+        """Handle a simple device command with one service call, or return None to use the conversation API."""
+        if RESOLVER is None:
+            return None
+        try:
+            resolution = await RESOLVER.resolve(message)
+            if resolution is None:
+                return None
+            await HOME_ASSISTANT.call_service(
+                resolution.domain,
+                resolution.service,
+                {"entity_id": resolution.entity_ids, **resolution.data},
+            )
+        except Exception as e:
+            print(f"Direct Home Assistant call failed, using the conversation API: {e}")
+            return None
+        return resolution.describe()
+
+    async def _conversation(self, message: str) -> str:
+        try:
+            data = await HOME_ASSISTANT.process_conversation(message)
+            reply = data["response"]["speech"]["plain"]["speech"]
+            
+            if not reply:
+                reply = "No response from Home Assistant."
+
+        except HomeAssistantError as e:
+            reply = f"Unable to get response from Home Assistant. {e}"
+        except Exception as e:
+            reply = f"Error occurred while processing the message: {e}"
+        return reply
\ No newline at end of file
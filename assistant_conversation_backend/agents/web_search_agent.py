@@ -1,28 +1,46 @@
-from openai import OpenAI
+from openai import AsyncOpenAI
 from .base_agent import BaseAgent
 from ..state import MAIN_AI_QUEUE
 from ..data_models import AIMessage
-import asyncio
+from ..http_clients import shared_http_client
+from ..limits import provider_slot, BACKGROUND
+from ..search_cache import SEARCH_CACHE
+from ..knowledge import KNOWLEDGE, format_age
 
-client = OpenAI()
+client = AsyncOpenAI(http_client=shared_http_client())
 
 class WebSearchAgent(BaseAgent):
     """An AI agent that searches the internet for up-to-date information. Capable of retrieving real-time data, news, and information from various online sources.
     """
 
+    async def warm_up(self) -> None:
+        await client.models.list()
+
+    async def search(self, message: str) -> str:
+        # Answers from earlier searches that are close enough and fresh enough skip the web
+        if KNOWLEDGE is not None:
+            hit = await KNOWLEDGE.lookup(message)
+            if hit is not None:
+                return f"(From a saved search {format_age(hit.age_seconds)} ago: {hit.title}) {hit.content}"
+
+        # Searches run beside the main loop, so they yield the OpenAI quota to user-facing turns
+        async with provider_slot("openai", priority=BACKGROUND, tokens=len(message) // 4):
+            response = await client.responses.create(
+                model="gpt-4o",
+                tools=[{"type": "web_search_preview"}],
+                input=message
+            )
+        if KNOWLEDGE is not None:
+            KNOWLEDGE.remember_later(message, response.output_text)
+        return response.output_text
+
     async def ask(self, message: str, caller: str):
         
         response = None
         
         try:
-            # Run the synchronous function in a separate thread without blocking the event loop
-            response = await asyncio.to_thread(
-                client.responses.create,
-                model="gpt-4o",
-                tools=[{"type": "web_search_preview"}],
-                input=message
-            )
-            response = response.output_text
+            # Repeated and concurrent identical questions share one search
+            response = await SEARCH_CACHE.get(message, self.search)
         except Exception as e:
             response = f"Error occurred while processing the message: {e}"
 
@@ -32,4 +50,4 @@ class WebSearchAgent(BaseAgent):
                 from_user=self.name,
                 to_user=caller,
             )
-        )
\ No newline at end of file
+        )
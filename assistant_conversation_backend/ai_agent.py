@@ -4,29 +4,40 @@ from dataclasses import dataclass
 from .database import store_message, get_ai, AI as AI_Model, get_all_users_and_profiles, UserProfile, get_all_devices, DSN, get_last_n_messages, Message, get_tasks_for_execution, Task
 from .data_models import Device, AI, AIMessage
 from .state import MAIN_AI_QUEUE
-from .models.base_model import Actions, ToolAction
+from .models.base_model import BaseAIModel, Actions, ToolAction, UserAction, AIAgentAction, TurnPrompt
 from datetime import datetime
 from .agents.home_assistant_agent import HomeAssistantAgent
 from .agents.web_search_agent import WebSearchAgent
 from .misc_functions import get_dashboard_summary
-# from .models.open_ai_4o import OpenAI4o
-from .models.open_ai_4o_mini import OpenAI4oMini
+from .tracing import TRACER
+from .resilience import breaker_for, CircuitOpenError
+from .limits import set_priority, USER_FACING, BACKGROUND
+from .metrics import QUEUE_WAIT_SECONDS, TURN_LATENCY_SECONDS, WEBSOCKET_SESSIONS, WEBSOCKET_SEND_FAILURES_TOTAL
+from .models.registry import build_llm_model, build_tier_policy, build_shadow_runner
 from .tools.short_term_memory import ShortTermMemory
 from .tools.task_complete_tool import  TaskCompleter
+from .tools.sensor_history import SensorHistory
 import asyncio
+import time
 import psycopg
 from magentic.chatprompt import escape_braces
 
 
-llm_model = OpenAI4oMini()
+llm_model = build_llm_model()
 
 home_assistant_agent = HomeAssistantAgent()
 web_search_agent = WebSearchAgent()
 
+# Optional per-turn choice between a fast and a strong model, see models/tiering.py
+tier_policy = build_tier_policy([home_assistant_agent.name, web_search_agent.name])
+# Optional candidate model that sees a sample of turns without acting, see models/shadow.py
+shadow = build_shadow_runner()
+
 short_term_memory = ShortTermMemory()
 task_completer = TaskCompleter()
+sensor_history = SensorHistory()
 
-toolbox = [short_term_memory, task_completer]
+toolbox = [short_term_memory, task_completer, sensor_history]
 
 example_conversations = """
 Here is an example conversation, remember the user can't see what Agents say!:
@@ -50,6 +61,8 @@ HomeAssistantAgent: @AI Playing music now
 AI: @User Playing some music now.
 """
 
+DEGRADED_NOTICE = "Sorry, I'm having trouble thinking right now. I'll get back to you as soon as I can."
+
 @dataclass
 class AssistantState:
     sessions: dict
@@ -70,6 +83,9 @@ class AIAgent():
         self.current_users = []
         self.all_devices = []
         self.updated_once = False
+        self._recovery_task: Optional[asyncio.Task] = None
+        self._warm_up_task: Optional[asyncio.Task] = None
+        self._degraded_notice_sent = set()  # Locations told about the outage since the last answered turn
 
     async def _update_prompt(self):
         """
@@ -77,13 +93,19 @@ class AIAgent():
         """
         # Fetch all users and profiles from the database
         async with await psycopg.AsyncConnection.connect(DSN) as conn:
-            self.current_users: List[UserProfile] = await get_all_users_and_profiles(conn=conn)
-            self.all_devices: List[Device] = await get_all_devices(conn=conn)
-            self.ai_assistant: AI_Model = await get_ai(1, conn=conn)
-            messages: Message = await get_last_n_messages(conn=conn, n=30)
-            tasks: Task = await get_tasks_for_execution(conn=conn)
+            with TRACER.span("get_all_users_and_profiles"):
+                self.current_users: List[UserProfile] = await get_all_users_and_profiles(conn=conn)
+            with TRACER.span("get_all_devices"):
+                self.all_devices: List[Device] = await get_all_devices(conn=conn)
+            with TRACER.span("get_ai"):
+                self.ai_assistant: AI_Model = await get_ai(1, conn=conn)
+            with TRACER.span("get_last_n_messages"):
+                messages: Message = await get_last_n_messages(conn=conn, n=30)
+            with TRACER.span("get_tasks_for_execution"):
+                tasks: Task = await get_tasks_for_execution(conn=conn)
 
-        home_assistant_dashboard = await get_dashboard_summary()
+        with TRACER.span("get_dashboard_summary"):
+            home_assistant_dashboard = await get_dashboard_summary()
 
         # Format the task board with times in "3:30 PM" format
         task_board = "\n".join([
@@ -93,33 +115,46 @@ class AIAgent():
         
         registered_users = ", ".join([user.nick_name for user in self.current_users])
         connected_devices = ", ".join([session.device.location for session in self.global_state.sessions.values()])
-        self.prompt = self.ai_assistant.ai_base_prompt + "\n"
-        self.prompt += f"Current date and time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}" + "\n"
-        self.prompt += f"Current AI assistant (Your name): {self.ai_assistant.ai_name}" + "\n"
-        self.prompt += f"AI Agents: {', '.join([home_assistant_agent.name + ': ' + home_assistant_agent.description, web_search_agent.name + ': ' + web_search_agent.description])}" + "\n"
-        self.prompt += "To talk to AI Agents, do @<ai_agent_name>" + "\n"
-        self.prompt += str(short_term_memory) + "\n"
-        self.prompt += str(task_completer) + "\n"
-        self.prompt += example_conversations + "\n"
-        self.prompt += f"Connected devices are: {connected_devices}" + "\n" 
-        self.prompt += f"Registered users: {registered_users}" + "\n"
-        self.prompt += f"Tasks for the next 24 hours: {task_board}" + "\n"
-        self.prompt += "home assistant dashboard: " + home_assistant_dashboard + "\n"
-        self.prompt += "YOU'RE NOT ALWAYS REQUIRED TO RESPOND, IT MAY HAPPEN THAT THE APPROPRIATE ACTION IS TO NOT RESPOND" + "\n"
-        self.prompt += "THE USERS CAN'T SEE THE CHAT, ONLY MESSAGES @THEM. YOU HAVE TO TALK TO THEM THROUGH THE CONNECTED DEVICES." + "\n"
-        self.prompt += "You can do 1-3 actions at one time!"
-        self.prompt += "DON'T DO rogue actions: executing multiple actions in a single turn without waiting for environmental feedback, assuming success based on internal simulation" + "\n"
-        self.prompt += "Conversation latest 30 messages:" + "\n".join([message.content for message in reversed(messages)])
+        # The long stable prefix comes first and volatile data last, so providers
+        # can reuse their cached prefix of the prompt from one turn to the next.
+        self.prompt_prefix = self.ai_assistant.ai_base_prompt + "\n"
+        self.prompt_prefix += f"Current AI assistant (Your name): {self.ai_assistant.ai_name}" + "\n"
+        self.prompt_prefix += f"AI Agents: {', '.join([home_assistant_agent.name + ': ' + home_assistant_agent.description, web_search_agent.name + ': ' + web_search_agent.description])}" + "\n"
+        self.prompt_prefix += "To talk to AI Agents, do @<ai_agent_name>" + "\n"
+        self.prompt_prefix += str(task_completer) + "\n"
+        self.prompt_prefix += str(sensor_history) + "\n"
+        self.prompt_prefix += example_conversations + "\n"
+        self.prompt_prefix += "YOU'RE NOT ALWAYS REQUIRED TO RESPOND, IT MAY HAPPEN THAT THE APPROPRIATE ACTION IS TO NOT RESPOND" + "\n"
+        self.prompt_prefix += "THE USERS CAN'T SEE THE CHAT, ONLY MESSAGES @THEM. YOU HAVE TO TALK TO THEM THROUGH THE CONNECTED DEVICES." + "\n"
+        self.prompt_prefix += "You can do 1-3 actions at one time!" + "\n"
+        self.prompt_prefix += "DON'T DO rogue actions: executing multiple actions in a single turn without waiting for environmental feedback, assuming success based on internal simulation" + "\n"
+
+        # Rarely changing
+        stable = self.prompt_prefix
+        stable += str(short_term_memory) + "\n"
+        stable += f"Registered users: {registered_users}" + "\n"
+
+        # Changes every turn
+        volatile = [
+            f"Connected devices are: {connected_devices}",
+            f"Tasks for the next 24 hours: {task_board}",
+            "home assistant dashboard: " + home_assistant_dashboard,
+            f"Current date and time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        ]
+        history = [message.content for message in reversed(messages)]
+        self.prompt = TurnPrompt(stable, volatile, history)
 
     
     async def add_session(self, device: Device, websocket: WebSocket):
         session = Session(device=device, websocket=websocket)
         self.global_state.sessions[device.location] = session
+        WEBSOCKET_SESSIONS.set(len(self.global_state.sessions))
         await self.add_message(f"Device {device.device_name} connected.", from_user="SYSTEM", to_user='', location=device.location)
     
     async def remove_session(self, device: Device):
         if device.location in self.global_state.sessions:
             del self.global_state.sessions[device.location]
+            WEBSOCKET_SESSIONS.set(len(self.global_state.sessions))
             await self.add_message(f"Device {device.device_name} disconnected.", from_user="SYSTEM", to_user='', location=device.location)
         else:
             print(f"Error: Device {device.device_name} not found in sessions.")
@@ -178,9 +213,10 @@ class AIAgent():
         )
         
         # Store the message in the database
-        await store_message(
-            message=formatted_message,
-        )
+        with TRACER.span("store_message"):
+            await store_message(
+                message=formatted_message,
+            )
 
         return formatted_message
     
@@ -200,162 +236,254 @@ class AIAgent():
             )
         )
 
+    async def warm_up(self):
+        """Open every backend's connections before the first turn, so no turn pays for connection setup."""
+        models = list(tier_policy.models.values()) if tier_policy else [llm_model]
+        backends = [*models, home_assistant_agent, web_search_agent]
+        results = await asyncio.gather(*(backend.warm_up() for backend in backends), return_exceptions=True)
+        for backend, result in zip(backends, results):
+            if isinstance(result, Exception):
+                print(f"Error warming up {backend.name}: {result}")
+
     async def run(self):
+        # In the background, so a slow or unreachable backend doesn't hold up the first turns
+        self._warm_up_task = asyncio.create_task(self.warm_up())
         while True:
             incoming_message: AIMessage = await self.queue.get()
-            
-            message = await self._add_message(
-                message=incoming_message.message,
+            turn = TRACER.start_turn(
                 from_user=incoming_message.from_user,
-                to_user=incoming_message.to_user,
                 location=incoming_message.location,
+                enqueued_at=incoming_message.enqueued_at,
             )
 
-            # Add the message to conversation
-            self.global_state.conversation += "\n" + message
-            self.queue.task_done()
+            try:
+                await self._process_turn(incoming_message)
+            finally:
+                TRACER.finish_turn(turn)
+                QUEUE_WAIT_SECONDS.observe(turn.queue_wait_ms / 1000)
+                TURN_LATENCY_SECONDS.observe(turn.total_ms / 1000)
+
+    async def _process_turn(self, incoming_message: AIMessage):
+        message = await self._add_message(
+            message=incoming_message.message,
+            from_user=incoming_message.from_user,
+            to_user=incoming_message.to_user,
+            location=incoming_message.location,
+        )
+
+        # Add the message to conversation
+        self.global_state.conversation += "\n" + message
+        self.queue.task_done()
+
+        # SYSTEM notices give way to turns someone is waiting on when a provider is congested
+        set_priority(BACKGROUND if incoming_message.from_user == "SYSTEM" else USER_FACING)
 
-            # Update the prompt with the latest conversation and connected devices
+        if tier_policy:
+            model, tier = tier_policy.select(incoming_message)
+            TRACER.annotate(tier=tier)
+        else:
+            model, tier = llm_model, None
+        breaker = breaker_for(model.provider or model.name)
+        if breaker.is_open():
+            # Skip the prompt build entirely while the provider is known to be down
+            await self._serve_degraded(incoming_message, breaker)
+            return
+
+        # Update the prompt with the latest conversation and connected devices
+        with TRACER.span("update_prompt"):
             await self._update_prompt()
 
-            try:
-                actions: Actions = await llm_model._generate(self.prompt)
-            except Exception as e:
-                if "Failed to parse the LLM output into the tool schema. Consider making the output type more lenient or enabling retries" in str(e):
-                    error_text = "Error: Failed to parse the LLM output into the tool schema. Consider making the output type more lenient or enabling retries"
+        shadow_task = shadow.start(self.prompt) if shadow else None
+        generation_start = time.monotonic()
+        try:
+            with TRACER.span("llm_generate"):
+                if model.streaming:
+                    actions: Actions = await breaker.call(self._stream_turn, model)
                 else:
-                    error_text = f"Error generating message: {e}"
-                print(error_text)
-                await self.add_message(
-                    message=error_text + "\n sleeping loop for 10 seconds",
-                    from_user="SYSTEM",
-                    to_user='',
-                    location='SYSTEM',
-                )
-                await asyncio.sleep(10)
-                continue
+                    actions: Actions = await breaker.call(model.generate, self.prompt)
+        except CircuitOpenError:
+            if shadow_task:
+                shadow_task.cancel()
+            await self._serve_degraded(incoming_message, breaker)
+            return
+        except Exception as e:
+            if shadow_task:
+                shadow.compare(shadow_task, model.name, None, time.monotonic() - generation_start, error=str(e))
+            if "Failed to parse the LLM output into the tool schema. Consider making the output type more lenient or enabling retries" in str(e):
+                error_text = "Error: Failed to parse the LLM output into the tool schema. Consider making the output type more lenient or enabling retries"
+            else:
+                error_text = f"Error generating message: {e}"
+            print(error_text)
+            # Log the error without queueing it, so it doesn't trigger another LLM turn
+            await self._add_message(
+                message=error_text,
+                from_user="SYSTEM",
+                to_user='',
+                location='SYSTEM',
+            )
+            if not isinstance(e, ValueError):
+                # Unparseable output is the model's answer, not an outage, and a retry would likely repeat it
+                self._schedule_recovery_turn(breaker)
+            return
 
-            for action in actions.ai_agent_actions:
-                if action.message is None:
-                    continue
-                
-                await self._add_message(
-                    message=action.message,
-                    from_user=self.ai_assistant.ai_name,
-                    to_user=action.recipient,
-                    location="",
-                )
+        self._degraded_notice_sent.clear()
+        generation_seconds = time.monotonic() - generation_start
+        if tier_policy:
+            tier_policy.record(tier, generation_seconds, actions._usage)
+        if shadow_task:
+            shadow.compare(shadow_task, model.name, actions, generation_seconds)
 
-                # Send the action message to the appropriate recipient
-                # Check normal and camel case turned to spaces
-                if action.recipient == home_assistant_agent.name or action.recipient == "Home Assistant Agent":
-                    # Call Home Assistant Agent
-                    asyncio.create_task(home_assistant_agent.ask(action.message, caller=self.ai_assistant.ai_name))
-                
-                elif action.recipient == web_search_agent.name or action.recipient == "Web Search Agent":
-                    asyncio.create_task(web_search_agent.ask(action.message, caller=self.ai_assistant.ai_name))
+        if actions._usage is not None:
+            TRACER.annotate(
+                model=model.name,
+                input_tokens=actions._usage.input_tokens,
+                cached_tokens=actions._usage.cached_tokens,
+                output_tokens=actions._usage.output_tokens,
+                prompt_prefix_chars=len(self.prompt_prefix),
+            )
+
+        if not model.streaming:
+            for action in actions.ai_agent_actions:
+                await self._handle_agent_action(action)
 
             for action in actions.user_actions:
-                if action.message is None:
-                    continue
-
-                await self._add_message(
-                    message=action.message,
-                    from_user=self.ai_assistant.ai_name,
-                    to_user=action.recipient,
-                    location="",
-                )
+                await self._handle_user_action(action)
+
+            for tool_call in actions.tools_actions:
+                await self._handle_tool_action(tool_call)
+
+        if actions.thought:
+            print(f"AI thought: {actions.thought}")
+
+    async def _stream_turn(self, model: BaseAIModel) -> Actions:
+        """
+        Handle each action as soon as the model finishes writing it, so the first
+        message goes out while the rest of the response is still being generated.
+        """
+        actions = Actions(user_actions=[], ai_agent_actions=[], tools_actions=[])
+        async for action in model.stream_actions(self.prompt):
+            if isinstance(action, AIAgentAction):
+                actions.ai_agent_actions.append(action)
+                await self._handle_agent_action(action)
+            elif isinstance(action, UserAction):
+                actions.user_actions.append(action)
+                await self._handle_user_action(action)
+            elif isinstance(action, ToolAction):
+                actions.tools_actions.append(action)
+                await self._handle_tool_action(action)
+        return actions
+
+    async def _handle_agent_action(self, action: AIAgentAction):
+        if action.message is None:
+            return
+        
+        await self._add_message(
+            message=action.message,
+            from_user=self.ai_assistant.ai_name,
+            to_user=action.recipient,
+            location="",
+        )
 
-                if action.recipient in [user.nick_name for user in self.current_users if user.nick_name == action.recipient]:
-                    try:
-                        # Find the right session based on device location
-                        if action.device:
-                            matching_sessions = [
-                                session for session in self.global_state.sessions.values()
-                                if session.device.location == action.device
-                            ]
-                            
-                            if matching_sessions:
-                                # Send message to the device
-                                session = matching_sessions[0]
-                                await session.websocket.send_text(action.message)
-                            else:
-                                # Log error if device not found
-                                error_text = f"Error: Device '{action.device}' not found in sessions"
-                                print(error_text)
-                                await self.add_message(
-                                    message=error_text,
-                                    from_user="SYSTEM",
-                                    to_user='',
-                                    location='SYSTEM',
-                                )
-                        
-                        else:
-                            # If no specific device mentioned, send to all
-                            for session in self.global_state.sessions.values():
-                                await session.websocket.send_text(action.message)
-                    except Exception as e:
+        # Send the action message to the appropriate recipient
+        # Check normal and camel case turned to spaces
+        if action.recipient == home_assistant_agent.name or action.recipient == "Home Assistant Agent":
+            # Call Home Assistant Agent
+            asyncio.create_task(home_assistant_agent.ask(action.message, caller=self.ai_assistant.ai_name))
+        
+        elif action.recipient == web_search_agent.name or action.recipient == "Web Search Agent":
+            asyncio.create_task(web_search_agent.ask(action.message, caller=self.ai_assistant.ai_name))
+
+    async def _handle_user_action(self, action: UserAction):
+        if action.message is None:
+            return
+
+        await self._add_message(
+            message=action.message,
+            from_user=self.ai_assistant.ai_name,
+            to_user=action.recipient,
+            location="",
+        )
+
+        if action.recipient in [user.nick_name for user in self.current_users if user.nick_name == action.recipient]:
+            try:
+                # Find the right session based on device location
+                if action.device:
+                    matching_sessions = [
+                        session for session in self.global_state.sessions.values()
+                        if session.device.location == action.device
+                    ]
+                    
+                    if matching_sessions:
+                        # Send message to the device
+                        session = matching_sessions[0]
+                        with TRACER.span("websocket_send"):
+                            await session.websocket.send_text(action.message)
+                    else:
+                        # Log error if device not found
+                        error_text = f"Error: Device '{action.device}' not found in sessions"
                         print(error_text)
                         await self.add_message(
-                            message=f"Error sending message to device: {e}",
+                            message=error_text,
                             from_user="SYSTEM",
                             to_user='',
                             location='SYSTEM',
                         )
+                
                 else:
-                    print(f"Unhandled recipient: {action.recipient}")
-                    await self.add_message(
-                        message=f"Error: Unhandled recipient '{action.recipient}'",
-                        from_user="SYSTEM",
-                        to_user='',
-                        location='SYSTEM',
-                    )
-
-            for tool_call in actions.tools_actions:
-                tool_call: ToolAction
-
+                    # If no specific device mentioned, send to all
+                    with TRACER.span("websocket_send"):
+                        for session in self.global_state.sessions.values():
+                            await session.websocket.send_text(action.message)
+            except Exception as e:
+                WEBSOCKET_SEND_FAILURES_TOTAL.inc()
+                print(f"Error sending message to device: {e}")
                 await self.add_message(
-                    message=f"Tool call: {tool_call.command} with arguments: {tool_call.arguments}",
-                    from_user=self.ai_assistant.ai_name,
+                    message=f"Error sending message to device: {e}",
+                    from_user="SYSTEM",
                     to_user='',
-                    location='',
+                    location='SYSTEM',
                 )
+        else:
+            print(f"Unhandled recipient: {action.recipient}")
+            await self.add_message(
+                message=f"Error: Unhandled recipient '{action.recipient}'",
+                from_user="SYSTEM",
+                to_user='',
+                location='SYSTEM',
+            )
 
-                handled = False
-                for tool in toolbox:
-                    if hasattr(tool, tool_call.command):
-                        try:
-                            # Get the function corresponding to the command
-                            func = getattr(tool, tool_call.command)
-                            # Call the function with the parameters, handling async functions
-                            if asyncio.iscoroutinefunction(func):
-                                result = await func(tool_call.arguments)
-                            else:
-                                result = func(tool_call.arguments)
-                            
-                            # Log the result
-                            await self.add_message(
-                                message=f"Tool {tool.__class__.__name__} executed command '{tool_call.command}' with result: {result}",
-                                from_user="SYSTEM",
-                                to_user=self.ai_assistant.ai_name,  # Send result back to AI
-                                location='SYSTEM',
-                            )
-                            handled = True
-                            break
-                        except Exception as e:
-                            # Log error if tool execution fails
-                            error_text = f"Error executing tool command '{tool_call.command}': {e}"
-                            print(error_text)
-                            await self.add_message(
-                                message=error_text,
-                                from_user="SYSTEM",
-                                to_user='',
-                                location='SYSTEM',
-                            )
-                
-                if not handled:
-                    # Log error if no tool can handle the command
-                    error_text = f"No tool found to handle command '{tool_call.command}'"
+    async def _handle_tool_action(self, tool_call: ToolAction):
+        await self.add_message(
+            message=f"Tool call: {tool_call.command} with arguments: {tool_call.arguments}",
+            from_user=self.ai_assistant.ai_name,
+            to_user='',
+            location='',
+        )
+
+        handled = False
+        for tool in toolbox:
+            if hasattr(tool, tool_call.command):
+                try:
+                    # Get the function corresponding to the command
+                    func = getattr(tool, tool_call.command)
+                    # Call the function with the parameters, handling async functions
+                    if asyncio.iscoroutinefunction(func):
+                        result = await func(tool_call.arguments)
+                    else:
+                        result = func(tool_call.arguments)
+                    
+                    # Log the result
+                    await self.add_message(
+                        message=f"Tool {tool.__class__.__name__} executed command '{tool_call.command}' with result: {result}",
+                        from_user="SYSTEM",
+                        to_user=self.ai_assistant.ai_name,  # Send result back to AI
+                        location='SYSTEM',
+                    )
+                    handled = True
+                    break
+                except Exception as e:
+                    # Log error if tool execution fails
+                    error_text = f"Error executing tool command '{tool_call.command}': {e}"
                     print(error_text)
                     await self.add_message(
                         message=error_text,
@@ -363,9 +491,53 @@ class AIAgent():
                         to_user='',
                         location='SYSTEM',
                     )
+        
+        if not handled:
+            # Log error if no tool can handle the command
+            error_text = f"No tool found to handle command '{tool_call.command}'"
+            print(error_text)
+            await self.add_message(
+                message=error_text,
+                from_user="SYSTEM",
+                to_user='',
+                location='SYSTEM',
+            )
+
+    async def _serve_degraded(self, incoming_message: AIMessage, breaker):
+        """
+        Answer a turn without the LLM while its provider is backing off.
+        The message is already stored, so the recovery turn will see it in the history.
+        """
+        self._schedule_recovery_turn(breaker)
+
+        session = self.global_state.sessions.get(incoming_message.location)
+        if incoming_message.from_user == "SYSTEM" or session is None or incoming_message.location in self._degraded_notice_sent:
+            return
+
+        try:
+            with TRACER.span("websocket_send"):
+                await session.websocket.send_text(DEGRADED_NOTICE)
+            self._degraded_notice_sent.add(incoming_message.location)
+        except Exception as e:
+            WEBSOCKET_SEND_FAILURES_TOTAL.inc()
+            print(f"Error sending message to device: {e}")
+
+    def _schedule_recovery_turn(self, breaker):
+        """Queue a single SYSTEM turn that retries once the provider's backoff has passed."""
+        if self._recovery_task and not self._recovery_task.done():
+            return
+
+        async def recover():
+            await asyncio.sleep(breaker.next_retry_delay())
+            await self.add_message(
+                message="Retrying after the language model failed. Catch up on any unanswered messages.",
+                from_user="SYSTEM",
+                to_user='',
+                location='SYSTEM',
+            )
+
+        self._recovery_task = asyncio.create_task(recover())
 
-            if actions.thought:
-                print(f"AI thought: {actions.thought}")
     def start(self):
         asyncio.create_task(self.run())
         print("AI Agent started and running...")
@@ -3,13 +3,20 @@
 from starlette.applications import Starlette
 from starlette.routing import WebSocketRoute, Route
 from starlette.websockets import WebSocket
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, PlainTextResponse
 from .data_models import IncomingMessage, AI as Device
-from .ai_agent import AI_AGENT
+from .ai_agent import AI_AGENT, tier_policy, shadow
 import asyncio
 import psycopg
 from .database import DSN, get_device_by_id
 from .processes import schedule_recurring_task_processor
+from .tracing import TRACER
+from .metrics import REGISTRY
+from .limits import limiter_stats
+from .search_cache import SEARCH_CACHE
+from .home_assistant.state_mirror import STATE_MIRROR
+from .home_assistant.triggers import TRIGGERS
+from .home_assistant.shopping_list import SHOPPING_LIST
 from typing import List
 
 async def assistant_event(request):
@@ -83,6 +90,27 @@ async def websocket_endpoint(websocket: WebSocket):
             print('Unable to close websocket. Probably already closed by client')
 
 
+async def metrics(request):
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+async def debug_report(request):
+    """Recent turn traces and the state of each optional component; disabled components are null."""
+    try:
+        n = int(request.query_params.get('n', 20))
+    except ValueError:
+        return JSONResponse({"error": "n must be an integer"}, status_code=400)
+
+    return JSONResponse({
+        "traces": TRACER.last_turns(n),
+        "tiers": tier_policy.report() if tier_policy else None,
+        "limits": limiter_stats(),
+        "shadow": shadow.report(n) if shadow else None,
+        "triggers": TRIGGERS.report() if TRIGGERS else None,
+        "search_cache": SEARCH_CACHE.report(),
+    })
+
+
 def startup():
     # Start the AI agent
     AI_AGENT.start()
@@ -92,10 +120,19 @@ def startup():
     asyncio.create_task(schedule_recurring_task_processor())
     print("Recurring task processor scheduler started")
 
+    # Keep Home Assistant states in memory instead of fetching /states every turn;
+    # configured state changes also reach the agent through TRIGGERS
+    STATE_MIRROR.start()
+
+    # Shopping list reads come from the local copy; edits are written back to Home Assistant
+    SHOPPING_LIST.start()
+
 app = Starlette(
     routes=[
         Route("/event", endpoint=assistant_event, methods=["POST"]),
         WebSocketRoute('/ws', endpoint=websocket_endpoint),
+        Route("/metrics", endpoint=metrics, methods=["GET"]),
+        Route("/debug", endpoint=debug_report, methods=["GET"]),
     ],
 
     on_startup=[startup],
@@ -1,8 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from starlette.websockets import WebSocket
 from datetime import datetime
 from typing import Optional, List
 from enum import Enum
+import time
 
 @dataclass
 class Device:
@@ -63,6 +64,16 @@ class AIMessage:
     from_user: str
     to_user: str
     location: Optional[str] = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+@dataclass
+class ShoppingItem:
+    item_id: str
+    item_name: str
+    quantity: int = 1
+    is_purchased: bool = False
+    ha_item_id: Optional[str] = None
+    needs_sync: bool = False  # Changed locally and not yet written to Home Assistant
 
 class Recipient(Enum):
     USER = "user"
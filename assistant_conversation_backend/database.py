@@ -2,8 +2,9 @@ import psycopg
 import os
 import logging
 from datetime import datetime
-from .data_models import Message, AI, Device
+from .data_models import Message, AI, Device, ShoppingItem
 from dataclasses import dataclass
+from .metrics import DB_QUERY_SECONDS, timed
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -180,6 +181,20 @@ CREATE TABLE IF NOT EXISTS events (
 );
 """)
 
+# Local copy of the Home Assistant shopping list; needs_sync marks changes not yet written back
+cur.execute("""
+--sql
+CREATE TABLE IF NOT EXISTS shopping_list (
+    item_id CHAR(26) PRIMARY KEY,
+    ha_item_id VARCHAR(64) UNIQUE,
+    item_name VARCHAR(255) NOT NULL,
+    quantity INTEGER NOT NULL DEFAULT 1,
+    is_purchased BOOLEAN NOT NULL DEFAULT FALSE,
+    needs_sync BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+""")
+
 cur.execute("""
 --sql
 CREATE TABLE IF NOT EXISTS articles (
@@ -191,6 +206,14 @@ CREATE TABLE IF NOT EXISTS articles (
 );
 """)
 
+# When an article was saved and which embedder produced its vectors; vectors from different embedders don't compare
+cur.execute("""
+--sql
+ALTER TABLE articles
+    ADD COLUMN IF NOT EXISTS created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    ADD COLUMN IF NOT EXISTS embedding_model VARCHAR(100);
+""")
+
 cur.execute("""
 --sql
 CREATE TABLE IF NOT EXISTS questions (
@@ -268,6 +291,17 @@ cur.execute(
     """
 )
 
+# Shopping list indexes; ha_item_id is already indexed by its UNIQUE constraint
+
+cur.execute(
+    """
+    --sql
+    CREATE INDEX IF NOT EXISTS idx_shopping_list_is_purchased ON shopping_list (is_purchased);
+    --sql
+    CREATE INDEX IF NOT EXISTS idx_shopping_list_needs_sync ON shopping_list (item_id) WHERE needs_sync;
+    """
+)
+
 # Create default roles if they don't exist
 cur.execute("""
 --sql
@@ -284,6 +318,7 @@ ON CONFLICT (role_name) DO NOTHING;
 conn.commit()
 
 
+@timed(DB_QUERY_SECONDS, query="get_users_by_nicknames")
 async def get_users_by_nicknames(conn: psycopg.AsyncConnection, nicknames: list[str]) -> list:
     try:
         async with conn.cursor() as cur:
@@ -303,6 +338,7 @@ async def get_users_by_nicknames(conn: psycopg.AsyncConnection, nicknames: list[
         logger.error("Error occurred while fetching the users by nicknames: %s", e)
         return []
 
+@timed(DB_QUERY_SECONDS, query="store_message")
 async def store_message(message: str) -> None:
     try:
         async with await psycopg.AsyncConnection.connect(DSN) as conn:
@@ -327,6 +363,7 @@ async def store_message(message: str) -> None:
 
 
 
+@timed(DB_QUERY_SECONDS, query="get_ai")
 async def get_ai(ai_id, conn) -> AI:
     try:
         async with conn.cursor() as cur:
@@ -349,6 +386,7 @@ async def get_ai(ai_id, conn) -> AI:
         logger.error("Error occurred while fetching the AI: %s", e)
         return None
 
+@timed(DB_QUERY_SECONDS, query="get_last_n_messages")
 async def get_last_n_messages(conn: psycopg.AsyncConnection, n: int) -> list[Message]:
     try:
         async with conn.cursor() as cur:
@@ -390,6 +428,7 @@ class UserProfile:
     role_name: str
     role_description: str
 
+@timed(DB_QUERY_SECONDS, query="get_all_users_and_profiles")
 async def get_all_users_and_profiles(conn: psycopg.AsyncConnection) -> list[UserProfile]:
     try:
         async with conn.cursor() as cur:
@@ -423,6 +462,7 @@ async def get_all_users_and_profiles(conn: psycopg.AsyncConnection) -> list[User
 
 # Get all devices
 
+@timed(DB_QUERY_SECONDS, query="get_all_devices")
 async def get_all_devices(conn: psycopg.AsyncConnection) -> list[Device]:
     try:
         async with conn.cursor() as cur:
@@ -471,6 +511,7 @@ class Task:
     task_execute_at: datetime
     is_completed: bool
 
+@timed(DB_QUERY_SECONDS, query="get_tasks_for_execution")
 async def get_tasks_for_execution(conn: psycopg.AsyncConnection) -> list[Task]:
     """
     Get tasks that need execution - includes tasks from the past 12 hours that might have been missed
@@ -510,6 +551,7 @@ async def get_tasks_for_execution(conn: psycopg.AsyncConnection) -> list[Task]:
         return []
 
 
+@timed(DB_QUERY_SECONDS, query="get_device_by_id")
 async def get_device_by_id(
     conn: psycopg.AsyncConnection,
     device_id: int
@@ -535,6 +577,7 @@ async def get_device_by_id(
         print(e)
         return None
 
+@timed(DB_QUERY_SECONDS, query="get_ai_memories")
 async def get_ai_memories(conn: psycopg.AsyncConnection, ai_id: int) -> list:
     try:
         async with conn.cursor() as cur:
@@ -551,6 +594,7 @@ async def get_ai_memories(conn: psycopg.AsyncConnection, ai_id: int) -> list:
         logger.error("Error retrieving AI memories: %s", e)
         return []
 
+@timed(DB_QUERY_SECONDS, query="update_ai_memories")
 async def update_ai_memories(conn: psycopg.AsyncConnection, ai_id: int, memories: list) -> bool:
     try:
         async with conn.cursor() as cur:
@@ -579,6 +623,7 @@ class DeviceInfo:
     mac_address: str
     location: str
 
+@timed(DB_QUERY_SECONDS, query="register_device")
 async def register_device(conn: psycopg.AsyncConnection, device_info: DeviceInfo) -> int:
     try:
         async with conn.cursor() as cur:
@@ -612,6 +657,7 @@ class DeviceType:
     type_name: str
     description: str
 
+@timed(DB_QUERY_SECONDS, query="get_device_types")
 async def get_device_types(conn: psycopg.AsyncConnection) -> list[DeviceType]:
     """
     Get all available device types from the database.
@@ -638,4 +684,160 @@ async def get_device_types(conn: psycopg.AsyncConnection) -> list[DeviceType]:
             ]
     except psycopg.Error as e:
         logger.error("Error occurred while fetching device types: %s", e)
-        return []
\ No newline at end of file
+        return []
+
+
+@timed(DB_QUERY_SECONDS, query="get_shopping_items")
+async def get_shopping_items(conn: psycopg.AsyncConnection) -> list[ShoppingItem]:
+    try:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                SELECT item_id, item_name, quantity, is_purchased, ha_item_id, needs_sync
+                FROM shopping_list
+                ORDER BY updated_at, item_id
+                """
+            )
+            rows = await cur.fetchall()
+            return [ShoppingItem(*row) for row in rows]
+    except psycopg.Error as e:
+        logger.error("Error retrieving shopping list: %s", e)
+        return []
+
+@timed(DB_QUERY_SECONDS, query="upsert_shopping_items")
+async def upsert_shopping_items(conn: psycopg.AsyncConnection, items: list[ShoppingItem]) -> bool:
+    try:
+        async with conn.cursor() as cur:
+            await cur.executemany(
+                """
+                INSERT INTO shopping_list (item_id, item_name, quantity, is_purchased, ha_item_id, needs_sync, updated_at)
+                VALUES (%s, %s, %s, %s, %s, %s, NOW())
+                ON CONFLICT (item_id) DO UPDATE SET
+                    item_name = EXCLUDED.item_name,
+                    quantity = EXCLUDED.quantity,
+                    is_purchased = EXCLUDED.is_purchased,
+                    ha_item_id = EXCLUDED.ha_item_id,
+                    needs_sync = EXCLUDED.needs_sync,
+                    updated_at = NOW()
+                """,
+                [(item.item_id, item.item_name, item.quantity, item.is_purchased, item.ha_item_id, item.needs_sync) for item in items]
+            )
+        await conn.commit()
+        return True
+    except psycopg.Error as e:
+        logger.error("Error saving shopping list items: %s", e)
+        return False
+
+@timed(DB_QUERY_SECONDS, query="delete_shopping_items")
+async def delete_shopping_items(conn: psycopg.AsyncConnection, item_ids: list[str]) -> bool:
+    try:
+        async with conn.cursor() as cur:
+            await cur.execute("DELETE FROM shopping_list WHERE item_id = ANY(%s)", (item_ids,))
+        await conn.commit()
+        return True
+    except psycopg.Error as e:
+        logger.error("Error deleting shopping list items: %s", e)
+        return False
+
+
+def vector_literal(embedding: list[float]) -> str:
+    return "[" + ",".join(f"{value:.7g}" for value in embedding) + "]"
+
+@timed(DB_QUERY_SECONDS, query="find_knowledge_candidates")
+async def find_knowledge_candidates(conn: psycopg.AsyncConnection, question: str, embedding: list[float],
+                                    embedding_model: str, limit: int) -> list[dict]:
+    """
+    Articles near the question by vector search over saved questions and
+    article bodies, plus full-text matches on any of its words. Each comes
+    with its best cosine similarity and the share of the question's lexemes
+    found in the article.
+    """
+    try:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                --sql
+                WITH query AS (
+                    SELECT %(embedding)s::vector AS embedding, lexemes,
+                           to_tsquery('simple', COALESCE(
+                               (SELECT string_agg(quote_literal(lexeme), ' | ') FROM unnest(lexemes) AS lexeme), ''
+                           )) AS any_lexeme
+                    FROM (SELECT tsvector_to_array(to_tsvector('english', %(question)s)) AS lexemes) AS parsed
+                ),
+                candidates AS (
+                    (SELECT aq.article_id
+                     FROM questions q
+                     JOIN article_questions aq USING (question_id)
+                     JOIN articles a USING (article_id), query
+                     WHERE a.embedding_model = %(model)s
+                     ORDER BY q.embedding <#> query.embedding
+                     LIMIT %(limit)s)
+                    UNION
+                    (SELECT a.article_id
+                     FROM articles a, query
+                     WHERE a.embedding_model = %(model)s
+                     ORDER BY a.embedding <#> query.embedding
+                     LIMIT %(limit)s)
+                    UNION
+                    (SELECT a.article_id
+                     FROM articles a, query
+                     WHERE a.embedding_model = %(model)s
+                       AND a.ts_content @@ query.any_lexeme
+                     ORDER BY ts_rank_cd(a.ts_content, query.any_lexeme) DESC
+                     LIMIT %(limit)s)
+                )
+                SELECT a.article_id, a.title, a.content,
+                       EXTRACT(EPOCH FROM NOW() - a.created_at)::float AS age_seconds,
+                       GREATEST(
+                           -(a.embedding <#> query.embedding),
+                           (SELECT MAX(-(q.embedding <#> query.embedding))
+                            FROM article_questions aq JOIN questions q USING (question_id)
+                            WHERE aq.article_id = a.article_id)
+                       ) AS similarity,
+                       (SELECT COUNT(*) FROM unnest(query.lexemes) AS lexeme
+                        WHERE a.ts_content @@ plainto_tsquery('simple', lexeme))::float
+                           / GREATEST(cardinality(query.lexemes), 1) AS coverage
+                FROM articles a
+                JOIN candidates USING (article_id), query
+                """,
+                {"embedding": vector_literal(embedding), "question": question, "model": embedding_model, "limit": limit}
+            )
+            columns = [column.name for column in cur.description]
+            return [dict(zip(columns, row)) for row in await cur.fetchall()]
+    except psycopg.Error as e:
+        logger.error("Error searching local knowledge: %s", e)
+        return []
+
+@timed(DB_QUERY_SECONDS, query="store_knowledge")
+async def store_knowledge(conn: psycopg.AsyncConnection, question: str, question_embedding: list[float],
+                          title: str, content: str, content_embedding: list[float], embedding_model: str) -> int | None:
+    """Save an answer as an article linked to the question it answered; returns the article ID."""
+    try:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                INSERT INTO articles (title, content, embedding, embedding_model)
+                VALUES (%s, %s, %s::vector, %s)
+                RETURNING article_id
+                """,
+                (title, content, vector_literal(content_embedding), embedding_model)
+            )
+            article_id = (await cur.fetchone())[0]
+            await cur.execute(
+                """
+                INSERT INTO questions (question_text, embedding)
+                VALUES (%s, %s::vector)
+                RETURNING question_id
+                """,
+                (question, vector_literal(question_embedding))
+            )
+            question_id = (await cur.fetchone())[0]
+            await cur.execute(
+                "INSERT INTO article_questions (article_id, question_id) VALUES (%s, %s)",
+                (article_id, question_id)
+            )
+        await conn.commit()
+        return article_id
+    except psycopg.Error as e:
+        logger.error("Error saving knowledge: %s", e)
+        return None
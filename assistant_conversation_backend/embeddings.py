@@ -0,0 +1,82 @@
+import os
+import re
+import hashlib
+from typing import List, Optional
+import numpy as np
+from .limits import provider_slot, BACKGROUND
+
+# The articles and questions tables store VECTOR(1536)
+EMBEDDING_DIMENSIONS = 1536
+KNOWLEDGE_EMBEDDER = os.getenv("KNOWLEDGE_EMBEDDER", "openai")
+OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can could do does for from how i in is it me my of on or please "
+    "s the to was what whats when where which who why will with would you your".split()
+)
+
+
+def words(text: str) -> List[str]:
+    return [word for word in re.findall(r"[a-z0-9]+", text.lower()) if word not in STOPWORDS]
+
+
+class HashingEmbedder:
+    """
+    Deterministic local embedder: words and word pairs are hashed into a
+    fixed-size signed count vector, normalized to unit length. No model or
+    network is needed, so it serves as the stand-in for tests and offline use;
+    it matches shared wording, not meaning.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> List[float]:
+        tokens = words(text)
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        vector = np.zeros(self.dimensions)
+        for feature in features:
+            digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.dimensions] += 1.0 if digest >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+
+class OpenAIEmbedder:
+    """Embeddings from the OpenAI API, which are already unit length."""
+
+    def __init__(self, model: str = OPENAI_EMBEDDING_MODEL, client=None):
+        self.model = model
+        self.name = f"openai:{model}"
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import AsyncOpenAI
+            from .http_clients import shared_http_client
+            self._client = AsyncOpenAI(http_client=shared_http_client())
+        return self._client
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        async with provider_slot("openai", priority=BACKGROUND, tokens=sum(len(text) for text in texts) // 4):
+            response = await self.client.embeddings.create(model=self.model, input=texts, dimensions=EMBEDDING_DIMENSIONS)
+        return [item.embedding for item in response.data]
+
+
+EMBEDDERS = {
+    "hashing": HashingEmbedder,
+    "openai": OpenAIEmbedder,
+}
+
+
+def make_embedder(name: Optional[str] = None):
+    name = name or KNOWLEDGE_EMBEDDER
+    if name not in EMBEDDERS:
+        raise ValueError(f"Unknown embedder {name!r}; expected one of {sorted(EMBEDDERS)}")
+    return EMBEDDERS[name]()
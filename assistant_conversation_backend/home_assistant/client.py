@@ -0,0 +1,124 @@
+import os
+import asyncio
+import httpx
+from urllib.parse import quote, urlencode
+from typing import Any, List, Optional
+from ..http_clients import make_http_client
+from ..metrics import HOME_ASSISTANT_FETCH_SECONDS
+
+HOME_ASSISTANT_URL = os.getenv("HOME_ASSISTANT_URL")
+HOME_ASSISTANT_TOKEN = os.getenv("HOME_ASSISTANT_TOKEN")
+HOME_ASSISTANT_AGENT_ID = os.getenv("HOME_ASSISTANT_AGENT_ID", "261036381fb56fe719dac933c703ff68")
+HA_TIMEOUT_SECONDS = float(os.getenv("HA_TIMEOUT_SECONDS", "10"))
+HA_CONNECT_TIMEOUT = float(os.getenv("HA_CONNECT_TIMEOUT", "3"))
+HA_MAX_CONNECTIONS = int(os.getenv("HA_MAX_CONNECTIONS", "10"))
+HA_MAX_CONCURRENCY = int(os.getenv("HA_MAX_CONCURRENCY", "8"))
+# Home Assistant usually runs with a self-signed certificate on the local network
+HA_VERIFY_SSL = os.getenv("HA_VERIFY_SSL", "0") == "1"
+
+
+class HomeAssistantError(Exception):
+    """A Home Assistant request failed: unreachable, timed out or answered with an error status."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class HomeAssistantClient:
+    """
+    Async client for the Home Assistant REST API.
+
+    All Home Assistant calls share one pooled keep-alive connection, and at most
+    max_concurrency requests are in flight at once so a burst of tool calls
+    can't flood the instance. Failures are raised as HomeAssistantError.
+    """
+
+    def __init__(self, api_url: Optional[str] = HOME_ASSISTANT_URL, token: Optional[str] = HOME_ASSISTANT_TOKEN,
+                 timeout: float = HA_TIMEOUT_SECONDS, max_concurrency: int = HA_MAX_CONCURRENCY,
+                 http_client: Optional[httpx.AsyncClient] = None):
+        self.api_url = (api_url or "").rstrip("/")
+        self.headers = {"Authorization": f"Bearer {token}", "content-type": "application/json"}
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._http_client = http_client
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = make_http_client(
+                verify=HA_VERIFY_SSL,
+                limits=httpx.Limits(max_connections=HA_MAX_CONNECTIONS, max_keepalive_connections=HA_MAX_CONNECTIONS),
+                timeout=httpx.Timeout(self.timeout, connect=HA_CONNECT_TIMEOUT),
+            )
+        return self._http_client
+
+    async def close(self) -> None:
+        if self._http_client is not None:
+            await self._http_client.aclose()
+
+    async def request(self, method: str, path: str, json: Any = None, endpoint: Optional[str] = None) -> Any:
+        """Send a request to the API path and return the decoded JSON body."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            try:
+                with HOME_ASSISTANT_FETCH_SECONDS.time(endpoint=endpoint or path.strip("/")):
+                    response = await self.http_client.request(method, f"{self.api_url}{path}", json=json, headers=self.headers)
+            except httpx.HTTPError as e:
+                raise HomeAssistantError(f"Home Assistant request to {path} failed: {e!r}") from e
+
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("message", response.text)
+            except (ValueError, AttributeError):
+                message = response.text
+            raise HomeAssistantError(f"Home Assistant returned {response.status_code} for {path}: {message}", response.status_code)
+        try:
+            return response.json() if response.content else None
+        except ValueError as e:
+            # A proxy's error page or a truncated body
+            raise HomeAssistantError(f"Home Assistant returned an unreadable body for {path}: {e}", response.status_code) from e
+
+    async def get_states(self) -> List[dict]:
+        return await self.request("GET", "/states", endpoint="states")
+
+    async def get_state(self, entity_id: str) -> dict:
+        return await self.request("GET", f"/states/{entity_id}", endpoint="states/entity")
+
+    async def set_state(self, entity_id: str, state: str, attributes: Optional[dict] = None) -> dict:
+        data = {"state": state}
+        if attributes:
+            data["attributes"] = attributes
+        return await self.request("POST", f"/states/{entity_id}", json=data, endpoint="states/entity")
+
+    async def call_service(self, domain: str, service: str, data: Optional[dict] = None) -> List[dict]:
+        """Call a service directly; returns the states it changed."""
+        return await self.request("POST", f"/services/{domain}/{service}", json=data or {}, endpoint="services")
+
+    async def get_history(self, entity_id: str, start: str, end: str) -> List[List[dict]]:
+        """State changes of one entity between two ISO timestamps, without attributes."""
+        path = f"/history/period/{quote(start)}?" + urlencode({
+            "filter_entity_id": entity_id,
+            "end_time": end,
+            "minimal_response": "",
+            "no_attributes": "",
+        })
+        return await self.request("GET", path, endpoint="history")
+
+    async def get_shopping_list(self) -> List[dict]:
+        return await self.request("GET", "/shopping_list", endpoint="shopping_list")
+
+    async def add_shopping_item(self, name: str) -> dict:
+        return await self.request("POST", "/shopping_list", json={"name": name}, endpoint="shopping_list")
+
+    async def update_shopping_item(self, item_id: str, name: Optional[str] = None, complete: Optional[bool] = None) -> dict:
+        data = {key: value for key, value in (("name", name), ("complete", complete)) if value is not None}
+        return await self.request("POST", f"/shopping_list/item/{item_id}", json=data, endpoint="shopping_list/item")
+
+    async def process_conversation(self, text: str, agent_id: str = HOME_ASSISTANT_AGENT_ID) -> dict:
+        return await self.request("POST", "/conversation/process", json={"text": text, "agent_id": agent_id}, endpoint="conversation/process")
+
+
+HOME_ASSISTANT = HomeAssistantClient()
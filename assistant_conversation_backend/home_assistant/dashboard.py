@@ -0,0 +1,202 @@
+import os
+import re
+import json
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from ..metrics import REGISTRY
+
+DASHBOARD_SPEC_PATH = os.getenv("DASHBOARD_SPEC_PATH", os.path.join(os.path.dirname(__file__), "dashboard.json"))
+# Sections are re-rendered at least this often even if none of their entities changed
+DASHBOARD_SECTION_TTL = float(os.getenv("DASHBOARD_SECTION_TTL", "300"))
+
+DASHBOARD_RENDER_SECONDS = REGISTRY.histogram(
+    "assistant_dashboard_render_seconds",
+    "Time to render the Home Assistant dashboard summary.",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05),
+)
+DASHBOARD_SIZE_BYTES = REGISTRY.gauge("assistant_dashboard_size_bytes", "Size of the last rendered dashboard summary.")
+DASHBOARD_SECTIONS_TOTAL = REGISTRY.counter(
+    "assistant_dashboard_sections_total",
+    "Dashboard sections served per turn, by whether they came from the cache or were rendered.",
+    ["result"],
+)
+
+MISSING = "N/A"
+
+# {entity_id} is the state and {entity_id:attribute} an attribute; ?text replaces a missing value
+# and |formatter transforms the value, e.g. {person.me:friendly_name?Unknown} or {sensor.speed|int}
+PLACEHOLDER = re.compile(
+    r"\{(?P<entity>[a-z0-9_]+\.[a-z0-9_]+)(?::(?P<attribute>[a-z0-9_]+))?"
+    r"(?:\?(?P<default>[^}|]*))?(?:\|(?P<formatter>[a-z_]+))?\}"
+)
+
+
+def format_int(value):
+    try:
+        return int(float(value))
+    except (ValueError, TypeError):
+        return value
+
+
+FORMATTERS: Dict[str, Callable] = {
+    "int": format_int,
+}
+
+SECTION_TYPES = ("lines", "shopping_list", "forecast")
+
+
+def load_dashboard_spec(path: str = DASHBOARD_SPEC_PATH) -> dict:
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    for section in spec["sections"]:
+        section_type = section.get("type", "lines")
+        if section_type not in SECTION_TYPES:
+            raise ValueError(f"Unknown dashboard section type {section_type!r} in {section['title']!r}")
+        for line in section.get("lines", []):
+            for match in PLACEHOLDER.finditer(line):
+                if match["formatter"] and match["formatter"] not in FORMATTERS:
+                    raise ValueError(f"Unknown dashboard formatter {match['formatter']!r} in {line!r}")
+    return spec
+
+
+def section_entities(section: dict) -> List[str]:
+    """The entity IDs a section reads, in order of first use."""
+    if section.get("type") == "forecast":
+        return [section["entity"]]
+    entities = []
+    for line in section.get("lines", []):
+        for match in PLACEHOLDER.finditer(line):
+            if match["entity"] not in entities:
+                entities.append(match["entity"])
+    return entities
+
+
+def fill(template: str, states: Dict[str, dict]) -> str:
+    def value(match):
+        state = states.get(match["entity"], {})
+        default = MISSING if match["default"] is None else match["default"]
+        if match["attribute"]:
+            result = state.get("attributes", {}).get(match["attribute"], default)
+        else:
+            result = state.get("state", default)
+        if match["formatter"]:
+            result = FORMATTERS[match["formatter"]](result)
+        return str(result)
+
+    return PLACEHOLDER.sub(value, template)
+
+
+def render_lines(section: dict, states: Dict[str, dict], shopping_list: List[dict]) -> List[str]:
+    return [fill(line, states) for line in section["lines"]]
+
+
+def render_shopping_list(section: dict, states: Dict[str, dict], shopping_list: List[dict]) -> List[str]:
+    if not shopping_list:
+        return ["No shopping list items found."]
+    lines = []
+    active_items = [item for item in shopping_list if not item.get("complete", False)]
+    completed_items = [item for item in shopping_list if item.get("complete", False)]
+
+    if active_items:
+        lines.append("**Items to buy:**")
+        lines.extend(f"- {item.get('name', 'Unknown item')}" for item in active_items)
+    else:
+        lines.append("No items to buy.")
+
+    if completed_items:
+        lines.append("\n**Completed items:**")
+        limit = section.get("completed_limit", 5)
+        lines.extend(f"- {item.get('name', 'Unknown item')} ✓" for item in completed_items[:limit])
+    return lines
+
+
+def render_forecast(section: dict, states: Dict[str, dict], shopping_list: List[dict]) -> List[str]:
+    attributes = states.get(section["entity"], {}).get("attributes", {})
+    forecast = attributes.get("forecast", [])
+    if not forecast:
+        return ["- No forecast data available."]
+    precipitation_unit = attributes.get("precipitation_unit", "mm")
+    return [
+        f"- {day.get('datetime', MISSING)}: {day.get('condition', MISSING)}, high: {day.get('temperature', MISSING)}°C, "
+        f"low: {day.get('templow', MISSING)}°C, precipitation: {day.get('precipitation', MISSING)}{precipitation_unit}"
+        for day in forecast
+    ]
+
+
+RENDERERS = {
+    "lines": render_lines,
+    "shopping_list": render_shopping_list,
+    "forecast": render_forecast,
+}
+
+
+class DashboardRenderer:
+    """
+    Renders the dashboard summary from a declarative spec of sections.
+
+    Each rendered section is cached together with the inputs it was rendered
+    from: the states of the entities it references, or the shopping list. A
+    section is rendered again only when one of those inputs changed or its
+    cached text is older than ttl seconds.
+    """
+
+    def __init__(self, spec: dict, ttl: float = DASHBOARD_SECTION_TTL, clock: Callable[[], float] = time.monotonic):
+        self.title = spec.get("title", "Home Assistant Dashboard Summary")
+        self.sections = spec["sections"]
+        self.ttl = ttl
+        self.clock = clock
+        self._entities = [section_entities(section) for section in self.sections]
+        self._cache: List[Optional[Tuple[tuple, str, float]]] = [None] * len(self.sections)
+        self.last_render = {}
+
+    def _inputs(self, index: int, states: Dict[str, dict], shopping_list: List[dict]) -> tuple:
+        if self.sections[index].get("type") == "shopping_list":
+            return (shopping_list,)
+        return tuple(states.get(entity_id) for entity_id in self._entities[index])
+
+    @staticmethod
+    def _same(cached: tuple, current: tuple) -> bool:
+        # The state mirror swaps in a new dict on every change, so identity settles most checks
+        return all(a is b or a == b for a, b in zip(cached, current))
+
+    def render(self, states: Dict[str, dict], shopping_list: List[dict]) -> str:
+        start = time.perf_counter()
+        now = self.clock()
+        parts = [f"# {self.title}\n"]
+        rendered = 0
+
+        for index, section in enumerate(self.sections):
+            inputs = self._inputs(index, states, shopping_list)
+            cached = self._cache[index]
+            if cached is not None and now - cached[2] < self.ttl and self._same(cached[0], inputs):
+                parts.append(cached[1])
+                continue
+
+            lines = [f"### {section['title']}"]
+            lines.extend(RENDERERS[section.get("type", "lines")](section, states, shopping_list))
+            text = "\n".join(lines) + "\n"
+            self._cache[index] = (inputs, text, now)
+            parts.append(text)
+            rendered += 1
+
+        dashboard = "\n".join(parts)
+        seconds = time.perf_counter() - start
+        size = len(dashboard.encode("utf-8"))
+
+        DASHBOARD_RENDER_SECONDS.observe(seconds)
+        DASHBOARD_SIZE_BYTES.set(size)
+        DASHBOARD_SECTIONS_TOTAL.inc(rendered, result="rendered")
+        DASHBOARD_SECTIONS_TOTAL.inc(len(self.sections) - rendered, result="cached")
+        self.last_render = {
+            "seconds": seconds,
+            "bytes": size,
+            "rendered_sections": rendered,
+            "cached_sections": len(self.sections) - rendered,
+        }
+        return dashboard
+
+    def invalidate(self) -> None:
+        self._cache = [None] * len(self.sections)
+
+
+DASHBOARD = DashboardRenderer(load_dashboard_spec())
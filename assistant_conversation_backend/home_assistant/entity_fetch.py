@@ -0,0 +1,90 @@
+import os
+import time
+import asyncio
+from typing import Callable, Dict, List, Optional, Tuple
+from .client import HOME_ASSISTANT, HomeAssistantClient, HomeAssistantError
+from ..metrics import REGISTRY
+
+# Asking for this many uncached entities pulls /states once instead of one request per entity
+HA_BULK_CROSSOVER = int(os.getenv("HA_BULK_CROSSOVER", "16"))
+HA_STATE_CACHE_TTL = float(os.getenv("HA_STATE_CACHE_TTL", "2"))
+
+HA_ENTITY_FETCH_TOTAL = REGISTRY.counter(
+    "assistant_ha_entity_fetch_total",
+    "Entity states returned by the bulk fetcher, by where they came from: cache, single or bulk.",
+    ["source"],
+)
+
+NOT_FOUND = {"message": "Entity not found."}
+
+
+class EntityStateFetcher:
+    """
+    Fetches the states of many entities at once.
+
+    Cached states younger than ttl are reused. The rest are requested
+    concurrently, one /states/<entity_id> call each, within the client's
+    concurrency cap; when at least crossover entities are missing, /states is
+    pulled once and filtered locally instead, which also refreshes the cache
+    for every other entity.
+    """
+
+    def __init__(self, client: HomeAssistantClient = HOME_ASSISTANT, crossover: int = HA_BULK_CROSSOVER,
+                 ttl: float = HA_STATE_CACHE_TTL, clock: Callable[[], float] = time.monotonic):
+        self.client = client
+        self.crossover = crossover
+        self.ttl = ttl
+        self.clock = clock
+        self._cache: Dict[str, Tuple[dict, float]] = {}
+
+    def _cached(self, entity_id: str, now: float) -> Optional[dict]:
+        entry = self._cache.get(entity_id)
+        if entry is not None and now - entry[1] < self.ttl:
+            return entry[0]
+        return None
+
+    async def _fetch_one(self, entity_id: str) -> dict:
+        try:
+            state = await self.client.get_state(entity_id)
+        except HomeAssistantError as e:
+            return NOT_FOUND if e.status == 404 else {"message": str(e)}
+        self._cache[entity_id] = (state, self.clock())
+        return state
+
+    async def fetch(self, entity_ids: List[str]) -> List[dict]:
+        """States in the order requested; unknown entities get the REST API's not-found message."""
+        now = self.clock()
+        results: Dict[str, dict] = {}
+        for entity_id in entity_ids:
+            state = self._cached(entity_id, now)
+            if state is not None:
+                results[entity_id] = state
+        HA_ENTITY_FETCH_TOTAL.inc(len(results), source="cache")
+
+        missing = [entity_id for entity_id in dict.fromkeys(entity_ids) if entity_id not in results]
+        if len(missing) >= self.crossover:
+            try:
+                states = await self.client.get_states()
+            except HomeAssistantError as e:
+                error = {"message": str(e)}
+                return [results.get(entity_id, error) for entity_id in entity_ids]
+            fetched_at = self.clock()
+            self._cache = {state["entity_id"]: (state, fetched_at) for state in states}
+            for entity_id in missing:
+                results[entity_id] = self._cache[entity_id][0] if entity_id in self._cache else NOT_FOUND
+            HA_ENTITY_FETCH_TOTAL.inc(len(missing), source="bulk")
+        elif missing:
+            states = await asyncio.gather(*(self._fetch_one(entity_id) for entity_id in missing))
+            results.update(zip(missing, states))
+            HA_ENTITY_FETCH_TOTAL.inc(len(missing), source="single")
+
+        return [results[entity_id] for entity_id in entity_ids]
+
+    def invalidate(self, entity_id: Optional[str] = None) -> None:
+        if entity_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(entity_id, None)
+
+
+ENTITY_FETCHER = EntityStateFetcher()
@@ -0,0 +1,231 @@
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .client import HOME_ASSISTANT, HomeAssistantClient
+from .state_mirror import STATE_MIRROR, StateMirror
+from ..metrics import REGISTRY
+
+# Samples kept per entity; the oldest are overwritten first
+HA_HISTORY_CAPACITY = int(os.getenv("HA_HISTORY_CAPACITY", "2048"))
+HA_HISTORY_BUCKETS = int(os.getenv("HA_HISTORY_BUCKETS", "12"))
+HA_HISTORY_MAX_HOURS = float(os.getenv("HA_HISTORY_MAX_HOURS", "168"))
+
+HA_HISTORY_ENTITIES = REGISTRY.gauge("assistant_ha_history_entities", "Entities with an in-memory history buffer.")
+HA_HISTORY_BACKFILLS_TOTAL = REGISTRY.counter("assistant_ha_history_backfills_total", "History windows loaded from Home Assistant, by outcome.", ["outcome"])
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def numeric(state: Optional[str]) -> Optional[float]:
+    try:
+        value = float(state)
+    except (TypeError, ValueError):
+        return None
+    return value if np.isfinite(value) else None
+
+
+class RingBuffer:
+    """Fixed-size timestamp/value buffer for one entity, kept in time order."""
+
+    def __init__(self, capacity: int):
+        self.times = np.empty(capacity)
+        self.values = np.empty(capacity)
+        self.capacity = capacity
+        self.start = 0
+        self.size = 0
+
+    def append(self, timestamp: float, value: float) -> None:
+        if self.size and timestamp < self.times[(self.start + self.size - 1) % self.capacity]:
+            # Late sample; merge so the buffer stays sorted
+            times, values = self.arrays()
+            self.replace(np.append(times, timestamp), np.append(values, value))
+            return
+        end = (self.start + self.size) % self.capacity
+        self.times[end] = timestamp
+        self.values[end] = value
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Timestamps and values, oldest first."""
+        index = (self.start + np.arange(self.size)) % self.capacity
+        return self.times[index], self.values[index]
+
+    def replace(self, times: np.ndarray, values: np.ndarray) -> None:
+        order = np.argsort(times, kind="stable")
+        times, values = times[order][-self.capacity:], values[order][-self.capacity:]
+        self.size = len(times)
+        self.start = 0
+        self.times[:self.size] = times
+        self.values[:self.size] = values
+
+    def oldest(self) -> Optional[float]:
+        return float(self.times[self.start]) if self.size else None
+
+
+def downsample(times: np.ndarray, values: np.ndarray, start: float, end: float, buckets: int) -> dict:
+    """
+    Min, max and mean of the samples in each of `buckets` equal slices of
+    [start, end), plus the least-squares trend in units per hour. Times must
+    be sorted. Empty buckets have a count of 0 and NaN statistics.
+    """
+    first, last = np.searchsorted(times, [start, end])
+    times, values = times[first:last], values[first:last]
+    edges = np.linspace(start, end, buckets + 1)
+    bounds = np.searchsorted(times, edges[:-1])
+    counts = np.diff(np.append(bounds, len(times)))
+
+    minimum = np.full(buckets, np.nan)
+    maximum = np.full(buckets, np.nan)
+    mean = np.full(buckets, np.nan)
+    filled = counts > 0
+    if filled.any():
+        # reduceat over the start of every non-empty bucket covers exactly that bucket's samples
+        starts = bounds[filled]
+        minimum[filled] = np.minimum.reduceat(values, starts)
+        maximum[filled] = np.maximum.reduceat(values, starts)
+        mean[filled] = np.add.reduceat(values, starts) / counts[filled]
+
+    trend = None
+    if len(times) >= 2 and times[-1] > times[0]:
+        hours = (times - times[0]) / 3600
+        trend = float(np.polyfit(hours, values, 1)[0])
+
+    return {"edges": edges, "count": counts, "min": minimum, "max": maximum, "mean": mean, "trend": trend,
+            "times": times, "values": values}
+
+
+def format_value(value: float) -> str:
+    return f"{value:.3g}" if abs(value) < 1000 else f"{value:.0f}"
+
+
+class SensorHistoryStore:
+    """
+    In-memory history of numeric entity states.
+
+    Every numeric state change seen by the state mirror is appended to a ring
+    buffer for that entity. When a question asks for a window older than the
+    buffer reaches, the window is loaded once from Home Assistant's history
+    API and merged in.
+    """
+
+    def __init__(self, mirror: StateMirror = STATE_MIRROR, client: HomeAssistantClient = HOME_ASSISTANT,
+                 capacity: int = HA_HISTORY_CAPACITY, buckets: int = HA_HISTORY_BUCKETS):
+        self.mirror = mirror
+        self.client = client
+        self.capacity = capacity
+        self.buckets = buckets
+        self.buffers: Dict[str, RingBuffer] = {}
+        self._backfilled_from: Dict[str, float] = {}
+        # Name and unit from the last numeric state, still known while the sensor is unavailable
+        self.attributes: Dict[str, dict] = {}
+        mirror.add_listener(self.record)
+
+    def record(self, entity_id: str, old: Optional[dict], new: Optional[dict]) -> None:
+        if new is None:
+            return
+        value = numeric(new.get("state"))
+        if value is None:
+            return
+        timestamp = parse_timestamp(new.get("last_changed")) or time.time()
+        if entity_id not in self.buffers:
+            self.buffers[entity_id] = RingBuffer(self.capacity)
+            HA_HISTORY_ENTITIES.set(len(self.buffers))
+        self.buffers[entity_id].append(timestamp, value)
+        if new.get("attributes"):
+            self.attributes[entity_id] = new["attributes"]
+
+    async def backfill(self, entity_id: str, start: float, end: float) -> None:
+        try:
+            history = await self.client.get_history(
+                entity_id,
+                datetime.fromtimestamp(start, timezone.utc).isoformat(),
+                datetime.fromtimestamp(end, timezone.utc).isoformat(),
+            )
+        except Exception as e:
+            print(f"Error loading history for {entity_id}: {e}")
+            HA_HISTORY_BACKFILLS_TOTAL.inc(outcome="error")
+            return
+
+        points = [
+            (parse_timestamp(item.get("last_changed")), numeric(item.get("state")))
+            for series in history for item in series
+        ]
+        points = [(t, v) for t, v in points if t is not None and v is not None]
+        buffer = self.buffers.setdefault(entity_id, RingBuffer(self.capacity))
+        HA_HISTORY_ENTITIES.set(len(self.buffers))
+        times, values = buffer.arrays()
+        if points:
+            loaded_times, loaded_values = np.array(points).T
+            # The buffer wins where both have a sample at the same moment
+            keep = ~np.isin(loaded_times, times)
+            buffer.replace(np.concatenate([loaded_times[keep], times]), np.concatenate([loaded_values[keep], values]))
+        self._backfilled_from[entity_id] = start
+        HA_HISTORY_BACKFILLS_TOTAL.inc(outcome="loaded")
+
+    async def summary(self, entity_id: str, hours: float, now: Optional[float] = None) -> str:
+        """A prompt-sized description of how the entity changed over the last `hours` hours."""
+        hours = min(max(hours, 0.1), HA_HISTORY_MAX_HOURS)
+        end = time.time() if now is None else now
+        start = end - hours * 3600
+
+        buffer = self.buffers.get(entity_id)
+        covered = buffer is not None and buffer.oldest() is not None and buffer.oldest() <= start
+        if not covered and self._backfilled_from.get(entity_id, float("inf")) > start:
+            await self.backfill(entity_id, start, end)
+            buffer = self.buffers.get(entity_id)
+
+        times, values = buffer.arrays() if buffer is not None else (np.empty(0), np.empty(0))
+        # A sensor that didn't change keeps its last value, so carry it into the window
+        before = np.searchsorted(times, start)
+        carried = before > 0 and (before == len(times) or times[before] > start)
+        if carried:
+            times = np.concatenate([[start], times[before:]])
+            values = np.concatenate([[values[before - 1]], values[before:]])
+
+        stats = downsample(times, values, start, end, self.buckets)
+        if not stats["count"].sum():
+            return f"No numeric history for {entity_id} in the last {hours:g} hours."
+
+        attributes = self.attributes.get(entity_id) or (self.mirror.get(entity_id) or {}).get("attributes", {})
+        unit = attributes.get("unit_of_measurement", "")
+        name = attributes.get("friendly_name", entity_id)
+        # The carried value counts towards the buckets, but it wasn't measured at the window's start
+        sample_times, sample_values = stats["times"][int(carried):], stats["values"][int(carried):]
+
+        def clock(timestamp):
+            return datetime.fromtimestamp(timestamp).strftime("%H:%M" if hours <= 24 else "%a %H:%M")
+
+        lines = [f"{name} ({entity_id}) over the last {hours:g} hours, {len(sample_values)} samples, unit {unit or 'none'}:"]
+        if len(sample_values):
+            low, high = int(np.argmin(sample_values)), int(np.argmax(sample_values))
+            lines.append(
+                f"latest {format_value(sample_values[-1])}, min {format_value(sample_values[low])} at {clock(sample_times[low])}, "
+                f"max {format_value(sample_values[high])} at {clock(sample_times[high])}, mean {format_value(float(np.mean(sample_values)))}"
+            )
+        else:
+            lines.append(f"unchanged at {format_value(stats['values'][0])} since before the window")
+        if stats["trend"] is not None:
+            direction = "rising" if stats["trend"] > 0 else "falling" if stats["trend"] < 0 else "flat"
+            lines.append(f"trend {stats['trend']:+.3g} {unit}/h ({direction})")
+        for index in range(self.buckets):
+            if stats["count"][index]:
+                lines.append(
+                    f"{clock(stats['edges'][index])}-{clock(stats['edges'][index + 1])}: "
+                    f"min {format_value(stats['min'][index])}, mean {format_value(stats['mean'][index])}, max {format_value(stats['max'][index])}"
+                )
+        return "\n".join(lines)
+
+
+HISTORY = SensorHistoryStore()
@@ -0,0 +1,294 @@
+import os
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from .client import HOME_ASSISTANT, HomeAssistantClient
+from .state_mirror import STATE_MIRROR, StateMirror
+from ..metrics import REGISTRY
+
+HA_RESOLVER = os.getenv("HA_RESOLVER", "1") == "1"
+HA_RESOLVER_MIN_SCORE = float(os.getenv("HA_RESOLVER_MIN_SCORE", "0.6"))
+# The best match must beat the runner-up by this much, otherwise the request is ambiguous
+HA_RESOLVER_MARGIN = float(os.getenv("HA_RESOLVER_MARGIN", "0.1"))
+# How long an index built from /states is used when the state mirror isn't connected
+HA_INDEX_TTL = float(os.getenv("HA_INDEX_TTL", "60"))
+
+HA_COMMAND_SECONDS = REGISTRY.histogram(
+    "assistant_ha_command_seconds",
+    "Latency of Home Assistant agent requests, by path: direct service call or the conversation API.",
+    ["path"],
+)
+HA_RESOLUTIONS_TOTAL = REGISTRY.counter(
+    "assistant_ha_resolutions_total",
+    "Home Assistant agent requests by local resolution outcome: resolved, ambiguous or unmatched.",
+    ["outcome"],
+)
+
+TOGGLE_DOMAINS = ("light", "switch", "fan", "input_boolean", "media_player", "climate")
+CONTROLLABLE_DOMAINS = TOGGLE_DOMAINS + ("cover", "lock", "scene", "script")
+
+# Nouns that name a domain, so "the kitchen lights" can target every light in the kitchen
+DOMAIN_NOUNS = {
+    "light": "light", "lights": "light", "lamp": "light", "lamps": "light",
+    "switch": "switch", "switches": "switch", "fan": "fan", "fans": "fan",
+    "blind": "cover", "blinds": "cover", "curtain": "cover", "curtains": "cover", "cover": "cover", "covers": "cover",
+}
+FILLER = {"the", "a", "an", "please", "my", "in", "of", "all", "and"}
+# Conditions, exceptions, delays and partial amounts the direct path can't carry out
+QUALIFIERS = re.compile(
+    r"\b(?:except|but|unless|when|whenever|while|if|once|after|before|until|till|then|every|"
+    r"halfway|half|partly|percent|seconds?|minutes?|hours?|tomorrow|tonight|later)\b|%|\bin \d+"
+)
+POLITE_PREFIX = re.compile(r"^(?:please |can you |could you |would you )+")
+
+PAST_TENSE = {
+    "turn_on": "Turned on", "turn_off": "Turned off", "toggle": "Toggled", "open_cover": "Opened",
+    "close_cover": "Closed", "lock": "Locked", "unlock": "Unlocked",
+}
+
+
+def normalize(text: str) -> str:
+    text = text.lower().replace("_", " ")
+    text = re.sub(r"[^a-z0-9% ]+", " ", text)
+    return " ".join(text.split())
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a: Set[str], b: Set[str]) -> float:
+    """Dice coefficient of two trigram sets."""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def covers(vocabulary: Iterable[str], phrase: str, min_score: float) -> bool:
+    """Whether every word of the phrase is, or closely resembles, a word of the vocabulary."""
+    vocabulary = set(vocabulary)
+    for word in phrase.split():
+        if word in vocabulary:
+            continue
+        grams = trigrams(word)
+        if max((similarity(grams, trigrams(known)) for known in vocabulary), default=0.0) < min_score:
+            return False
+    return True
+
+
+@dataclass
+class IndexEntry:
+    entity_id: str
+    domain: str
+    name: str
+    area: Optional[str]
+    aliases: List[Set[str]] = field(default_factory=list)
+    words: Set[str] = field(default_factory=set)
+
+
+class EntityIndex:
+    """
+    Trigram index over controllable entities. Each entity is found by its
+    friendly name, its object id, and its name prefixed with its area.
+    """
+
+    def __init__(self, states: Iterable[dict], areas: Dict[str, str]):
+        self.entries: List[IndexEntry] = []
+        self._by_gram: Dict[str, Set[int]] = defaultdict(set)
+        self.areas: Dict[str, Set[str]] = {}
+
+        for state in states:
+            entity_id = state["entity_id"]
+            domain, object_id = entity_id.split(".", 1)
+            if domain not in CONTROLLABLE_DOMAINS:
+                continue
+            name = state.get("attributes", {}).get("friendly_name") or object_id.replace("_", " ")
+            area = areas.get(entity_id)
+            names = {normalize(name), normalize(object_id)}
+            if area and normalize(area) not in normalize(name):
+                names.add(normalize(f"{area} {name}"))
+            words = {word for n in names for word in n.split()}
+            words |= {noun for noun, noun_domain in DOMAIN_NOUNS.items() if noun_domain == domain}
+            entry = IndexEntry(entity_id, domain, name, area, [trigrams(n) for n in names], words)
+
+            position = len(self.entries)
+            self.entries.append(entry)
+            for grams in entry.aliases:
+                for gram in grams:
+                    self._by_gram[gram].add(position)
+            if area:
+                self.areas.setdefault(area, trigrams(normalize(area)))
+
+    def search(self, phrase: str, domains: Iterable[str]) -> List[Tuple[float, IndexEntry]]:
+        """Entities in the given domains ranked by similarity to the phrase, best first."""
+        query = trigrams(normalize(phrase))
+        candidates = set()
+        for gram in query:
+            candidates |= self._by_gram.get(gram, set())
+        domains = set(domains)
+        scored = []
+        for position in candidates:
+            entry = self.entries[position]
+            if entry.domain in domains:
+                scored.append((max(similarity(query, alias) for alias in entry.aliases), entry))
+        scored.sort(key=lambda match: match[0], reverse=True)
+        return scored
+
+    def match_area(self, phrase: str) -> Tuple[float, Optional[str]]:
+        query = trigrams(normalize(phrase))
+        return max(((similarity(query, grams), area) for area, grams in self.areas.items()), default=(0.0, None))
+
+    def in_area(self, area: str, domain: str) -> List[IndexEntry]:
+        return [entry for entry in self.entries if entry.area == area and entry.domain == domain]
+
+
+@dataclass
+class Intent:
+    service: str
+    domains: Tuple[str, ...]
+    target: str
+    data: dict = field(default_factory=dict)
+
+
+@dataclass
+class Resolution:
+    domain: str
+    service: str
+    entity_ids: List[str]
+    names: List[str]
+    data: dict
+    score: float
+
+    def describe(self) -> str:
+        names = ", ".join(self.names)
+        if "brightness_pct" in self.data:
+            return f"Set {names} to {self.data['brightness_pct']}% brightness."
+        if self.domain in ("scene", "script"):
+            return f"Activated {names}."
+        return f"{PAST_TENSE.get(self.service, self.service)} {names}."
+
+
+def clean_target(target: str) -> str:
+    return " ".join(word for word in target.split() if word not in FILLER)
+
+
+def parse_intent(message: str) -> Optional[Intent]:
+    """Recognise simple device commands. Anything else, including questions, returns None."""
+    text = POLITE_PREFIX.sub("", normalize(message))
+    text = re.sub(r" please$", "", text)
+
+    if m := re.fullmatch(r"(?:set|dim|brighten) (.+?) to (\d{1,3}) ?(?:%|percent)", text):
+        intent = Intent("turn_on", ("light",), m[1], {"brightness_pct": min(int(m[2]), 100)})
+    elif m := re.fullmatch(r"(?:turn|switch) (on|off) (.+)", text):
+        intent = Intent(f"turn_{m[1]}", TOGGLE_DOMAINS, m[2])
+    elif m := re.fullmatch(r"(?:turn|switch) (.+) (on|off)", text):
+        intent = Intent(f"turn_{m[2]}", TOGGLE_DOMAINS, m[1])
+    elif m := re.fullmatch(r"toggle (.+)", text):
+        intent = Intent("toggle", TOGGLE_DOMAINS, m[1])
+    elif m := re.fullmatch(r"(open|close) (.+)", text):
+        intent = Intent(f"{m[1]}_cover", ("cover",), m[2])
+    elif m := re.fullmatch(r"(lock|unlock) (.+)", text):
+        intent = Intent(m[1], ("lock",), m[2])
+    elif m := re.fullmatch(r"(?:activate|run) (.+)", text):
+        intent = Intent("turn_on", ("scene", "script"), m[1])
+    else:
+        return None
+    # "all the lights except the kitchen", "the lamp when I get home", "the blinds halfway"
+    if QUALIFIERS.search(intent.target):
+        return None
+    intent.target = clean_target(intent.target)
+    return intent
+
+
+class EntityResolver:
+    """
+    Resolves simple device commands ("turn off the kitchen lights") to a
+    service call without Home Assistant's conversation agent.
+
+    The index is built from the state mirror, and rebuilt when entities are
+    added, removed or renamed; without the mirror it is built from /states
+    and kept for index_ttl seconds. A request resolves only when its best
+    match scores at least min_score, beats the next entity by margin and
+    accounts for every word of the target; anything else is left to the
+    conversation API.
+    """
+
+    def __init__(self, mirror: StateMirror = STATE_MIRROR, client: HomeAssistantClient = HOME_ASSISTANT,
+                 min_score: float = HA_RESOLVER_MIN_SCORE, margin: float = HA_RESOLVER_MARGIN,
+                 index_ttl: float = HA_INDEX_TTL, clock: Callable[[], float] = time.monotonic):
+        self.mirror = mirror
+        self.client = client
+        self.min_score = min_score
+        self.margin = margin
+        self.index_ttl = index_ttl
+        self.clock = clock
+        self._index: Optional[EntityIndex] = None
+        self._index_source: Optional[object] = None
+        self._built_at = 0.0
+        mirror.add_listener(self._on_change)
+
+    def _on_change(self, entity_id: str, old: Optional[dict], new: Optional[dict]) -> None:
+        if old is None or new is None or old.get("attributes", {}).get("friendly_name") != new.get("attributes", {}).get("friendly_name"):
+            self._index = None
+
+    async def index(self) -> EntityIndex:
+        if self.mirror.is_fresh():
+            # The mirror swaps in a new areas dict when it reconnects
+            if self._index is None or self._index_source is not self.mirror.areas:
+                self._index = EntityIndex(self.mirror.states.values(), self.mirror.areas)
+                self._index_source = self.mirror.areas
+        elif self._index is None or self._index_source is not None or self.clock() - self._built_at > self.index_ttl:
+            self._index = EntityIndex(await self.client.get_states(), {})
+            self._index_source = None
+            self._built_at = self.clock()
+        return self._index
+
+    async def resolve(self, message: str) -> Optional[Resolution]:
+        intent = parse_intent(message)
+        if intent is None or not intent.target:
+            HA_RESOLUTIONS_TOTAL.inc(outcome="unmatched")
+            return None
+        index = await self.index()
+
+        return self._resolve_area(index, intent) or self._resolve_entity(index, intent)
+
+    def _resolve_area(self, index: EntityIndex, intent: Intent) -> Optional[Resolution]:
+        """'kitchen lights' or 'all lamps in the bedroom': every entity of that kind in the area."""
+        words = intent.target.split()
+        nouns = [word for word in words if word in DOMAIN_NOUNS]
+        if len(nouns) != 1 or not nouns[0].endswith("s"):
+            return None
+        domain = DOMAIN_NOUNS[nouns[0]]
+        if domain not in intent.domains:
+            return None
+        rest = " ".join(word for word in words if word != nouns[0])
+        score, area = index.match_area(rest)
+        if area is None or score < self.min_score or not covers(normalize(area).split(), rest, self.min_score):
+            return None
+        entries = index.in_area(area, domain)
+        if not entries:
+            return None
+        HA_RESOLUTIONS_TOTAL.inc(outcome="resolved")
+        return Resolution(domain, intent.service, [e.entity_id for e in entries], [e.name for e in entries], intent.data, score)
+
+    def _resolve_entity(self, index: EntityIndex, intent: Intent) -> Optional[Resolution]:
+        matches = index.search(intent.target, intent.domains)
+        if not matches or matches[0][0] < self.min_score:
+            HA_RESOLUTIONS_TOTAL.inc(outcome="unmatched")
+            return None
+        if len(matches) > 1 and matches[0][0] - matches[1][0] < self.margin:
+            HA_RESOLUTIONS_TOTAL.inc(outcome="ambiguous")
+            return None
+        score, entry = matches[0]
+        if not covers(entry.words, intent.target, self.min_score):
+            # "the living room lamp by the sofa": a close match, but not for all of it
+            HA_RESOLUTIONS_TOTAL.inc(outcome="unmatched")
+            return None
+        HA_RESOLUTIONS_TOTAL.inc(outcome="resolved")
+        return Resolution(entry.domain, intent.service, [entry.entity_id], [entry.name], intent.data, score)
+
+
+RESOLVER = EntityResolver() if HA_RESOLVER else None
@@ -0,0 +1,292 @@
+import os
+import asyncio
+import psycopg
+from typing import Dict, List, Optional
+from ulid import ULID
+from ..data_models import ShoppingItem
+from ..metrics import REGISTRY
+from ..resilience import ExponentialBackoff
+from .client import HOME_ASSISTANT, HomeAssistantClient, HomeAssistantError
+from .state_mirror import STATE_MIRROR, StateMirror
+
+# Home Assistant's shopping list entity; its state, the number of open items, changes on every edit
+HA_SHOPPING_LIST_ENTITY = os.getenv("HA_SHOPPING_LIST_ENTITY", "todo.shopping_list")
+# Full sync interval, for edits missed while the state mirror was disconnected
+HA_SHOPPING_SYNC_SECONDS = float(os.getenv("HA_SHOPPING_SYNC_SECONDS", "300"))
+
+SHOPPING_SYNC_CHANGES_TOTAL = REGISTRY.counter(
+    "assistant_shopping_sync_changes_total",
+    "Shopping list rows added, updated or removed by syncing with Home Assistant.",
+    ["change"],
+)
+SHOPPING_WRITE_BACKS_TOTAL = REGISTRY.counter(
+    "assistant_shopping_write_backs_total",
+    "Local shopping list changes written to Home Assistant, by outcome.",
+    ["outcome"],
+)
+SHOPPING_PENDING_WRITES = REGISTRY.gauge("assistant_shopping_pending_writes", "Local shopping list changes not yet written to Home Assistant.")
+
+
+class PostgresShoppingStore:
+    """Keeps the shopping list in the shopping_list table."""
+
+    async def _connect(self):
+        # database connects and creates the schema on import, so it is only imported once the store is used
+        from ..database import DSN
+        return await psycopg.AsyncConnection.connect(DSN)
+
+    async def load(self) -> List[ShoppingItem]:
+        from ..database import get_shopping_items
+        async with await self._connect() as conn:
+            return await get_shopping_items(conn)
+
+    async def save(self, items: List[ShoppingItem]) -> None:
+        from ..database import upsert_shopping_items
+        async with await self._connect() as conn:
+            # The helper logs and returns False on errors; raising keeps the items for the next write
+            if not await upsert_shopping_items(conn, items):
+                raise RuntimeError(f"Could not save {len(items)} shopping list items")
+
+    async def delete(self, item_ids: List[str]) -> None:
+        from ..database import delete_shopping_items
+        async with await self._connect() as conn:
+            if not await delete_shopping_items(conn, item_ids):
+                raise RuntimeError(f"Could not delete {len(item_ids)} shopping list items")
+
+
+class ShoppingList:
+    """
+    Local cache of the Home Assistant shopping list.
+
+    Reads are served from memory. The cache is loaded from the store at
+    startup and synced with Home Assistant whenever its shopping list entity
+    changes, and every sync_interval seconds; a sync only stores the items
+    that were added, changed or removed. Local edits apply to the cache at
+    once and are written back to Home Assistant in the background, retried
+    with backoff until they succeed.
+    """
+
+    def __init__(self, client: HomeAssistantClient = HOME_ASSISTANT, mirror: StateMirror = STATE_MIRROR, store=None,
+                 entity_id: str = HA_SHOPPING_LIST_ENTITY, sync_interval: float = HA_SHOPPING_SYNC_SECONDS,
+                 backoff: Optional[ExponentialBackoff] = None):
+        self.client = client
+        self.store = store
+        self.entity_id = entity_id
+        self.sync_interval = sync_interval
+        self.backoff = backoff or ExponentialBackoff(base=1, max_delay=60)
+        self.items: Dict[str, ShoppingItem] = {}
+        self.ready = False
+        self._versions: Dict[str, int] = {}  # Bumped on every local edit, so a write-back can tell it went stale
+        self._unstored: Dict[str, Optional[ShoppingItem]] = {}  # Changes the store hasn't taken yet; None for a removal
+        self._writes: asyncio.Queue = asyncio.Queue()
+        self._changed = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._tasks: List[asyncio.Task] = []
+        mirror.add_listener(self._on_state_change)
+
+    def _on_state_change(self, entity_id: str, old: Optional[dict], new: Optional[dict]) -> None:
+        if entity_id == self.entity_id:
+            self._changed.set()
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._run_sync()), asyncio.create_task(self._run_writes())]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    async def load(self) -> None:
+        """Fill the cache from the store, queueing edits that never reached Home Assistant."""
+        if self.store is None:
+            return
+        items = await self.store.load()
+        self.items = {item.item_id: item for item in items}
+        for item in items:
+            if item.needs_sync:
+                self._writes.put_nowait(item.item_id)
+        self._update_pending()
+        if items:
+            self.ready = True
+
+    async def sync(self) -> dict:
+        """Apply Home Assistant's list to the cache and store only what changed."""
+        added, updated, removed = [], [], []
+        # Holding the lock while fetching keeps a write-back from landing between the fetch and the diff
+        async with self._lock:
+            remote = await self.client.get_shopping_list()
+            by_ha_id = {item.ha_item_id: item for item in self.items.values() if item.ha_item_id}
+            for entry in remote:
+                name, complete = entry.get("name", ""), entry.get("complete", False)
+                item = by_ha_id.pop(entry["id"], None)
+                if item is None:
+                    item = ShoppingItem(str(ULID()), name, is_purchased=complete, ha_item_id=entry["id"])
+                    self.items[item.item_id] = item
+                    added.append(item)
+                elif item.needs_sync:
+                    # The local edit wins until it has been written back
+                    continue
+                elif (item.item_name, item.is_purchased) != (name, complete):
+                    item.item_name, item.is_purchased = name, complete
+                    updated.append(item)
+            for item in by_ha_id.values():
+                if not item.needs_sync:
+                    del self.items[item.item_id]
+                    removed.append(item.item_id)
+            self.ready = True
+
+        # Also retries whatever an earlier sync or edit failed to store
+        await self._store(added + updated, removed)
+        changes = {"added": len(added), "updated": len(updated), "removed": len(removed)}
+        for change, count in changes.items():
+            SHOPPING_SYNC_CHANGES_TOTAL.inc(count, change=change)
+        return changes
+
+    async def _run_sync(self) -> None:
+        try:
+            await self.load()
+        except Exception as e:
+            print(f"Error loading the stored shopping list: {e}")
+        attempt = 0
+        while True:
+            self._changed.clear()
+            try:
+                await self.sync()
+                attempt = 0
+            except Exception as e:
+                # Home Assistant or the store failing must not end the loop
+                print(f"Error syncing the shopping list: {e}")
+                await asyncio.sleep(self.backoff.delay(attempt))
+                attempt += 1
+                continue
+            try:
+                await asyncio.wait_for(self._changed.wait(), self.sync_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_writes(self) -> None:
+        attempt = 0
+        while True:
+            item_id = await self._writes.get()
+            item = self.items.get(item_id)
+            if item is None or not (item.needs_sync or item_id in self._unstored):
+                continue
+            try:
+                if item.needs_sync:
+                    await self._write_back(item)
+                    SHOPPING_WRITE_BACKS_TOTAL.inc(outcome="written")
+                else:
+                    # Home Assistant has it, only storing it failed
+                    await self._store()
+                attempt = 0
+            except Exception as e:
+                print(f"Error writing shopping list item {item.item_name!r} to Home Assistant: {e}")
+                SHOPPING_WRITE_BACKS_TOTAL.inc(outcome="failed")
+                self._writes.put_nowait(item_id)
+                await asyncio.sleep(self.backoff.delay(attempt))
+                attempt += 1
+            self._update_pending()
+
+    async def _write_back(self, item: ShoppingItem) -> None:
+        version = self._versions.get(item.item_id, 0)
+        async with self._lock:
+            if item.ha_item_id is None:
+                created = await self.client.add_shopping_item(item.item_name)
+                item.ha_item_id = created["id"]
+                if item.is_purchased:
+                    await self.client.update_shopping_item(item.ha_item_id, complete=True)
+            else:
+                try:
+                    await self.client.update_shopping_item(item.ha_item_id, name=item.item_name, complete=item.is_purchased)
+                except HomeAssistantError as e:
+                    if e.status != 404:
+                        raise
+                    # Removed in Home Assistant meanwhile; its removal wins
+                    self.items.pop(item.item_id, None)
+                    await self._store(removed=[item.item_id])
+                    return
+            # Edited again during the write; its own queue entry sends the newer values
+            if self._versions.get(item.item_id, 0) == version:
+                item.needs_sync = False
+        await self._store([item])
+
+    async def _edited(self, item: ShoppingItem) -> None:
+        self._versions[item.item_id] = self._versions.get(item.item_id, 0) + 1
+        if item.needs_sync:
+            self._writes.put_nowait(item.item_id)
+        self._update_pending()
+        try:
+            await self._store([item])
+        except Exception as e:
+            # The edit is kept in memory and stored with the next write-back or sync
+            print(f"Error storing shopping list item {item.item_name!r}: {e}")
+
+    async def _store(self, saved: List[ShoppingItem] = (), removed: List[str] = ()) -> None:
+        """Write changes to the store, keeping any that fail for the next call."""
+        if self.store is None:
+            return
+        self._unstored.update({item.item_id: item for item in saved})
+        self._unstored.update({item_id: None for item_id in removed})
+        if not self._unstored:
+            return
+        pending = dict(self._unstored)
+        saves = [item for item in pending.values() if item is not None]
+        if saves:
+            await self.store.save(saves)
+        deletes = [item_id for item_id, item in pending.items() if item is None]
+        if deletes:
+            await self.store.delete(deletes)
+        for item_id, item in pending.items():
+            if self._unstored.get(item_id) is item:
+                del self._unstored[item_id]
+
+    def _update_pending(self) -> None:
+        SHOPPING_PENDING_WRITES.set(sum(1 for item in self.items.values() if item.needs_sync))
+
+    async def get(self, is_purchased: Optional[bool] = None) -> List[ShoppingItem]:
+        if not self.ready:
+            try:
+                await self.sync()
+            except HomeAssistantError as e:
+                print(f"Error syncing the shopping list: {e}")
+        return [item for item in self.items.values() if is_purchased is None or item.is_purchased == is_purchased]
+
+    def as_home_assistant_list(self) -> List[dict]:
+        """The cached list in the shape of Home Assistant's /shopping_list response."""
+        return [
+            {"id": item.ha_item_id or item.item_id, "name": item.item_name, "complete": item.is_purchased}
+            for item in self.items.values()
+        ]
+
+    async def add(self, item_name: str, quantity: int = 1) -> ShoppingItem:
+        item = ShoppingItem(str(ULID()), item_name, quantity, needs_sync=True)
+        self.items[item.item_id] = item
+        await self._edited(item)
+        return item
+
+    async def update(self, item_id: str, item_name: Optional[str] = None, quantity: Optional[int] = None,
+                     is_purchased: Optional[bool] = None) -> Optional[ShoppingItem]:
+        item = self.items.get(item_id)
+        if item is None:
+            return None
+        if quantity is not None:
+            # Home Assistant has no quantities; they are only kept locally
+            item.quantity = quantity
+        if item_name is not None and item_name != item.item_name:
+            item.item_name = item_name
+            item.needs_sync = True
+        if is_purchased is not None and is_purchased != item.is_purchased:
+            item.is_purchased = is_purchased
+            item.needs_sync = True
+        await self._edited(item)
+        return item
+
+
+SHOPPING_LIST = ShoppingList(store=PostgresShoppingStore())
@@ -0,0 +1,224 @@
+import os
+import ssl
+import asyncio
+import aiohttp
+from typing import Callable, Dict, List, Optional
+from ..resilience import ExponentialBackoff
+from ..metrics import REGISTRY
+
+HOME_ASSISTANT_URL = os.getenv("HOME_ASSISTANT_URL")
+HOME_ASSISTANT_TOKEN = os.getenv("HOME_ASSISTANT_TOKEN")
+HA_STATE_MIRROR = os.getenv("HA_STATE_MIRROR", "1") == "1"
+
+HA_MIRROR_CONNECTED = REGISTRY.gauge("assistant_ha_mirror_connected", "1 while the Home Assistant websocket mirror is subscribed.")
+HA_MIRROR_ENTITIES = REGISTRY.gauge("assistant_ha_mirror_entities", "Entities held in the Home Assistant state mirror.")
+HA_MIRROR_EVENTS_TOTAL = REGISTRY.counter("assistant_ha_mirror_events_total", "state_changed events applied to the mirror.")
+HA_MIRROR_RECONNECTS_TOTAL = REGISTRY.counter("assistant_ha_mirror_reconnects_total", "Times the Home Assistant websocket was reconnected.")
+
+# Called with (entity_id, old_state, new_state); new_state is None when an entity is removed
+StateListener = Callable[[str, Optional[dict], Optional[dict]], None]
+
+
+def websocket_url(api_url: str) -> str:
+    """The websocket API address for a REST base URL such as http://hass:8123/api."""
+    url = api_url.rstrip("/")
+    if url.startswith("https://"):
+        url = "wss://" + url[len("https://"):]
+    elif url.startswith("http://"):
+        url = "ws://" + url[len("http://"):]
+    if not url.endswith("/api"):
+        url += "/api"
+    return url + "/websocket"
+
+
+def insecure_ssl_context() -> ssl.SSLContext:
+    # Home Assistant commonly runs with a self-signed certificate on the local network
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+class StateMirror:
+    """
+    In-memory copy of every Home Assistant entity state, kept current over the
+    websocket API instead of downloading /states on every turn.
+
+    On connect it subscribes to state_changed events, loads a snapshot with
+    get_states and replays any events that arrived in between. It reconnects
+    with backoff and reloads the snapshot after every reconnect. Until the
+    first snapshot is loaded `ready` is False; callers use the mirror only
+    while is_fresh() and fall back to REST otherwise.
+    """
+
+    def __init__(self, api_url: Optional[str] = HOME_ASSISTANT_URL, token: Optional[str] = HOME_ASSISTANT_TOKEN,
+                 backoff: Optional[ExponentialBackoff] = None):
+        self.url = websocket_url(api_url) if api_url else None
+        self.token = token
+        self.backoff = backoff or ExponentialBackoff(base=1, max_delay=60)
+        self.states: Dict[str, dict] = {}
+        self.areas: Dict[str, str] = {}  # entity_id -> area name, loaded on connect
+        self.ready = False
+        self.connected = False
+        self.listeners: List[StateListener] = []
+        self._ready_event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._next_id = 1
+
+    def is_fresh(self) -> bool:
+        """True while the states are a snapshot kept current by a live subscription."""
+        return self.ready and self.connected
+
+    def get(self, entity_id: str) -> Optional[dict]:
+        return self.states.get(entity_id)
+
+    def all(self) -> List[dict]:
+        return list(self.states.values())
+
+    def add_listener(self, listener: StateListener) -> None:
+        self.listeners.append(listener)
+
+    def start(self) -> None:
+        if self.url is None or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._set_connected(False)
+
+    async def wait_ready(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._ready_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.ready
+
+    def _set_connected(self, connected: bool) -> None:
+        self.connected = connected
+        HA_MIRROR_CONNECTED.set(1 if connected else 0)
+
+    async def _run(self) -> None:
+        attempt = 0
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    await self._connect(session)
+                    attempt = 0
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"Home Assistant websocket error: {e}")
+                self._set_connected(False)
+                HA_MIRROR_RECONNECTS_TOTAL.inc()
+                await asyncio.sleep(self.backoff.delay(attempt))
+                attempt += 1
+
+    def _message_id(self) -> int:
+        message_id = self._next_id
+        self._next_id += 1
+        return message_id
+
+    async def _connect(self, session: aiohttp.ClientSession) -> None:
+        ssl_context = insecure_ssl_context() if self.url.startswith("wss://") else True
+        async with session.ws_connect(self.url, ssl=ssl_context, heartbeat=30) as ws:
+            message = await ws.receive_json()
+            if message.get("type") == "auth_required":
+                await ws.send_json({"type": "auth", "access_token": self.token})
+                message = await ws.receive_json()
+            if message.get("type") != "auth_ok":
+                raise ConnectionError(f"Home Assistant authentication failed: {message.get('message', message)}")
+
+            subscription_id = self._message_id()
+            await ws.send_json({"id": subscription_id, "type": "subscribe_events", "event_type": "state_changed"})
+            snapshot_id = self._message_id()
+            await ws.send_json({"id": snapshot_id, "type": "get_states"})
+            # Areas are only in the registries; tokens without admin rights get an error and no areas
+            registries = {}
+            for registry in ("area", "device", "entity"):
+                message_id = self._message_id()
+                registries[message_id] = registry
+                await ws.send_json({"id": message_id, "type": f"config/{registry}_registry/list"})
+            registry_results = {}
+
+            pending_events = []
+            snapshot_loaded = False
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    break
+                data = msg.json()
+                if data.get("type") == "event" and data.get("id") == subscription_id:
+                    if snapshot_loaded:
+                        self._apply(data["event"]["data"])
+                    else:
+                        pending_events.append(data["event"]["data"])
+                elif data.get("type") == "result" and data.get("id") == snapshot_id:
+                    if not data.get("success"):
+                        raise ConnectionError(f"get_states failed: {data.get('error')}")
+                    self._load_snapshot(data["result"])
+                    for event_data in pending_events:
+                        self._apply(event_data)
+                    pending_events = []
+                    snapshot_loaded = True
+                    self._set_connected(True)
+                elif data.get("type") == "result" and data.get("id") in registries:
+                    if not data.get("success"):
+                        print(f"Home Assistant {registries[data['id']]} registry unavailable: {data.get('error')}")
+                        continue
+                    registry_results[registries[data["id"]]] = data["result"]
+                    if len(registry_results) == len(registries):
+                        self._load_areas(**registry_results)
+                elif data.get("type") == "result" and not data.get("success"):
+                    raise ConnectionError(f"Home Assistant rejected a request: {data.get('error')}")
+
+    def _load_areas(self, area: List[dict], device: List[dict], entity: List[dict]) -> None:
+        """Map each entity to its area name; an entity without its own area inherits its device's."""
+        area_names = {a["area_id"]: a["name"] for a in area}
+        device_areas = {d["id"]: d.get("area_id") for d in device}
+        areas = {}
+        for e in entity:
+            area_id = e.get("area_id") or device_areas.get(e.get("device_id"))
+            if area_id in area_names:
+                areas[e["entity_id"]] = area_names[area_id]
+        self.areas = areas
+
+    def _load_snapshot(self, states: List[dict]) -> None:
+        previous = self.states
+        self.states = {state["entity_id"]: state for state in states}
+        HA_MIRROR_ENTITIES.set(len(self.states))
+        # Entities that changed while disconnected are reported like live changes
+        for entity_id in previous.keys() | self.states.keys():
+            old, new = previous.get(entity_id), self.states.get(entity_id)
+            if old != new:
+                self._notify(entity_id, old, new)
+        self.ready = True
+        self._ready_event.set()
+
+    def _apply(self, event_data: dict) -> None:
+        entity_id = event_data["entity_id"]
+        old = self.states.get(entity_id)
+        new = event_data.get("new_state")
+        if new is None:
+            self.states.pop(entity_id, None)
+        else:
+            self.states[entity_id] = new
+        HA_MIRROR_EVENTS_TOTAL.inc()
+        HA_MIRROR_ENTITIES.set(len(self.states))
+        self._notify(entity_id, old, new)
+
+    def _notify(self, entity_id: str, old: Optional[dict], new: Optional[dict]) -> None:
+        for listener in self.listeners:
+            try:
+                listener(entity_id, old, new)
+            except Exception as e:
+                print(f"Error in state listener: {e}")
+
+
+# Started from app startup; with HA_STATE_MIRROR=0 it never connects and callers keep using REST
+STATE_MIRROR = StateMirror(HOME_ASSISTANT_URL if HA_STATE_MIRROR else None)
@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import asyncio
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import Callable, Dict, List, Optional
+from ..data_models import AIMessage
+from ..limits import TokenBucket
+from ..metrics import REGISTRY
+from ..state import MAIN_AI_QUEUE
+from .state_mirror import STATE_MIRROR, StateMirror
+
+HA_TRIGGERS = os.getenv("HA_TRIGGERS", "1") == "1"
+HA_TRIGGERS_PATH = os.getenv("HA_TRIGGERS_PATH", os.path.join(os.path.dirname(__file__), "triggers.json"))
+# Events delivered per hour across all rules; 0 disables the cap
+HA_TRIGGERS_PER_HOUR = float(os.getenv("HA_TRIGGERS_PER_HOUR", "30"))
+
+HA_TRIGGER_EVENTS_TOTAL = REGISTRY.counter(
+    "assistant_ha_trigger_events_total",
+    "Home Assistant state changes matched by a trigger rule, by whether they were delivered or why they were suppressed.",
+    ["rule", "outcome"],
+)
+
+RULE_KEYS = {"name", "entities", "from", "to", "min_change", "above", "below", "debounce", "min_interval", "message"}
+NUMERIC_KEYS = ("min_change", "above", "below")
+# Fields a rule's message can use, e.g. "{name} changed from {old} to {new}."
+MESSAGE_FIELDS = ("name", "entity_id", "old", "new", "unit", "area")
+
+
+def load_trigger_rules(path: str = HA_TRIGGERS_PATH) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        rules = json.load(f)["rules"]
+    for rule in rules:
+        unknown = set(rule) - RULE_KEYS
+        if unknown:
+            raise ValueError(f"Unknown trigger rule keys {sorted(unknown)} in {rule.get('name')!r}")
+        if not rule.get("name") or not rule.get("entities") or not rule.get("message"):
+            raise ValueError(f"Trigger rule {rule!r} needs a name, entities and a message")
+        try:
+            rule["message"].format(**{field: "" for field in MESSAGE_FIELDS})
+        except (KeyError, IndexError) as e:
+            raise ValueError(f"Unknown field {e} in trigger message {rule['message']!r}") from e
+    return rules
+
+
+def number(state: Optional[str]) -> Optional[float]:
+    try:
+        return float(state)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class PendingEvent:
+    handle: asyncio.TimerHandle
+    rule: dict
+    old: dict  # State before the first change of the burst
+
+
+class TriggerEngine:
+    """
+    Turns Home Assistant state changes into messages on the main AI queue.
+
+    A change is handled by the first rule whose entity patterns match, if it
+    passes the rule's from/to states. Numeric rules also need the value to
+    move at least min_change since the last delivered event, or to cross an
+    above/below threshold. The change must then hold for `debounce` seconds;
+    further changes restart the wait and a change that reverts is dropped.
+    Each entity fires at most once per min_interval seconds and all rules
+    together at most max_per_hour times. Every dropped change is counted.
+    """
+
+    def __init__(self, rules: List[dict], mirror: StateMirror = STATE_MIRROR, queue: asyncio.Queue = MAIN_AI_QUEUE,
+                 max_per_hour: float = HA_TRIGGERS_PER_HOUR, clock: Callable[[], float] = time.monotonic):
+        self.rules = rules
+        self.mirror = mirror
+        self.queue = queue
+        self.clock = clock
+        self.bucket = TokenBucket(max_per_hour / 3600, max(1.0, max_per_hour / 6), clock) if max_per_hour else None
+        self.counts: Dict[str, Dict[str, int]] = {rule["name"]: {} for rule in rules}
+        self._pending: Dict[str, PendingEvent] = {}
+        self._last_delivered: Dict[str, float] = {}
+        self._last_value: Dict[str, Optional[float]] = {}
+        mirror.add_listener(self.on_change)
+
+    def rule_for(self, entity_id: str) -> Optional[dict]:
+        for rule in self.rules:
+            if any(fnmatchcase(entity_id, pattern) for pattern in rule["entities"]):
+                return rule
+        return None
+
+    def on_change(self, entity_id: str, old: Optional[dict], new: Optional[dict]) -> None:
+        # New and removed entities, snapshot loads and attribute-only updates are not transitions
+        if old is None or new is None or old.get("state") == new.get("state"):
+            return
+        rule = self.rule_for(entity_id)
+        if rule is None:
+            return
+        pending = self._pending.get(entity_id)
+        start = pending.old if pending is not None else old
+        if not self._transition(rule, start, new):
+            # A pending event that reverted is dropped when its debounce ends
+            return
+        if not self._significant(rule, entity_id, start, new):
+            self._count(rule, "below_threshold")
+            return
+
+        if pending is not None:
+            pending.handle.cancel()
+            self._count(pending.rule, "debounced")
+        if not rule.get("debounce"):
+            self._pending.pop(entity_id, None)
+            self._deliver(rule, entity_id, start, new)
+            return
+        handle = asyncio.get_running_loop().call_later(rule["debounce"], self._settle, entity_id)
+        self._pending[entity_id] = PendingEvent(handle, rule, start)
+
+    def _transition(self, rule: dict, old: dict, new: dict) -> bool:
+        if old.get("state") == new.get("state"):
+            return False
+        if "from" in rule and old.get("state") not in rule["from"]:
+            return False
+        return "to" not in rule or new.get("state") in rule["to"]
+
+    def _significant(self, rule: dict, entity_id: str, old: dict, new: dict) -> bool:
+        if not any(key in rule for key in NUMERIC_KEYS):
+            return True
+        value, previous = number(new.get("state")), number(old.get("state"))
+        if value is None or previous is None:
+            return False
+        if "min_change" in rule:
+            # Measured from what the agent was last told, so slow drifts still add up
+            baseline = self._last_value.get(entity_id)
+            if abs(value - (previous if baseline is None else baseline)) < rule["min_change"]:
+                return False
+        if "above" in rule and not previous <= rule["above"] < value:
+            return False
+        if "below" in rule and not previous >= rule["below"] > value:
+            return False
+        return True
+
+    def _settle(self, entity_id: str) -> None:
+        pending = self._pending.pop(entity_id)
+        new = self.mirror.get(entity_id)
+        if new is None or not self._transition(pending.rule, pending.old, new) \
+                or not self._significant(pending.rule, entity_id, pending.old, new):
+            self._count(pending.rule, "debounced")
+            return
+        self._deliver(pending.rule, entity_id, pending.old, new)
+
+    def _deliver(self, rule: dict, entity_id: str, old: dict, new: dict) -> None:
+        now = self.clock()
+        last = self._last_delivered.get(entity_id)
+        if last is not None and now - last < rule.get("min_interval", 0):
+            self._count(rule, "rate_limited")
+            return
+        if self.bucket is not None:
+            if self.bucket.delay(1) > 0:
+                self._count(rule, "rate_limited")
+                return
+            self.bucket.take(1)
+
+        self._last_delivered[entity_id] = now
+        self._last_value[entity_id] = number(new.get("state"))
+        self.queue.put_nowait(AIMessage(
+            message=f"Home Assistant event: {self.message(rule, entity_id, old, new)}",
+            from_user="SYSTEM",
+            to_user="",
+            location=self.mirror.areas.get(entity_id),
+        ))
+        self._count(rule, "delivered")
+
+    def message(self, rule: dict, entity_id: str, old: dict, new: dict) -> str:
+        attributes = new.get("attributes", {})
+        return rule["message"].format(
+            name=attributes.get("friendly_name", entity_id),
+            entity_id=entity_id,
+            old=old.get("state"),
+            new=new.get("state"),
+            unit=attributes.get("unit_of_measurement", ""),
+            area=self.mirror.areas.get(entity_id, ""),
+        ).strip()
+
+    def _count(self, rule: dict, outcome: str) -> None:
+        counts = self.counts[rule["name"]]
+        counts[outcome] = counts.get(outcome, 0) + 1
+        HA_TRIGGER_EVENTS_TOTAL.inc(rule=rule["name"], outcome=outcome)
+
+    def report(self) -> dict:
+        """Delivered and suppressed events per rule since startup."""
+        return {
+            "rules": {
+                name: {
+                    "delivered": counts.get("delivered", 0),
+                    "suppressed": {outcome: n for outcome, n in counts.items() if outcome != "delivered"},
+                }
+                for name, counts in self.counts.items()
+            },
+            "pending": len(self._pending),
+        }
+
+    def stop(self) -> None:
+        for pending in self._pending.values():
+            pending.handle.cancel()
+        self._pending.clear()
+
+
+TRIGGERS = TriggerEngine(load_trigger_rules()) if HA_TRIGGERS else None
@@ -0,0 +1,42 @@
+import os
+import httpx
+from typing import Optional
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "120"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+
+_shared_client: Optional[httpx.AsyncClient] = None
+
+
+def make_http_client(**kwargs) -> httpx.AsyncClient:
+    """Create an async HTTP client with keep-alive pooling, and HTTP/2 when h2 is installed."""
+    options = dict(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+        ),
+        timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+    )
+    options.update(kwargs)
+    return httpx.AsyncClient(**options)
+
+
+def shared_http_client() -> httpx.AsyncClient:
+    """
+    The process-wide HTTP client used by every LLM provider and agent backend,
+    so connections are set up once and reused across turns.
+    """
+    global _shared_client
+    if _shared_client is None or _shared_client.is_closed:
+        _shared_client = make_http_client()
+    return _shared_client
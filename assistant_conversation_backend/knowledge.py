@@ -0,0 +1,154 @@
+import os
+import json
+import asyncio
+import psycopg
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+from .embeddings import make_embedder, words
+from .metrics import REGISTRY
+from .search_cache import normalize_query, query_topic
+
+KNOWLEDGE_CACHE = os.getenv("KNOWLEDGE_CACHE", "1") == "1"
+KNOWLEDGE_MIN_SCORE = float(os.getenv("KNOWLEDGE_MIN_SCORE", "0.8"))
+# Share of the score from vector similarity; the rest is how many of the question's words the article contains
+KNOWLEDGE_VECTOR_WEIGHT = float(os.getenv("KNOWLEDGE_VECTOR_WEIGHT", "0.7"))
+KNOWLEDGE_CANDIDATES = int(os.getenv("KNOWLEDGE_CANDIDATES", "10"))
+# Oldest saved answer still used, in seconds per query topic
+KNOWLEDGE_MAX_AGE = {
+    "weather": 3600,
+    "markets": 900,
+    "news": 6 * 3600,
+    "general": 30 * 86400,
+    **json.loads(os.getenv("KNOWLEDGE_MAX_AGE", "{}")),
+}
+
+KNOWLEDGE_LOOKUPS_TOTAL = REGISTRY.counter(
+    "assistant_knowledge_lookups_total",
+    "Local knowledge lookups before a web search, by result: hit, stale, miss or error.",
+    ["result"],
+)
+KNOWLEDGE_LOOKUP_SECONDS = REGISTRY.histogram(
+    "assistant_knowledge_lookup_seconds",
+    "Time to embed a question and search the local knowledge.",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+KNOWLEDGE_SAVED_TOTAL = REGISTRY.counter("assistant_knowledge_saved_total", "Web search answers saved as articles.")
+
+
+@dataclass
+class KnowledgeHit:
+    article_id: int
+    title: str
+    content: str
+    age_seconds: float
+    similarity: float
+    coverage: float
+    score: float
+
+
+def hybrid_score(similarity: float, coverage: float, vector_weight: float = KNOWLEDGE_VECTOR_WEIGHT) -> float:
+    """
+    Vector similarity finds rephrased questions; word coverage keeps them from
+    matching a question about something else, such as another city's weather.
+    """
+    return vector_weight * similarity + (1 - vector_weight) * coverage
+
+
+def format_age(seconds: float) -> str:
+    for unit, size in (("day", 86400), ("hour", 3600), ("minute", 60)):
+        if seconds >= size:
+            count = int(seconds // size)
+            return f"{count} {unit}{'s' if count != 1 else ''}"
+    return "less than a minute"
+
+
+class PostgresKnowledgeStore:
+    """Articles, questions and their links in the articles, questions and article_questions tables."""
+
+    async def _connect(self):
+        # database connects and creates the schema on import, so it is only imported once the store is used
+        from .database import DSN
+        return await psycopg.AsyncConnection.connect(DSN)
+
+    async def candidates(self, question: str, embedding: List[float], embedding_model: str, limit: int) -> List[dict]:
+        from .database import find_knowledge_candidates
+        async with await self._connect() as conn:
+            return await find_knowledge_candidates(conn, question, embedding, embedding_model, limit)
+
+    async def add(self, question: str, question_embedding: List[float], title: str, content: str,
+                  content_embedding: List[float], embedding_model: str) -> Optional[int]:
+        from .database import store_knowledge
+        async with await self._connect() as conn:
+            return await store_knowledge(conn, question, question_embedding, title, content, content_embedding, embedding_model)
+
+
+class KnowledgeBase:
+    """
+    Answers questions from earlier web searches before searching again.
+
+    Every web answer is saved as an article, embedded and linked to the
+    question that produced it. A new question is embedded and matched
+    against saved questions and articles by vector similarity and full-text
+    search; the best article is used if its hybrid score reaches min_score
+    and it is younger than the maximum age for the question's topic.
+    """
+
+    def __init__(self, store, embedder, min_score: float = KNOWLEDGE_MIN_SCORE,
+                 vector_weight: float = KNOWLEDGE_VECTOR_WEIGHT, max_age: Dict[str, float] = KNOWLEDGE_MAX_AGE,
+                 candidates: int = KNOWLEDGE_CANDIDATES):
+        self.store = store
+        self.embedder = embedder
+        self.min_score = min_score
+        self.vector_weight = vector_weight
+        self.max_age = max_age
+        self.candidates = candidates
+        self._background: Set[asyncio.Task] = set()
+
+    async def lookup(self, question: str) -> Optional[KnowledgeHit]:
+        if not words(question):
+            return None
+        try:
+            with KNOWLEDGE_LOOKUP_SECONDS.time():
+                [embedding] = await self.embedder.embed([question])
+                rows = await self.store.candidates(question, embedding, self.embedder.name, self.candidates)
+        except Exception as e:
+            print(f"Error searching local knowledge: {e}")
+            KNOWLEDGE_LOOKUPS_TOTAL.inc(result="error")
+            return None
+
+        topic = query_topic(normalize_query(question))
+        max_age = self.max_age.get(topic, self.max_age.get("general", 0))
+        best, stale = None, False
+        for row in rows:
+            score = hybrid_score(row["similarity"] or 0.0, row["coverage"] or 0.0, self.vector_weight)
+            if score < self.min_score:
+                continue
+            if row["age_seconds"] > max_age:
+                stale = True
+                continue
+            if best is None or score > best.score:
+                best = KnowledgeHit(row["article_id"], row["title"], row["content"], row["age_seconds"],
+                                    row["similarity"], row["coverage"], score)
+
+        KNOWLEDGE_LOOKUPS_TOTAL.inc(result="hit" if best else "stale" if stale else "miss")
+        return best
+
+    async def remember(self, question: str, answer: str) -> Optional[int]:
+        try:
+            question_embedding, content_embedding = await self.embedder.embed([question, f"{question}\n{answer}"])
+            article_id = await self.store.add(question, question_embedding, question, answer, content_embedding, self.embedder.name)
+        except Exception as e:
+            print(f"Error saving knowledge: {e}")
+            return None
+        if article_id is not None:
+            KNOWLEDGE_SAVED_TOTAL.inc()
+        return article_id
+
+    def remember_later(self, question: str, answer: str) -> None:
+        """Save in the background so the answer isn't held up by embedding and storage."""
+        task = asyncio.create_task(self.remember(question, answer))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+
+KNOWLEDGE = KnowledgeBase(PostgresKnowledgeStore(), make_embedder()) if KNOWLEDGE_CACHE else None
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import heapq
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+from .metrics import REGISTRY
+from .resilience import LocalRejection
+
+LIMITER_DEFAULT_CONCURRENCY = int(os.getenv("LIMITER_DEFAULT_CONCURRENCY", "4"))
+LIMITER_DEADLINE_SECONDS = float(os.getenv("LIMITER_DEADLINE_SECONDS", "30"))
+# Per-provider overrides, e.g. {"openai": {"concurrency": 8, "requests_per_minute": 500, "tokens_per_minute": 200000}}
+PROVIDER_LIMITS = json.loads(os.getenv("PROVIDER_LIMITS", "{}"))
+
+# Lower values are admitted first
+USER_FACING = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {USER_FACING: "user", BACKGROUND: "background"}
+
+LIMITER_QUEUE_DEPTH = REGISTRY.gauge("assistant_limiter_queue_depth", "Calls waiting for a provider slot.", ["provider", "priority"])
+LIMITER_IN_FLIGHT = REGISTRY.gauge("assistant_limiter_in_flight", "Calls currently running against a provider.", ["provider"])
+LIMITER_WAIT_SECONDS = REGISTRY.histogram("assistant_limiter_wait_seconds", "Time calls waited for a provider slot.", ["provider", "priority"])
+LIMITER_TIMEOUTS_TOTAL = REGISTRY.counter("assistant_limiter_timeouts_total", "Calls dropped after waiting past their deadline.", ["provider", "priority"])
+
+# Priority of provider calls made from the current task; agent turns set it per turn
+_priority: ContextVar[int] = ContextVar("provider_call_priority", default=USER_FACING)
+
+
+def set_priority(priority: int) -> None:
+    _priority.set(priority)
+
+
+class QueueTimeout(LocalRejection):
+    """Raised when a call waited longer than its deadline for a provider slot."""
+
+    def __init__(self, provider: str, waited: float):
+        super().__init__(f"Gave up waiting {waited:.1f}s for a {provider} slot")
+        self.provider = provider
+        self.waited = waited
+
+
+class TokenBucket:
+    """Refills `rate` units per second up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.level = capacity
+        self.updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until `amount` units are available; a request larger than the bucket waits for a full one."""
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+
+class ProviderLimiter:
+    """
+    Caps concurrent calls and request and token rates for one provider.
+
+    Calls over the limits wait in a priority queue: user-facing calls are
+    admitted before background work, and calls of equal priority in arrival
+    order. A call that has not been admitted by its deadline raises
+    QueueTimeout instead of piling onto a rate-limited provider.
+    """
+
+    def __init__(self, name: str, concurrency: int = LIMITER_DEFAULT_CONCURRENCY, requests_per_minute: float = 0,
+                 tokens_per_minute: float = 0, deadline_seconds: float = LIMITER_DEADLINE_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.concurrency = concurrency
+        self.deadline_seconds = deadline_seconds
+        self.clock = clock
+        self.requests = TokenBucket(requests_per_minute / 60, max(1.0, requests_per_minute / 60), clock) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute / 6, clock) if tokens_per_minute else None
+        self.in_flight = 0
+        self.admitted = 0
+        self.timeouts = 0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._condition = asyncio.Condition()
+
+    def queued(self, priority: Optional[int] = None) -> int:
+        return sum(1 for entry in self._waiters if priority is None or entry[0] == priority)
+
+    def _publish(self) -> None:
+        LIMITER_IN_FLIGHT.set(self.in_flight, provider=self.name)
+        for priority, label in PRIORITY_NAMES.items():
+            LIMITER_QUEUE_DEPTH.set(self.queued(priority), provider=self.name, priority=label)
+
+    def _admission_delay(self, entry: list) -> Optional[float]:
+        """0 to admit now, seconds to wait for the rate limits, or None while blocked by other calls."""
+        if self._waiters[0] is not entry or self.in_flight >= self.concurrency:
+            return None
+        delays = [bucket.delay(amount) for bucket, amount in ((self.requests, 1), (self.tokens, entry[2])) if bucket]
+        return max(delays, default=0.0)
+
+    async def _admit(self, priority: int, tokens: int, deadline_seconds: float) -> None:
+        start = self.clock()
+        entry = [priority, next(self._sequence), tokens]
+        async with self._condition:
+            heapq.heappush(self._waiters, entry)
+            self._publish()
+            try:
+                while True:
+                    delay = self._admission_delay(entry)
+                    if delay == 0:
+                        break
+                    remaining = start + deadline_seconds - self.clock()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        LIMITER_TIMEOUTS_TOTAL.inc(provider=self.name, priority=PRIORITY_NAMES[priority])
+                        raise QueueTimeout(self.name, self.clock() - start)
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), remaining if delay is None else min(delay, remaining))
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                # The head of the queue changed, let the next caller check
+                self._condition.notify_all()
+
+            for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+                if bucket:
+                    bucket.take(amount)
+            self.in_flight += 1
+            self.admitted += 1
+            self._publish()
+        LIMITER_WAIT_SECONDS.observe(self.clock() - start, provider=self.name, priority=PRIORITY_NAMES[priority])
+
+    async def _release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._publish()
+            self._condition.notify_all()
+
+    @asynccontextmanager
+    async def acquire(self, priority: Optional[int] = None, tokens: int = 0, deadline_seconds: Optional[float] = None):
+        """
+        Hold a slot for the enclosed call. priority defaults to that of the current
+        turn; tokens is the estimated token cost charged to the tokens-per-minute limit.
+        """
+        await self._admit(
+            _priority.get() if priority is None else priority,
+            tokens,
+            self.deadline_seconds if deadline_seconds is None else deadline_seconds,
+        )
+        try:
+            yield
+        finally:
+            await self._release()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "concurrency": self.concurrency,
+            "queued": {label: self.queued(priority) for priority, label in PRIORITY_NAMES.items()},
+            "admitted": self.admitted,
+            "timeouts": self.timeouts,
+        }
+
+
+_LIMITERS: Dict[str, ProviderLimiter] = {}
+
+
+def limiter_for(provider: str) -> ProviderLimiter:
+    """The shared limiter of a provider, configured from PROVIDER_LIMITS."""
+    if provider not in _LIMITERS:
+        _LIMITERS[provider] = ProviderLimiter(provider, **PROVIDER_LIMITS.get(provider, {}))
+    return _LIMITERS[provider]
+
+
+@asynccontextmanager
+async def provider_slot(provider: Optional[str], priority: Optional[int] = None, tokens: int = 0):
+    """Hold a slot on the provider's limiter; calls without a provider are not limited."""
+    if provider is None:
+        yield
+        return
+    async with limiter_for(provider).acquire(priority=priority, tokens=tokens):
+        yield
+
+
+def limiter_stats() -> Dict[str, dict]:
+    return {name: limiter.stats() for name, limiter in _LIMITERS.items()}
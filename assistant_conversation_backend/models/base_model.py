@@ -1,5 +1,55 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import List, Optional
+from dataclasses import dataclass
+from ..metrics import LLM_LATENCY_SECONDS, LLM_REQUESTS_TOTAL, LLM_TOKENS_TOTAL
+from ..limits import provider_slot
+import time
+
+
+@dataclass
+class TokenUsage:
+    input_tokens: int = 0
+    output_tokens: int = 0
+    # Input tokens served from the provider's prompt prefix cache
+    cached_tokens: int = 0
+
+    @classmethod
+    def from_openai(cls, usage) -> "TokenUsage":
+        """Build from the usage block of an OpenAI-compatible chat completion."""
+        details = getattr(usage, "prompt_tokens_details", None)
+        return cls(
+            input_tokens=usage.prompt_tokens or 0,
+            output_tokens=usage.completion_tokens or 0,
+            cached_tokens=(getattr(details, "cached_tokens", None) or 0) if details else 0,
+        )
+
+    def __add__(self, other: "TokenUsage") -> "TokenUsage":
+        return TokenUsage(
+            input_tokens=self.input_tokens + other.input_tokens,
+            output_tokens=self.output_tokens + other.output_tokens,
+            cached_tokens=self.cached_tokens + other.cached_tokens,
+        )
+
+class TurnPrompt(str):
+    """
+    The full prompt text of a turn, which every model can use as a plain string,
+    plus its parts for models that keep conversation state on the provider:
+    the stable context, the per-turn state sections and the history lines.
+    """
+
+    def __new__(cls, stable: str, volatile: List[str], history: List[str]):
+        text = stable + "".join(section + "\n" for section in volatile)
+        text += "Conversation latest 30 messages:" + "\n" + "\n".join(history)
+        prompt = super().__new__(cls, text)
+        prompt.stable = stable
+        prompt.volatile = volatile
+        prompt.history = history
+        return prompt
+
+
+def estimate_prompt_tokens(prompt_text) -> int:
+    # Roughly four characters per token, enough for rate limiting before the provider counts
+    return len(str(prompt_text)) // 4
 
 # Agent related classes
 class UserAction(BaseModel):
@@ -46,8 +96,80 @@ class Actions(BaseModel):
     tools_actions: List[ToolAction] = Field(
         description="List of actions to be performed by tools using slash commands.",
     )
+    # Token usage reported by the provider for the request that produced these actions.
+    # Private so it never becomes part of the output schema sent to the model.
+    _usage: Optional[TokenUsage] = PrivateAttr(default=None)
 
 class BaseAIModel:
+    # Whether stream_actions yields actions while the response is still being generated
+    streaming = False
+    # Provider account whose concurrency and rate limits calls are held to; None is unlimited
+    provider: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        """Returns the name of the model, used as the metrics label."""
+        return self.__class__.__name__
+
+    async def warm_up(self) -> None:
+        """
+        Open provider connections ahead of the first turn.
+        Models without a persistent client have nothing to warm.
+        """
+
+    def _record(self, start: float, outcome: str, usage: Optional[TokenUsage]) -> None:
+        LLM_LATENCY_SECONDS.observe(time.monotonic() - start, model=self.name)
+        LLM_REQUESTS_TOTAL.inc(model=self.name, outcome=outcome)
+        if usage is not None:
+            LLM_TOKENS_TOTAL.inc(usage.input_tokens, model=self.name, kind="input")
+            LLM_TOKENS_TOTAL.inc(usage.output_tokens, model=self.name, kind="output")
+            LLM_TOKENS_TOTAL.inc(usage.cached_tokens, model=self.name, kind="cached")
+
+    async def generate(self, prompt_text) -> Actions:
+        """
+        Generate actions and record latency, outcome and token usage for this model.
+        Waits for a slot on the provider's limiter first; that wait is not counted as latency.
+        """
+        async with provider_slot(self.provider, tokens=estimate_prompt_tokens(prompt_text)):
+            start = time.monotonic()
+            try:
+                actions = await self._generate(prompt_text)
+            except Exception:
+                self._record(start, "error", None)
+                raise
+
+            self._record(start, "success", actions._usage)
+        return actions
+
+    async def stream_actions(self, prompt_text):
+        """
+        Yield actions one at a time as the model produces them, recording the same
+        metrics as generate(). Only models with streaming set to True produce
+        actions before the whole response is finished.
+        """
+        async with provider_slot(self.provider, tokens=estimate_prompt_tokens(prompt_text)):
+            start = time.monotonic()
+            usage = None
+            try:
+                async for item in self._stream_actions(prompt_text):
+                    if isinstance(item, TokenUsage):
+                        usage = item
+                        continue
+                    yield item
+            except Exception:
+                self._record(start, "error", None)
+                raise
+
+            self._record(start, "success", usage)
+
+    async def _stream_actions(self, prompt_text):
+        """Models without native streaming yield the actions of a full generation."""
+        actions = await self._generate(prompt_text)
+        for action in [*actions.ai_agent_actions, *actions.user_actions, *actions.tools_actions]:
+            yield action
+        if actions._usage is not None:
+            yield actions._usage
+
     async def _generate(self, prompt_text) -> Actions:
         """
         Generate actions based on the model's capabilities.
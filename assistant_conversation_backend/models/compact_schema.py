@@ -0,0 +1,69 @@
+import os
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from .base_model import Actions
+
+# Ask structured-output models for the short-key wire format below instead of Actions
+LLM_COMPACT_OUTPUT = os.getenv("LLM_COMPACT_OUTPUT", "0") == "1"
+
+# Compact key -> (Actions field, {compact key: action field})
+COMPACT_LISTS = {
+    "u": ("user_actions", {"r": "recipient", "d": "device", "m": "message"}),
+    "a": ("ai_agent_actions", {"r": "recipient", "m": "message"}),
+    "c": ("tools_actions", {"c": "command", "a": "arguments"}),
+}
+
+
+class CompactUserAction(BaseModel):
+    r: str = Field(description="User")
+    d: Optional[str] = Field(default=None, description="Device")
+    m: str = Field(description="Message")
+
+
+class CompactAgentAction(BaseModel):
+    r: str = Field(description="Agent")
+    m: str = Field(description="Message")
+
+
+class CompactToolAction(BaseModel):
+    c: str = Field(description="Command")
+    a: str = Field(default="", description="Arguments")
+
+
+class CompactActions(BaseModel):
+    """
+    Short-key wire format for Actions. Output tokens dominate response latency,
+    so keys are single letters, descriptions are one word and empty lists may
+    be left out. Translated to Actions right after parsing.
+    """
+    t: Optional[str] = Field(default=None, description="Brief plan")
+    u: List[CompactUserAction] = Field(default_factory=list, description="Messages to users")
+    a: List[CompactAgentAction] = Field(default_factory=list, description="Messages to AI agents")
+    c: List[CompactToolAction] = Field(default_factory=list, description="Tool commands")
+
+    def to_actions(self) -> Actions:
+        return Actions.model_validate(expand_compact(self.model_dump(exclude_none=True)))
+
+
+def expand_compact(data: dict) -> dict:
+    """Rename the keys of a compact output dict to the Actions field names, leaving unknown keys out."""
+    expanded = {"thought": data.get("t"), **{field: [] for field, _ in COMPACT_LISTS.values()}}
+    for key, (field, item_keys) in COMPACT_LISTS.items():
+        items = data.get(key) or []
+        if not isinstance(items, list):
+            items = [items]
+        expanded[field] = [
+            {item_keys.get(name, name): value for name, value in item.items()} if isinstance(item, dict) else item
+            for item in items
+        ]
+    return expanded
+
+
+def compact_from(actions: Actions) -> CompactActions:
+    """The compact encoding of actions, omitting empty lists; used to measure the savings."""
+    return CompactActions(
+        t=actions.thought,
+        u=[CompactUserAction(r=action.recipient, d=action.device, m=action.message) for action in actions.user_actions],
+        a=[CompactAgentAction(r=action.recipient, m=action.message) for action in actions.ai_agent_actions],
+        c=[CompactToolAction(c=action.command, a=action.arguments) for action in actions.tools_actions],
+    )
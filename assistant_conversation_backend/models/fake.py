@@ -0,0 +1,117 @@
+import os
+import re
+import json
+import random
+import asyncio
+from typing import Callable, List, Optional, Union
+from .base_model import BaseAIModel, Actions, UserAction, TokenUsage
+from .compact_schema import compact_from, LLM_COMPACT_OUTPUT
+
+FAKE_LLM_SCRIPT = os.getenv("FAKE_LLM_SCRIPT")
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "0"))
+FAKE_LLM_TOKENS_PER_SECOND = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "0"))
+FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))
+
+# Matches a chat log entry as written by AIAgent._make_chat_log_entry
+CHAT_LOG_ENTRY = re.compile(r"^\d{2}:\d{2}:\d{2} (?P<user>[^\[:]+?)(?: \[(?P<location>[^\]]*)\])?: (?:@\S*)? ?(?P<message>.*)$")
+
+
+class FakeModelError(Exception):
+    """Error injected by the fake model."""
+
+
+def reply_to_last_user(prompt_text: str) -> Actions:
+    """
+    Default rule: echo the newest user message back to the user's device.
+    Messages from SYSTEM, agents or without a location get no reply, so the
+    loop does not talk to itself.
+    """
+    for line in reversed(prompt_text.splitlines()):
+        match = CHAT_LOG_ENTRY.match(line.strip())
+        if not match:
+            continue
+        user, location = match.group("user").strip(), match.group("location")
+        if user == "SYSTEM" or not location:
+            break
+        return Actions(
+            user_actions=[UserAction(message=f"You said: {match.group('message')}", recipient=user, device=location)],
+            ai_agent_actions=[],
+            tools_actions=[],
+        )
+    return Actions(user_actions=[], ai_agent_actions=[], tools_actions=[])
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text
+    return max(1, len(text) // 4)
+
+
+def output_json(actions: Actions, compact: bool = False) -> str:
+    """The JSON a structured-output model would generate for actions."""
+    if compact:
+        return compact_from(actions).model_dump_json(exclude_defaults=True)
+    return actions.model_dump_json()
+
+
+class FakeModel(BaseAIModel):
+    """
+    Deterministic offline model for load and latency testing.
+
+    Responses come from a script, cycled in order, or from a rule applied to the
+    prompt. Each call sleeps latency_seconds plus output tokens divided by
+    tokens_per_second, and fails with probability error_rate using a seeded RNG,
+    so a run is reproducible. A script entry of {"error": "..."} always fails.
+    With compact set, output tokens are counted on the CompactActions encoding.
+    Select it with LLM_MODEL=FakeModel; FAKE_LLM_* variables configure it.
+    """
+
+    def __init__(self, script: Optional[List[Union[Actions, dict]]] = None,
+                 rule: Callable[[str], Actions] = reply_to_last_user,
+                 latency_seconds: float = FAKE_LLM_LATENCY_MS / 1000,
+                 tokens_per_second: float = FAKE_LLM_TOKENS_PER_SECOND,
+                 error_rate: float = FAKE_LLM_ERROR_RATE,
+                 seed: int = FAKE_LLM_SEED,
+                 compact: bool = LLM_COMPACT_OUTPUT):
+        if script is None and FAKE_LLM_SCRIPT:
+            with open(FAKE_LLM_SCRIPT, encoding="utf-8") as f:
+                script = json.load(f)
+        self.script = script or []
+        self.rule = rule
+        self.latency_seconds = latency_seconds
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.compact = compact
+        self.calls = 0
+
+    def _next_response(self, prompt_text: str) -> Actions:
+        if not self.script:
+            return self.rule(prompt_text)
+
+        entry = self.script[self.calls % len(self.script)]
+        if isinstance(entry, dict) and "error" in entry:
+            raise FakeModelError(entry["error"])
+        if isinstance(entry, Actions):
+            return entry.model_copy(deep=True)
+        return Actions.model_validate({"user_actions": [], "ai_agent_actions": [], "tools_actions": [], **entry})
+
+    async def _generate(self, prompt_text: str) -> Actions:
+        prompt_text = str(prompt_text)
+        try:
+            inject_error = self.rng.random() < self.error_rate
+            actions = self._next_response(prompt_text)
+        finally:
+            self.calls += 1
+
+        output_tokens = estimate_tokens(output_json(actions, self.compact))
+        delay = self.latency_seconds
+        if self.tokens_per_second > 0:
+            delay += output_tokens / self.tokens_per_second
+        await asyncio.sleep(delay)
+
+        if inject_error:
+            raise FakeModelError("Injected fake model error")
+
+        actions._usage = TokenUsage(input_tokens=estimate_tokens(prompt_text), output_tokens=output_tokens)
+        return actions
@@ -1,26 +1,17 @@
-from magentic import prompt, OpenaiChatModel
-from .base_model import BaseAIModel, Actions
+from .openai_compatible import OpenAICompatibleModel
 import os
 
-class GroqInstruct(BaseAIModel):
+class GroqInstruct(OpenAICompatibleModel):
     """
-    OpenAI 4o model wrapper for the Magentic library.
-    This class is used to interact with the OpenAI 4o model using the Magentic library.
+    Llama 4 Scout instruct model on Groq's OpenAI-compatible API.
+    This class is used to interact with the model through a persistent async client.
     """
 
+    provider = "groq"
+
     def __init__(self):
-        self.model = OpenaiChatModel(
+        super().__init__(
             "meta-llama/llama-4-scout-17b-16e-instruct",
             base_url="https://api.groq.com/openai/v1",
             api_key=os.environ["GROQ_API_KEY"],
         )
-
-    async def _generate(self, prompt_text: str) -> Actions:
-
-        @prompt(
-            prompt_text,
-            model=self.model
-        )
-        async def generate_message() -> Actions: ...
-
-        return await generate_message()
\ No newline at end of file
@@ -1,10 +1,19 @@
 from openai import AsyncOpenAI
 import os
-from .base_model import BaseAIModel, Actions, UserAction, AIAgentAction
+from typing import Optional
+from .base_model import BaseAIModel, Actions, TokenUsage
+from .tag_parser import IncrementalTagParser, actions_from
+from .repair import repair_tagged, REPAIR_MAX_TOKENS, LLM_REPAIRS_TOTAL, LLM_RETRIES_AVOIDED_TOTAL
+from ..http_clients import shared_http_client
+
+GROQ_THINKER_STREAM = os.getenv("GROQ_THINKER_STREAM", "0") == "1"
 
 
 class GroqThinker(BaseAIModel):
-    def __init__(self, model_name: str = "qwen-qwq-32b"):
+    provider = "groq"
+
+    def __init__(self, model_name: str = "qwen-qwq-32b", stream: bool = GROQ_THINKER_STREAM):
+        self.streaming = stream
         self.result_format_prompt = """
 Your final response should be enclosed within <chat></chat> tags.
 1-3 messages. ONLY SEND A SINGLE MESSAGE TO A SINGLE USER! Multiple messages to the same tool is ok. Remember it will be spoken using STT!
@@ -36,118 +45,124 @@ premature disengagement: terminating a task based on internal assessment rather
         self.client = AsyncOpenAI(
             base_url="https://api.groq.com/openai/v1",
             api_key=os.environ["GROQ_API_KEY"],
+            http_client=shared_http_client(),
         )
 
+    async def warm_up(self) -> None:
+        await self.client.models.list()
+
     def parse_response(self, response: str) -> Actions:
-        response = response.replace("<chat>", "").replace("</chat>", "").strip()
-        
-        user_actions = []
-        ai_agent_actions = []
-
-        # Extract user_message tags
-        user_msg_start = response.find("<user_message")
-        while user_msg_start != -1:
-            user_msg_end = response.find("</user_message>", user_msg_start)
-            if user_msg_end == -1:
-                raise ValueError("Malformed response: missing </user_message> closing tag")
-            
-            user_msg = response[user_msg_start:user_msg_end + len("</user_message>")]
-            
-            # Extract attributes
-            user_attr = user_msg.split(">")[0]
-            user_match = user_attr.find("user=")
-            device_match = user_attr.find("device=")
-            
-            if user_match == -1 or device_match == -1:
-                raise ValueError("Malformed user_message: missing user or device attributes")
-            
-            # Extract username (between user= and next space or device=)
-            if device_match > user_match:
-                username = user_attr[user_match+5:device_match].strip().rstrip('=').strip()
-            else:
-                username = user_attr[user_match+5:].split()[0].strip()
-            
-            # Extract device name (between device= and > or end of attributes)
-            device_name = user_attr[device_match+7:].split()[0].strip().rstrip('>').strip()
-            
-            # Extract message content (between > and </user_message>)
-            content_start = user_msg.find(">") + 1
-            content_end = user_msg.rfind("<")
-            message_content = user_msg[content_start:content_end].strip()
-            
-            user_actions.append(
-                UserAction(message=message_content, recipient=username, device=device_name)
-            )
-            
-            # Find the next user_message tag
-            user_msg_start = response.find("<user_message", user_msg_end)
-        
-        # Extract agent_message tags
-        agent_msg_start = response.find("<agent_message")
-        while agent_msg_start != -1:
-            agent_msg_end = response.find("</agent_message>", agent_msg_start)
-            if agent_msg_end == -1:
-                raise ValueError("Malformed response: missing </agent_message> closing tag")
-            
-            agent_msg = response[agent_msg_start:agent_msg_end + len("</agent_message>")]
-            
-            # Extract agent name
-            agent_attr = agent_msg.split(">")[0]
-            agent_match = agent_attr.find("agent=")
-            
-            if agent_match == -1:
-                raise ValueError("Malformed agent_message: missing agent attribute")
-            
-            agent_name = agent_attr[agent_match+6:].split()[0].strip().rstrip('>').strip()
-            
-            # Extract message content
-            content_start = agent_msg.find(">") + 1
-            content_end = agent_msg.rfind("<")
-            message_content = agent_msg[content_start:content_end].strip()
-            
-            # Check if agent is messaging itself (parse message for @ mentions or other indicators)
-            if message_content.startswith(f"@{agent_name}") or message_content.startswith(f"{agent_name},"):
-                raise ValueError(f"Agent '{agent_name}' cannot message itself")
-            
-            ai_agent_actions.append(
-                AIAgentAction(message=message_content, recipient=agent_name)
-            )
-            
-            # Find the next agent_message tag
-            agent_msg_start = response.find("<agent_message", agent_msg_end)
+        parser = IncrementalTagParser()
+        parser.feed(response)
+        parsed = parser.close()
+        if not parsed:
+            # Prose without tags goes to the repair step and the retries, not to the users
+            raise ValueError("No actions found in the response")
+        return actions_from(parsed)
 
-        # Validate that agents aren't sending messages to themselves
-        for action in ai_agent_actions:
-            if action.message.startswith(f"@{action.recipient}"):
-                raise ValueError(f"Agent '{action.recipient}' cannot message itself")
+    async def _complete(self, messages: list, max_tokens: Optional[int] = None):
+        kwargs = {"max_tokens": max_tokens} if max_tokens else {}
+        response = await self.client.chat.completions.create(model=self.model, messages=messages, **kwargs)
+        usage = TokenUsage.from_openai(response.usage) if response.usage else TokenUsage()
+        return response.choices[0].message.content or "", usage
 
-        return Actions(user_actions=user_actions, ai_agent_actions=ai_agent_actions)
+    async def _repair(self, response_text: str, error: str):
+        """
+        Fix a malformed response without regenerating it: first locally, then by
+        asking the model to restate only its own answer in the right format.
+        Returns the actions and the usage of the repair request, or (None, usage).
+        """
+        try:
+            actions = repair_tagged(response_text)
+            LLM_REPAIRS_TOTAL.inc(model=self.name, stage="local")
+            return actions, TokenUsage()
+        except ValueError:
+            pass
+
+        messages = [
+            {"role": "user", "content": self.result_format_prompt},
+            {"role": "assistant", "content": response_text},
+            {"role": "user", "content": f"Your response could not be parsed: {error}. Reply with only the corrected <chat></chat> block."},
+        ]
+        try:
+            continuation, usage = await self._complete(messages, max_tokens=REPAIR_MAX_TOKENS)
+        except Exception as e:
+            print(f"Repair request failed: {e}")
+            return None, TokenUsage()
+        try:
+            actions = self.parse_response(continuation)
+        except ValueError:
+            try:
+                actions = repair_tagged(continuation)
+            except ValueError:
+                return None, usage
+        LLM_REPAIRS_TOTAL.inc(model=self.name, stage="continuation")
+        return actions, usage
 
     async def _generate(self, prompt_text: str) -> Actions:
         max_attempts = 3
         current_attempt = 0
         last_error = None
+        total_usage = TokenUsage()
         
         while current_attempt < max_attempts:
             current_attempt += 1
+            # Add error message to prompt if this is a retry
+            current_prompt = prompt_text
+            if last_error:
+                current_prompt = f"{prompt_text}\n\nError in previous response: {last_error}. Please fix and try again."
+                LLM_REPAIRS_TOTAL.inc(model=self.name, stage="full_retry")
+
+            response_text, usage = await self._complete(
+                [{"role": "user", "content": self.result_format_prompt + current_prompt}]
+            )
+            total_usage += usage
+
             try:
-                # Add error message to prompt if this is a retry
-                current_prompt = prompt_text
-                if last_error:
-                    current_prompt = f"{prompt_text}\n\nError in previous response: {last_error}. Please fix and try again."
-                
-                response = await self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[{"role": "user", "content": self.result_format_prompt + current_prompt}]
-                )
-                
-                response_text = response.choices[0].message.content
-                return self.parse_response(response_text)
-            
+                actions = self.parse_response(response_text)
             except ValueError as e:
                 last_error = str(e)
-                if current_attempt >= max_attempts:
-                    raise ValueError(f"Failed after {max_attempts} attempts. Last error: {last_error}")
-        
-        # This should never be reached due to the exception above, but just in case
-        raise ValueError(f"Failed to generate a valid response after {max_attempts} attempts")
+                actions, usage = await self._repair(response_text, last_error)
+                total_usage += usage
+                if actions is None:
+                    continue
+                LLM_RETRIES_AVOIDED_TOTAL.inc(model=self.name)
+
+            actions._usage = total_usage
+            return actions
+
+        LLM_REPAIRS_TOTAL.inc(model=self.name, stage="failed")
+        raise ValueError(f"Failed after {max_attempts} attempts. Last error: {last_error}")
+
+    async def _stream_actions(self, prompt_text: str):
+        """
+        Stream the completion through the incremental parser and yield each action
+        as soon as its closing tag arrives, followed by the token usage if the
+        provider reports it. Malformed elements are repaired or skipped, since
+        the actions before them may already have been delivered.
+        """
+        # Actions already sent cannot be retried, so repair the rest in place
+        parser = IncrementalTagParser(lenient=True)
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": self.result_format_prompt + prompt_text}],
+            stream=True,
+            # Without it OpenAI-compatible servers send no usage on streamed chunks
+            stream_options={"include_usage": True},
+        )
+
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                for action in parser.feed(chunk.choices[0].delta.content):
+                    yield action
+            if getattr(chunk, "usage", None):
+                yield TokenUsage.from_openai(chunk.usage)
+
+        # Closing may salvage an element that was left unterminated
+        already_yielded = len(parser.actions)
+        for action in parser.close()[already_yielded:]:
+            yield action
+        if parser.problems:
+            LLM_REPAIRS_TOTAL.inc(model=self.name, stage="local")
+            for problem in parser.problems:
+                print(f"Repaired streamed model output: {problem}")
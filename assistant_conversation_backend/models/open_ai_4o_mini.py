@@ -1,24 +1,12 @@
-from magentic import prompt, OpenaiChatModel
-from .base_model import BaseAIModel, Actions
-import os
+from .openai_compatible import OpenAICompatibleModel
 
-model = OpenaiChatModel("gpt-4o-mini-2024-07-18")
-
-class OpenAI4oMini:
+class OpenAI4oMini(OpenAICompatibleModel):
     """
-    OpenAI 4o model wrapper for the Magentic library.
-    This class is used to interact with the OpenAI 4o model using the Magentic library.
+    OpenAI 4o mini model wrapper.
+    This class is used to interact with the OpenAI 4o mini model through a persistent async client.
     """
 
-    def __init__(self):
-        pass
-
-    async def _generate(self, prompt_text: str) -> Actions:
+    provider = "openai"
 
-        @prompt(
-            prompt_text,
-            model=model
-        )
-        async def generate_message() -> Actions: ...
-
-        return await generate_message()
\ No newline at end of file
+    def __init__(self):
+        super().__init__("gpt-4o-mini-2024-07-18")
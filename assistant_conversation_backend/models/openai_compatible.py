@@ -0,0 +1,119 @@
+from typing import Optional, Type
+import httpx
+from openai import AsyncOpenAI
+from pydantic import BaseModel, ValidationError
+from .base_model import BaseAIModel, Actions, TokenUsage
+from .compact_schema import CompactActions, LLM_COMPACT_OUTPUT
+from .repair import repair_json_actions, REPAIR_MAX_TOKENS, LLM_REPAIRS_TOTAL, LLM_RETRIES_AVOIDED_TOTAL
+from ..http_clients import shared_http_client
+
+PARSE_ERROR = "Failed to parse the LLM output into the tool schema. Consider making the output type more lenient or enabling retries"
+
+
+def output_tool(output_type: Type[BaseModel]) -> dict:
+    """Function tool the model is forced to call with its structured output."""
+    return {
+        "type": "function",
+        "function": {
+            "name": f"return_{output_type.__name__.lower()}",
+            "parameters": output_type.model_json_schema(),
+        },
+    }
+
+
+class OpenAICompatibleModel(BaseAIModel):
+    """
+    Structured-output model for any OpenAI-compatible chat completions API.
+
+    The client and the output tool schema are built once and reused for every
+    call; the client sits on the shared keep-alive HTTP connection pool. With
+    compact set the model writes CompactActions, which is translated to Actions.
+    """
+
+    output_type: Type[BaseModel] = Actions
+
+    def __init__(self, model_name: str, base_url: Optional[str] = None, api_key: Optional[str] = None,
+                 http_client: Optional[httpx.AsyncClient] = None, compact: bool = LLM_COMPACT_OUTPUT):
+        self.model = model_name
+        self.compact = compact
+        if compact:
+            self.output_type = CompactActions
+        self.client = AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            http_client=http_client or shared_http_client(),
+        )
+        self.tool = output_tool(self.output_type)
+        self.tool_choice = {"type": "function", "function": {"name": self.tool["function"]["name"]}}
+
+    async def warm_up(self) -> None:
+        # Any authenticated request opens and keeps the TLS connection to the provider
+        await self.client.models.list()
+
+    def parse_output(self, arguments: str) -> Actions:
+        try:
+            output = self.output_type.model_validate_json(arguments)
+        except ValidationError as e:
+            raise ValueError(f"{PARSE_ERROR}: {e}") from e
+        return output.to_actions() if self.compact else output
+
+    async def _complete(self, messages: list, max_tokens: Optional[int] = None):
+        kwargs = {"max_tokens": max_tokens} if max_tokens else {}
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            tools=[self.tool],
+            tool_choice=self.tool_choice,
+            **kwargs,
+        )
+        usage = TokenUsage.from_openai(response.usage) if response.usage else TokenUsage()
+        message = response.choices[0].message
+        if message.tool_calls:
+            return message.tool_calls[0].function.arguments, usage
+        # Some providers answer in plain content despite the forced tool call
+        return message.content or "", usage
+
+    async def _repair(self, arguments: str, error: str):
+        """
+        Fix output that failed validation without regenerating it: first locally,
+        then by sending only the broken output back for a corrected tool call.
+        Returns the actions and the usage of the repair request.
+        """
+        try:
+            actions = repair_json_actions(arguments, self.compact)
+            LLM_REPAIRS_TOTAL.inc(model=self.name, stage="local")
+            return actions, TokenUsage()
+        except ValueError:
+            pass
+
+        messages = [{
+            "role": "user",
+            "content": f"This output failed validation: {error}\n\nOutput:\n{arguments}\n\nCall the tool again with the corrected output only.",
+        }]
+        try:
+            corrected, usage = await self._complete(messages, max_tokens=REPAIR_MAX_TOKENS)
+            try:
+                actions = self.parse_output(corrected)
+            except ValueError:
+                actions = repair_json_actions(corrected, self.compact)
+        except Exception as e:
+            LLM_REPAIRS_TOTAL.inc(model=self.name, stage="failed")
+            raise ValueError(f"{PARSE_ERROR}: {error}") from e
+        LLM_REPAIRS_TOTAL.inc(model=self.name, stage="continuation")
+        return actions, usage
+
+    async def _generate(self, prompt_text: str) -> Actions:
+        arguments, usage = await self._complete([{"role": "user", "content": prompt_text}])
+
+        if not arguments:
+            raise ValueError(f"{PARSE_ERROR}: the model did not return a tool call")
+
+        try:
+            actions = self.parse_output(arguments)
+        except ValueError as e:
+            actions, repair_usage = await self._repair(arguments, str(e))
+            usage += repair_usage
+            LLM_RETRIES_AVOIDED_TOTAL.inc(model=self.name)
+
+        actions._usage = usage
+        return actions
@@ -0,0 +1,161 @@
+import os
+import hashlib
+from typing import List, Optional
+from .base_model import Actions, TokenUsage, TurnPrompt
+from .openai_compatible import OpenAICompatibleModel, PARSE_ERROR
+from .repair import LLM_RETRIES_AVOIDED_TOTAL
+from ..metrics import REGISTRY
+
+# Send the whole prompt again after this many delta turns, bounding the context the provider keeps
+SESSION_REFRESH_TURNS = int(os.getenv("OPENAI_SESSION_REFRESH_TURNS", "10"))
+
+SESSION_TURNS_TOTAL = REGISTRY.counter(
+    "assistant_session_turns_total",
+    "Turns of the stateful Responses session, by what was sent: delta, full or fallback.",
+    ["model", "mode"],
+)
+SESSION_INPUT_TOKENS = REGISTRY.histogram(
+    "assistant_session_input_tokens",
+    "Input tokens billed per turn of the stateful Responses session.",
+    ["model", "mode"],
+    buckets=(100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000),
+)
+
+
+def usage_from_response(usage) -> TokenUsage:
+    details = getattr(usage, "input_tokens_details", None)
+    return TokenUsage(
+        input_tokens=usage.input_tokens or 0,
+        output_tokens=usage.output_tokens or 0,
+        cached_tokens=(getattr(details, "cached_tokens", None) or 0) if details else 0,
+    )
+
+
+class ConversationSession:
+    """What the provider already holds for the current response chain."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.previous_response_id: Optional[str] = None
+        self.pending_call_id: Optional[str] = None  # Function call that still needs an output item
+        self.stable_hash: Optional[str] = None
+        self.volatile: List[str] = []
+        self.last_history_line: Optional[str] = None
+        self.delta_turns = 0
+
+    def new_history(self, prompt: TurnPrompt) -> Optional[List[str]]:
+        """History lines added since the last turn, or None if the chain can't be continued."""
+        if self.last_history_line is None:
+            return None
+        for index in range(len(prompt.history) - 1, -1, -1):
+            if prompt.history[index] == self.last_history_line:
+                return prompt.history[index + 1:]
+        return None
+
+
+class OpenAIResponses(OpenAICompatibleModel):
+    """
+    OpenAI model that keeps the conversation on the provider with the Responses
+    API. The first turn sends the whole prompt; later turns chain on the previous
+    response and send only new history lines and the state sections that
+    changed. The whole prompt is sent again every refresh_turns turns, when the
+    stable context changes, when the history no longer lines up, and whenever
+    a chained request fails. Plain string prompts are always sent in full.
+    """
+
+    provider = "openai"
+
+    def __init__(self, model_name: str = os.getenv("OPENAI_RESPONSES_MODEL", "gpt-4o-mini-2024-07-18"),
+                 refresh_turns: int = SESSION_REFRESH_TURNS, **kwargs):
+        super().__init__(model_name, **kwargs)
+        self.refresh_turns = refresh_turns
+        self.session = ConversationSession()
+        function = self.tool["function"]
+        self.response_tool = {"type": "function", "name": function["name"], "parameters": function["parameters"], "strict": False}
+        self.response_tool_choice = {"type": "function", "name": function["name"]}
+
+    def _delta_input(self, prompt: TurnPrompt) -> Optional[str]:
+        """The text to send on top of the previous response, or None if the whole prompt must be sent."""
+        session = self.session
+        if session.previous_response_id is None or session.delta_turns >= self.refresh_turns:
+            return None
+        if session.stable_hash != hashlib.sha256(prompt.stable.encode()).hexdigest():
+            return None
+        history = session.new_history(prompt)
+        if history is None:
+            return None
+
+        changed = [section for section in prompt.volatile if section not in session.volatile]
+        text = "Updated state:\n" + "\n".join(changed) + "\n" if changed else ""
+        return text + "New messages:\n" + "\n".join(history)
+
+    async def _respond(self, text: str, previous_response_id: Optional[str]):
+        items = []
+        if previous_response_id and self.session.pending_call_id:
+            # A chained request has to answer the function call that ended the previous response
+            items.append({"type": "function_call_output", "call_id": self.session.pending_call_id, "output": "ok"})
+        items.append({"role": "user", "content": text})
+
+        return await self.client.responses.create(
+            model=self.model,
+            input=items,
+            previous_response_id=previous_response_id,
+            tools=[self.response_tool],
+            tool_choice=self.response_tool_choice,
+        )
+
+    async def _generate(self, prompt_text) -> Actions:
+        if not isinstance(prompt_text, TurnPrompt):
+            self.session.reset()
+            return await super()._generate(prompt_text)
+
+        delta = self._delta_input(prompt_text)
+        mode = "full" if delta is None else "delta"
+        try:
+            if delta is None:
+                response = await self._respond(str(prompt_text), None)
+            else:
+                response = await self._respond(delta, self.session.previous_response_id)
+        except Exception as e:
+            if delta is None:
+                self.session.reset()
+                raise
+            # The chain may have expired on the provider; start a new one
+            print(f"Chained response failed, sending the full prompt: {e}")
+            mode = "fallback"
+            self.session.reset()
+            response = await self._respond(str(prompt_text), None)
+
+        call = next((item for item in response.output if item.type == "function_call"), None)
+        if call is None:
+            self.session.reset()
+            raise ValueError(f"{PARSE_ERROR}: the model did not return a tool call")
+
+        usage = usage_from_response(response.usage) if response.usage else TokenUsage()
+        self._remember(prompt_text, response.id, call.call_id, reset_chain=mode != "delta")
+        SESSION_TURNS_TOTAL.inc(model=self.name, mode=mode)
+        SESSION_INPUT_TOKENS.observe(usage.input_tokens, model=self.name, mode=mode)
+
+        try:
+            actions = self.parse_output(call.arguments)
+        except ValueError as e:
+            actions, repair_usage = await self._repair(call.arguments, str(e))
+            usage += repair_usage
+            LLM_RETRIES_AVOIDED_TOTAL.inc(model=self.name)
+
+        actions._usage = usage
+        return actions
+
+    def _remember(self, prompt: TurnPrompt, response_id: str, call_id: str, reset_chain: bool) -> None:
+        session = self.session
+        if reset_chain:
+            session.stable_hash = hashlib.sha256(prompt.stable.encode()).hexdigest()
+            session.delta_turns = 0
+        else:
+            session.delta_turns += 1
+        session.previous_response_id = response_id
+        session.pending_call_id = call_id
+        session.volatile = list(prompt.volatile)
+        session.last_history_line = prompt.history[-1] if prompt.history else None
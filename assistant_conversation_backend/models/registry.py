@@ -0,0 +1,70 @@
+import os
+import importlib
+from .base_model import BaseAIModel
+
+# Model classes are imported lazily: their modules create provider clients on
+# import and need the matching API key in the environment.
+MODEL_CLASSES = {
+    "OpenAI4oMini": ".open_ai_4o_mini",
+    "OpenAI4o": ".open_ai_4o",
+    "OpenAIResponses": ".openai_responses",
+    "GroqInstruct": ".groq_instruct",
+    "GroqThinker": ".groq_thinker",
+    "FakeModel": ".fake",
+}
+
+
+def build_model(name: str) -> BaseAIModel:
+    """Instantiate a model class by its name."""
+    if name not in MODEL_CLASSES:
+        raise ValueError(f"Unknown model '{name}'. Available models: {', '.join(MODEL_CLASSES)}")
+    module = importlib.import_module(MODEL_CLASSES[name], package=__package__)
+    return getattr(module, name)()
+
+
+def build_llm_model() -> BaseAIModel:
+    """
+    Build the main LLM from configuration.
+
+    LLM_MODEL selects a single model (default OpenAI4oMini). LLM_ROUTER_MODELS, a
+    comma separated list of model names, puts them behind a latency-aware router
+    instead; LLM_ROUTER_HEDGE=1 enables hedged requests.
+    """
+    router_models = [name.strip() for name in os.getenv("LLM_ROUTER_MODELS", "").split(",") if name.strip()]
+    if router_models:
+        from .router import ModelRouter
+        return ModelRouter(
+            [build_model(name) for name in router_models],
+            hedge=os.getenv("LLM_ROUTER_HEDGE", "0") == "1",
+        )
+
+    return build_model(os.getenv("LLM_MODEL", "OpenAI4oMini"))
+
+
+def build_tier_policy(agent_names=()):
+    """
+    Build the per-turn model tiering policy, or None when LLM_TIERING is off.
+    LLM_TIER_FAST and LLM_TIER_STRONG name the models of the two tiers.
+    """
+    if os.getenv("LLM_TIERING", "0") != "1":
+        return None
+
+    from .tiering import TierPolicy
+    return TierPolicy(
+        fast=build_model(os.getenv("LLM_TIER_FAST", "GroqInstruct")),
+        strong=build_model(os.getenv("LLM_TIER_STRONG", "GroqThinker")),
+        agent_names=agent_names,
+    )
+
+
+def build_shadow_runner():
+    """
+    Build the shadow-traffic runner for the candidate named by SHADOW_MODEL,
+    or None when shadowing is off. SHADOW_SAMPLE_RATE is the fraction of turns sent.
+    """
+    candidate = os.getenv("SHADOW_MODEL")
+    if not candidate:
+        return None
+
+    from .shadow import ShadowRunner
+    return ShadowRunner(build_model(candidate))
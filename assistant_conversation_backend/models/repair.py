@@ -0,0 +1,129 @@
+import os
+import re
+import json
+from pydantic import ValidationError
+from .base_model import Actions, UserAction, AIAgentAction, ToolAction
+from .tag_parser import IncrementalTagParser, actions_from
+from .compact_schema import expand_compact
+from ..metrics import REGISTRY
+
+# Output budget of a repair request; it only restates an answer that already exists
+REPAIR_MAX_TOKENS = int(os.getenv("LLM_REPAIR_MAX_TOKENS", "512"))
+
+LLM_REPAIRS_TOTAL = REGISTRY.counter(
+    "assistant_llm_repairs_total",
+    "Malformed model outputs, by the stage that fixed them: local, continuation, full_retry or failed.",
+    ["model", "stage"],
+)
+LLM_RETRIES_AVOIDED_TOTAL = REGISTRY.counter(
+    "assistant_llm_retries_avoided_total",
+    "Full-prompt regenerations avoided by repairing malformed output locally or with a short continuation.",
+    ["model"],
+)
+
+ACTION_LISTS = {
+    "user_actions": UserAction,
+    "ai_agent_actions": AIAgentAction,
+    "tools_actions": ToolAction,
+}
+
+
+def repair_tagged(response: str) -> Actions:
+    """
+    Leniently parse a tagged response that failed strict parsing. Unterminated
+    tags are closed and malformed elements dropped. Raises ValueError if no
+    valid action could be salvaged.
+    """
+    parser = IncrementalTagParser(lenient=True)
+    parser.feed(response)
+    parsed = parser.close()
+    if not parsed:
+        raise ValueError("; ".join(parser.problems) or "No actions found in the response")
+    for problem in parser.problems:
+        print(f"Repaired model output: {problem}")
+    return actions_from(parsed)
+
+
+def close_json(text: str) -> str:
+    """Strip code fences and surrounding prose, then close a truncated JSON object."""
+    start = text.find("{")
+    if start == -1:
+        raise ValueError("No JSON object in the model output")
+    text = text[start:].strip()
+    if text.endswith("```"):
+        text = text[:-3].rstrip()
+
+    closers = []
+    in_string = False
+    escaped = False
+    end = len(text)
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if closers:
+                closers.pop()
+            if not closers:
+                # Ignore anything after the outermost object
+                end = i + 1
+                break
+
+    text = text[:end]
+    if in_string:
+        text += '"'
+    text = text.rstrip()
+    # A key whose value was cut off cannot be completed, so drop it
+    text = re.sub(r'"[^"]*"\s*:$', "", text).rstrip()
+    if closers and closers[-1] == "}":
+        text = re.sub(r'([{,])\s*"[^"]*"$', r"\1", text)
+    text = text.rstrip().rstrip(",")
+    return text + "".join(reversed(closers))
+
+
+def repair_json_actions(arguments: str, compact: bool = False) -> Actions:
+    """
+    Recover Actions from JSON that failed validation: close a truncated object,
+    default missing action lists to empty and drop individual invalid actions.
+    compact reads the CompactActions wire format. Raises ValueError if the
+    output cannot be read at all.
+    """
+    try:
+        data = json.loads(close_json(arguments))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Unrepairable JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError("The model output is not a JSON object")
+    if compact:
+        data = expand_compact(data)
+
+    repaired = {"thought": data.get("thought") if isinstance(data.get("thought"), str) else None}
+    problems = []
+    for field_name, action_type in ACTION_LISTS.items():
+        items = data.get(field_name) or []
+        if not isinstance(items, list):
+            items = [items]
+        repaired[field_name] = []
+        for item in items:
+            try:
+                repaired[field_name].append(action_type.model_validate(item))
+            except ValidationError as e:
+                problems.append(f"invalid {field_name} entry {item!r}: {e.errors()[0]['msg']}")
+
+    if problems and not any(repaired[field_name] for field_name in ACTION_LISTS):
+        raise ValueError("; ".join(problems))
+    for problem in problems:
+        print(f"Repaired model output, dropped {problem}")
+
+    try:
+        return Actions.model_validate(repaired)
+    except ValidationError as e:
+        raise ValueError(f"Unrepairable output: {e}") from e
@@ -0,0 +1,159 @@
+import os
+import time
+import asyncio
+from collections import deque
+from typing import List, Optional
+from .base_model import BaseAIModel, Actions
+from ..resilience import breaker_for, CircuitOpenError, LocalRejection
+from ..metrics import REGISTRY
+
+ROUTER_WINDOW = int(os.getenv("LLM_ROUTER_WINDOW", "50"))
+ROUTER_MAX_ERROR_RATE = float(os.getenv("LLM_ROUTER_MAX_ERROR_RATE", "0.5"))
+HEDGE_AFTER_SECONDS = float(os.getenv("LLM_ROUTER_HEDGE_AFTER_SECONDS", "4"))
+HEDGE_MIN_SAMPLES = 5
+
+ROUTER_SELECTIONS_TOTAL = REGISTRY.counter("assistant_router_selections_total", "Times the model router picked a backend as primary.", ["model"])
+ROUTER_HEDGES_TOTAL = REGISTRY.counter("assistant_router_hedges_total", "Hedged requests sent, by which backend won.", ["winner"])
+
+
+class BackendStats:
+    """Rolling latency and error rate of one backend over its last `window` calls."""
+
+    def __init__(self, window: int = ROUTER_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+
+    def record(self, latency: Optional[float], ok: bool) -> None:
+        if ok:
+            self.latencies.append(latency)
+        self.outcomes.append(ok)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+        return ordered[index]
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+
+class ModelRouter(BaseAIModel):
+    """
+    Routes each generation to the fastest healthy backend.
+
+    Backends are ranked by their rolling median latency; backends without samples
+    rank first so every backend gets measured. A backend is unhealthy while its
+    circuit breaker is open or its rolling error rate exceeds max_error_rate.
+    With hedging enabled, a duplicate request goes to the runner-up once the
+    primary exceeds its p95 latency, and whichever finishes first wins. A
+    primary that loses is recorded with the time it had taken when cancelled.
+    """
+
+    def __init__(self, backends: List[BaseAIModel], hedge: bool = False, window: int = ROUTER_WINDOW,
+                 max_error_rate: float = ROUTER_MAX_ERROR_RATE, hedge_after_seconds: float = HEDGE_AFTER_SECONDS):
+        if not backends:
+            raise ValueError("ModelRouter needs at least one backend")
+        self.backends = backends
+        self.hedge = hedge
+        self.max_error_rate = max_error_rate
+        self.hedge_after_seconds = hedge_after_seconds
+        self.stats = {backend.name: BackendStats(window) for backend in backends}
+
+    async def warm_up(self) -> None:
+        await asyncio.gather(*(backend.warm_up() for backend in self.backends))
+
+    def rank(self) -> List[BaseAIModel]:
+        """Healthy backends, fastest first."""
+        healthy = [
+            backend for backend in self.backends
+            if not breaker_for(backend.provider or backend.name).is_open()
+            and self.stats[backend.name].error_rate <= self.max_error_rate
+        ]
+        if not healthy:
+            # Every backend looks bad; let the breakers decide who gets a probe
+            healthy = [backend for backend in self.backends if not breaker_for(backend.provider or backend.name).is_open()]
+
+        def median(backend):
+            p50 = self.stats[backend.name].percentile(0.5)
+            return 0.0 if p50 is None else p50
+
+        return sorted(healthy, key=median)
+
+    def hedge_deadline(self, backend: BaseAIModel) -> float:
+        stats = self.stats[backend.name]
+        if len(stats.latencies) < HEDGE_MIN_SAMPLES:
+            return self.hedge_after_seconds
+        return stats.percentile(0.95)
+
+    async def _call(self, backend: BaseAIModel, prompt_text) -> Actions:
+        start = time.monotonic()
+        try:
+            actions = await breaker_for(backend.provider or backend.name).call(backend.generate, prompt_text)
+        except LocalRejection:
+            raise
+        except Exception:
+            self.stats[backend.name].record(None, ok=False)
+            raise
+        self.stats[backend.name].record(time.monotonic() - start, ok=True)
+        return actions
+
+    async def _hedged(self, primary: BaseAIModel, secondary: BaseAIModel, prompt_text) -> Actions:
+        start = time.monotonic()
+        primary_task = asyncio.create_task(self._call(primary, prompt_text))
+        done, _ = await asyncio.wait({primary_task}, timeout=self.hedge_deadline(primary))
+        if done:
+            if primary_task.exception() is None:
+                return primary_task.result()
+            # Failed before the deadline; the runner-up is the failover rather than a hedge
+            return await self._call(secondary, prompt_text)
+
+        secondary_task = asyncio.create_task(self._call(secondary, prompt_text))
+        tasks = {primary_task: primary, secondary_task: secondary}
+        pending = set(tasks)
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        ROUTER_HEDGES_TOTAL.inc(winner=tasks[task].name)
+                        if task is secondary_task and primary_task in pending:
+                            # The cancelled primary would have taken at least this long; without
+                            # the sample its median only sees fast calls and it keeps ranking first
+                            self.stats[primary.name].record(time.monotonic() - start, ok=True)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _generate(self, prompt_text) -> Actions:
+        candidates = self.rank()
+        if not candidates:
+            retry_after = min(breaker_for(backend.provider or backend.name).retry_after() for backend in self.backends)
+            raise CircuitOpenError(self.name, retry_after)
+
+        ROUTER_SELECTIONS_TOTAL.inc(model=candidates[0].name)
+        if self.hedge and len(candidates) > 1:
+            try:
+                return await self._hedged(candidates[0], candidates[1], prompt_text)
+            except Exception as e:
+                last_error = e
+            # Both were tried, either in parallel or one after the other
+            candidates = candidates[2:]
+        else:
+            last_error = None
+
+        # Fail over through the remaining backends in rank order
+        for backend in candidates:
+            try:
+                return await self._call(backend, prompt_text)
+            except Exception as e:
+                last_error = e
+        raise last_error
@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import random
+import asyncio
+import difflib
+from collections import deque
+from datetime import datetime
+from typing import List, Optional
+from .base_model import BaseAIModel, Actions
+from ..limits import set_priority, BACKGROUND
+from ..metrics import REGISTRY
+
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "0.1"))
+SHADOW_LOG_PATH = os.getenv("SHADOW_LOG_PATH")
+SHADOW_HISTORY_SIZE = int(os.getenv("SHADOW_HISTORY_SIZE", "200"))
+
+SHADOW_LATENCY_SECONDS = REGISTRY.histogram("assistant_shadow_latency_seconds", "Latency of shadowed turns for the primary and candidate model.", ["model", "role"])
+SHADOW_COMPARISONS_TOTAL = REGISTRY.counter("assistant_shadow_comparisons_total", "Shadowed turns, by whether both models chose the same recipients and tools.", ["agreement"])
+
+
+def summarize(actions: Optional[Actions]) -> Optional[dict]:
+    if actions is None:
+        return None
+    return {
+        "users": sorted(f"{action.recipient}@{action.device}" for action in actions.user_actions),
+        "agents": sorted(action.recipient for action in actions.ai_agent_actions),
+        "tools": sorted(action.command for action in actions.tools_actions),
+        "messages": [action.message for action in [*actions.user_actions, *actions.ai_agent_actions]],
+    }
+
+
+def diff_actions(primary: Optional[Actions], candidate: Optional[Actions]) -> dict:
+    """Where the two models' actions differ: recipients, agents, tools, and how similar the message text is."""
+    if primary is None or candidate is None:
+        return {"comparable": False}
+    a, b = summarize(primary), summarize(candidate)
+    similarity = difflib.SequenceMatcher(None, "\n".join(a["messages"]), "\n".join(b["messages"])).ratio()
+    return {
+        "comparable": True,
+        "same_users": a["users"] == b["users"],
+        "same_agents": a["agents"] == b["agents"],
+        "same_tools": a["tools"] == b["tools"],
+        "message_similarity": round(similarity, 3),
+    }
+
+
+class ShadowRunner:
+    """
+    Sends a sample of real turns to a candidate model in the background.
+
+    The candidate runs at the same time as the primary model and at background
+    priority, and its actions are only recorded, never executed. Each shadowed
+    turn is logged with both models' latency, token usage and actions side by
+    side, so a model swap can be judged on production prompts.
+    """
+
+    def __init__(self, candidate: BaseAIModel, sample_rate: float = SHADOW_SAMPLE_RATE,
+                 log_path: Optional[str] = SHADOW_LOG_PATH, history_size: int = SHADOW_HISTORY_SIZE,
+                 rng: Optional[random.Random] = None):
+        self.candidate = candidate
+        self.sample_rate = sample_rate
+        self.log_path = log_path
+        self.records = deque(maxlen=history_size)
+        self.rng = rng or random.Random()
+        self._tasks = set()
+
+    def start(self, prompt_text) -> Optional[asyncio.Task]:
+        """Start the candidate on this prompt if the turn is sampled."""
+        if self.rng.random() >= self.sample_rate:
+            return None
+        return asyncio.create_task(self._run(prompt_text))
+
+    async def _run(self, prompt_text):
+        set_priority(BACKGROUND)
+        start = time.monotonic()
+        try:
+            actions = await self.candidate.generate(prompt_text)
+            return actions, time.monotonic() - start, None
+        except Exception as e:
+            return None, time.monotonic() - start, str(e)
+
+    def compare(self, shadow_task: asyncio.Task, primary_name: str, primary_actions: Optional[Actions],
+                primary_seconds: float, error: Optional[str] = None) -> None:
+        """Record the comparison once the candidate finishes, without holding up the turn."""
+        task = asyncio.create_task(self._compare(shadow_task, primary_name, primary_actions, primary_seconds, error))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _compare(self, shadow_task, primary_name, primary_actions, primary_seconds, primary_error):
+        candidate_actions, candidate_seconds, candidate_error = await shadow_task
+
+        record = {
+            "at": datetime.now().isoformat(),
+            "primary": self._side(primary_name, primary_actions, primary_seconds, primary_error),
+            "candidate": self._side(self.candidate.name, candidate_actions, candidate_seconds, candidate_error),
+            "diff": diff_actions(primary_actions, candidate_actions),
+        }
+        self.records.append(record)
+
+        SHADOW_LATENCY_SECONDS.observe(primary_seconds, model=primary_name, role="primary")
+        SHADOW_LATENCY_SECONDS.observe(candidate_seconds, model=self.candidate.name, role="candidate")
+        if record["diff"]["comparable"]:
+            agree = record["diff"]["same_users"] and record["diff"]["same_agents"] and record["diff"]["same_tools"]
+            SHADOW_COMPARISONS_TOTAL.inc(agreement="same" if agree else "different")
+        else:
+            SHADOW_COMPARISONS_TOTAL.inc(agreement="error")
+
+        print(
+            f"Shadow turn: {primary_name} {primary_seconds * 1000:.0f} ms vs "
+            f"{self.candidate.name} {candidate_seconds * 1000:.0f} ms, diff {record['diff']}"
+        )
+        if self.log_path:
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+            except OSError as e:
+                print(f"Error writing shadow log: {e}")
+
+    @staticmethod
+    def _side(model_name: str, actions: Optional[Actions], seconds: float, error: Optional[str]) -> dict:
+        usage = actions._usage if actions is not None else None
+        return {
+            "model": model_name,
+            "latency_ms": round(seconds * 1000, 1),
+            "input_tokens": usage.input_tokens if usage else None,
+            "output_tokens": usage.output_tokens if usage else None,
+            "error": error,
+            "actions": summarize(actions),
+        }
+
+    def report(self, n: int = 20) -> dict:
+        """Latency and agreement over the recorded turns, plus the last n records, newest first."""
+        records: List[dict] = list(self.records)
+
+        def median(role):
+            latencies = sorted(r[role]["latency_ms"] for r in records if r[role]["error"] is None)
+            return latencies[len(latencies) // 2] if latencies else None
+
+        comparable = [r["diff"] for r in records if r["diff"]["comparable"]]
+        agreeing = [d for d in comparable if d["same_users"] and d["same_agents"] and d["same_tools"]]
+        return {
+            "candidate": self.candidate.name,
+            "sample_rate": self.sample_rate,
+            "turns": len(records),
+            "primary_p50_ms": median("primary"),
+            "candidate_p50_ms": median("candidate"),
+            "candidate_errors": sum(1 for r in records if r["candidate"]["error"] is not None),
+            "agreement": round(len(agreeing) / len(comparable), 3) if comparable else None,
+            "recent": list(reversed(records[-n:])) if n > 0 else [],
+        }
@@ -0,0 +1,205 @@
+import re
+from typing import List, Optional, Union
+from .base_model import Actions, UserAction, AIAgentAction, ToolAction
+
+Action = Union[UserAction, AIAgentAction, ToolAction]
+
+TAGS = ("user_message", "agent_message", "tool_command")
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+# name=value, name="value" or name='value'
+ATTRIBUTE = re.compile(r"""(\w+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>"']+))""")
+# Also accepts name: value and an unterminated quote running to the next attribute
+LENIENT_ATTRIBUTE = re.compile(r"""(\w+)\s*[=:]\s*(?:"([^"]*?)(?:"|(?=\s+\w+\s*[=:])|$)|'([^']*?)(?:'|(?=\s+\w+\s*[=:])|$)|([^\s>"']+))""")
+OPENING_TAG = re.compile(r"<(user_message|agent_message|tool_command)\b")
+
+# Attribute names models use instead of the documented ones
+ATTRIBUTE_ALIASES = {
+    "to": "user",
+    "recipient": "user",
+    "room": "device",
+    "location": "device",
+    "name": "agent",
+    "cmd": "command",
+    "args": "arguments",
+}
+
+
+def parse_attributes(attribute_text: str, lenient: bool = False) -> dict:
+    attributes = {}
+    for match in (LENIENT_ATTRIBUTE if lenient else ATTRIBUTE).finditer(attribute_text):
+        name, double_quoted, single_quoted, bare = match.groups()
+        value = next(v for v in (double_quoted, single_quoted, bare) if v is not None)
+        if lenient:
+            name = name.lower()
+            name = ATTRIBUTE_ALIASES.get(name, name)
+            if name in attributes:
+                continue
+        attributes[name] = value.strip()
+    return attributes
+
+
+def actions_from(parsed: List[Action]) -> Actions:
+    return Actions(
+        user_actions=[action for action in parsed if isinstance(action, UserAction)],
+        ai_agent_actions=[action for action in parsed if isinstance(action, AIAgentAction)],
+        tools_actions=[action for action in parsed if isinstance(action, ToolAction)],
+    )
+
+
+def build_action(tag: str, attribute_text: str, content: str, lenient: bool = False) -> Action:
+    """Turn one complete element into an action, raising ValueError if it is malformed."""
+    attributes = parse_attributes(attribute_text, lenient)
+    content = content.strip()
+
+    if tag == "user_message":
+        if "user" not in attributes or "device" not in attributes:
+            raise ValueError("Malformed user_message: missing user or device attributes")
+        return UserAction(message=content, recipient=attributes["user"], device=attributes["device"])
+
+    if tag == "agent_message":
+        if "agent" not in attributes:
+            raise ValueError("Malformed agent_message: missing agent attribute")
+        agent_name = attributes["agent"]
+        # Check if agent is messaging itself
+        if content.startswith(f"@{agent_name}") or content.startswith(f"{agent_name},"):
+            raise ValueError(f"Agent '{agent_name}' cannot message itself")
+        return AIAgentAction(message=content, recipient=agent_name)
+
+    if "command" not in attributes:
+        raise ValueError("Malformed tool_command: missing command attribute")
+    return ToolAction(command=attributes["command"], arguments=attributes.get("arguments", ""))
+
+
+class IncrementalTagParser:
+    """
+    Parses the GroqThinker <chat> format as it streams in.
+
+    feed() returns every action whose closing tag arrived in that chunk, so the
+    first message can be delivered while the rest is still being generated.
+    Text is scanned once: searches resume where the previous chunk left off
+    instead of rescanning the whole response. Anything inside <think></think>
+    is ignored.
+
+    In lenient mode the parser repairs instead of failing: attributes are read
+    with aliases and unterminated quotes, malformed elements are skipped and
+    recorded in `problems`, and close() closes an unterminated last element.
+    """
+
+    def __init__(self, lenient: bool = False):
+        self.lenient = lenient
+        self.problems: List[str] = []
+        self.buffer = ""
+        self.position = 0  # Everything before this has been consumed
+        self.open_tag: Optional[str] = None  # Tag whose closing tag we are waiting for
+        self.open_end = 0  # Index just past the '>' of the open tag
+        self.in_think = False
+        self.actions: List[Action] = []
+
+    def feed(self, chunk: str) -> List[Action]:
+        previous_length = len(self.buffer)
+        self.buffer += chunk
+        return self._scan(previous_length)
+
+    def _scan(self, previous_length: int) -> List[Action]:
+        """Emit the elements completed after previous_length; text before it was already searched."""
+        emitted = []
+
+        while True:
+            if self.in_think:
+                close = self.buffer.find(THINK_CLOSE, max(self.position, previous_length - len(THINK_CLOSE)))
+                if close == -1:
+                    break
+                self.in_think = False
+                self.position = close + len(THINK_CLOSE)
+                continue
+
+            if self.open_tag is None:
+                if not self._find_opening_tag():
+                    break
+                continue
+
+            closing = f"</{self.open_tag}>"
+            end = self.buffer.find(closing, max(self.open_end, previous_length - len(closing)))
+            if end == -1:
+                break
+
+            if self.lenient:
+                nested = OPENING_TAG.search(self.buffer, self.open_end, end)
+                if nested:
+                    # The element was never closed; it ends where the next one starts
+                    self.problems.append(f"Malformed response: missing </{self.open_tag}> closing tag")
+                    action = self._build(self.buffer[self.open_end:nested.start()])
+                    if action is not None:
+                        emitted.append(action)
+                    self.position = nested.start()
+                    self.open_tag = None
+                    continue
+
+            action = self._build(self.buffer[self.open_end:end])
+            if action is not None:
+                emitted.append(action)
+            self.position = end + len(closing)
+            self.open_tag = None
+
+        self.actions.extend(emitted)
+        return emitted
+
+    def _build(self, content: str) -> Optional[Action]:
+        attribute_text = self.buffer[self.position + len(self.open_tag) + 1:self.open_end - 1]
+        try:
+            return build_action(self.open_tag, attribute_text, content, self.lenient)
+        except ValueError as e:
+            if not self.lenient:
+                raise
+            self.problems.append(str(e))
+            return None
+
+    def _find_opening_tag(self) -> bool:
+        """Advance to the next opening tag whose '>' has arrived. Returns False if more input is needed."""
+        think = self.buffer.find(THINK_OPEN, self.position)
+        match = OPENING_TAG.search(self.buffer, self.position)
+
+        if think != -1 and (match is None or think < match.start()):
+            self.in_think = True
+            self.position = think + len(THINK_OPEN)
+            return True
+
+        if match is None:
+            # Keep a possible partial tag at the end of the buffer for the next chunk
+            partial = self.buffer.rfind("<", self.position)
+            self.position = partial if partial != -1 else len(self.buffer)
+            return False
+
+        tag_end = self.buffer.find(">", match.end())
+        if tag_end == -1:
+            self.position = match.start()
+            return False
+
+        self.position = match.start()
+        self.open_tag = match.group(1)
+        self.open_end = tag_end + 1
+        return True
+
+    def close(self) -> List[Action]:
+        """Finish parsing, raising ValueError if an element was left unterminated."""
+        while self.open_tag is not None:
+            error = f"Malformed response: missing </{self.open_tag}> closing tag"
+            if not self.lenient:
+                raise ValueError(error)
+            self.problems.append(error)
+
+            # Close the element where the next one starts, or at the end of the response
+            next_tag = OPENING_TAG.search(self.buffer, self.open_end)
+            end = next_tag.start() if next_tag else len(self.buffer)
+            content = self.buffer[self.open_end:end].split("</chat>")[0]
+            # Drop a trailing partial closing tag such as "</user_mess"
+            content = re.sub(r"</?\w*$", "", content.rstrip())
+            action = self._build(content)
+            if action is not None:
+                self.actions.append(action)
+            self.open_tag = None
+            self.position = end
+            self._scan(self.position)
+        return self.actions
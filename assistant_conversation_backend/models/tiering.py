@@ -0,0 +1,105 @@
+import os
+import re
+from collections import deque
+from typing import Dict, Iterable, Optional, Tuple
+from .base_model import BaseAIModel, TokenUsage
+from ..data_models import AIMessage
+from ..metrics import REGISTRY
+
+FAST = "fast"
+STRONG = "strong"
+
+# User messages longer than this many words are treated as complex requests
+TIER_COMPLEX_WORDS = int(os.getenv("LLM_TIER_COMPLEX_WORDS", "25"))
+TIER_WINDOW = int(os.getenv("LLM_TIER_WINDOW", "200"))
+
+# Words that signal multi-step reasoning rather than a quick reply or command
+COMPLEX_REQUEST = re.compile(
+    r"\b(why|explain|compare|plan|recommend|suggest|should i|figure out|help me|summari[sz]e|research|and then|step by step)\b",
+    re.IGNORECASE,
+)
+
+# List prices in USD per million input and output tokens, used for cost reporting
+MODEL_PRICES = {
+    "OpenAI4oMini": (0.15, 0.60),
+    "OpenAI4o": (2.50, 10.00),
+    "OpenAIResponses": (0.15, 0.60),
+    "GroqInstruct": (0.11, 0.34),
+    "GroqThinker": (0.29, 0.39),
+    "FakeModel": (0.0, 0.0),
+}
+
+TIER_TURNS_TOTAL = REGISTRY.counter("assistant_tier_turns_total", "Turns handled by each model tier.", ["tier", "reason"])
+TIER_LATENCY_SECONDS = REGISTRY.histogram("assistant_tier_latency_seconds", "Generation latency per model tier.", ["tier"])
+TIER_COST_USD_TOTAL = REGISTRY.counter("assistant_tier_cost_usd_total", "Estimated model cost per tier in USD.", ["tier"])
+
+
+def estimate_cost(model_name: str, usage: Optional[TokenUsage]) -> float:
+    if usage is None:
+        return 0.0
+    input_price, output_price = MODEL_PRICES.get(model_name, (0.0, 0.0))
+    return (usage.input_tokens * input_price + usage.output_tokens * output_price) / 1_000_000
+
+
+class TierPolicy:
+    """
+    Picks the model for each turn from its source and content.
+
+    SYSTEM notices, agent results and short user messages are routine and go
+    to the fast model. User messages that are long, ask several questions or
+    call for reasoning go to the strong model.
+    """
+
+    def __init__(self, fast: BaseAIModel, strong: BaseAIModel, agent_names: Iterable[str] = (),
+                 complex_words: int = TIER_COMPLEX_WORDS, window: int = TIER_WINDOW):
+        self.models = {FAST: fast, STRONG: strong}
+        self.agent_names = set(agent_names)
+        self.complex_words = complex_words
+        self.turns = {FAST: 0, STRONG: 0}
+        self.costs = {FAST: 0.0, STRONG: 0.0}
+        self.latencies = {FAST: deque(maxlen=window), STRONG: deque(maxlen=window)}
+
+    def classify(self, message: AIMessage) -> Tuple[str, str]:
+        """Return the tier for a turn and the reason it was chosen."""
+        if message.from_user == "SYSTEM":
+            return FAST, "system"
+        if message.from_user in self.agent_names:
+            return FAST, "agent_result"
+
+        text = message.message or ""
+        if len(text.split()) > self.complex_words:
+            return STRONG, "long_request"
+        if text.count("?") > 1:
+            return STRONG, "several_questions"
+        if COMPLEX_REQUEST.search(text):
+            return STRONG, "reasoning"
+        return FAST, "short_request"
+
+    def select(self, message: AIMessage) -> Tuple[BaseAIModel, str]:
+        tier, reason = self.classify(message)
+        self.turns[tier] += 1
+        TIER_TURNS_TOTAL.inc(tier=tier, reason=reason)
+        return self.models[tier], tier
+
+    def record(self, tier: str, seconds: float, usage: Optional[TokenUsage]) -> None:
+        """Record the latency and token usage of one generation on a tier."""
+        cost = estimate_cost(self.models[tier].name, usage)
+        self.latencies[tier].append(seconds)
+        self.costs[tier] += cost
+        TIER_LATENCY_SECONDS.observe(seconds, tier=tier)
+        TIER_COST_USD_TOTAL.inc(cost, tier=tier)
+
+    def report(self) -> Dict[str, dict]:
+        """Per-tier model, fraction of turns, median latency over the recent window and total cost."""
+        total = sum(self.turns.values())
+        report = {}
+        for tier, model in self.models.items():
+            latencies = sorted(self.latencies[tier])
+            report[tier] = {
+                "model": model.name,
+                "turns": self.turns[tier],
+                "fraction": round(self.turns[tier] / total, 3) if total else 0.0,
+                "p50_latency_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+                "cost_usd": round(self.costs[tier], 6),
+            }
+        return report
@@ -0,0 +1,227 @@
+import os
+import time
+import random
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Optional, Tuple, TypeVar
+from .metrics import REGISTRY
+
+T = TypeVar("T")
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+BACKOFF_BASE_SECONDS = float(os.getenv("BACKOFF_BASE_SECONDS", "2"))
+BACKOFF_MAX_SECONDS = float(os.getenv("BACKOFF_MAX_SECONDS", "120"))
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = REGISTRY.gauge("assistant_circuit_state", "Circuit breaker state per provider (0 closed, 1 half-open, 2 open).", ["provider"])
+BACKOFF_SECONDS = REGISTRY.gauge("assistant_backoff_seconds", "Current backoff delay per provider.", ["provider"])
+CIRCUIT_OPENED_TOTAL = REGISTRY.counter("assistant_circuit_opened_total", "Times a provider circuit breaker opened.", ["provider"])
+CIRCUIT_REJECTED_TOTAL = REGISTRY.counter("assistant_circuit_rejected_total", "Calls rejected because the provider circuit was open.", ["provider"])
+SWR_SERVED_TOTAL = REGISTRY.counter("assistant_swr_served_total", "Reads of a stale-while-revalidate cache, by what was served: fresh, stale or none.", ["cache", "source"])
+SWR_AGE_SECONDS = REGISTRY.gauge("assistant_swr_age_seconds", "Age of the value last served by a stale-while-revalidate cache.", ["cache"])
+
+
+class LocalRejection(Exception):
+    """A call refused before it reached the provider. Never counts as a provider failure."""
+
+
+class CircuitOpenError(LocalRejection):
+    """Raised when a call is rejected because the provider's circuit is open."""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(f"{provider} is unavailable, retry in {retry_after:.1f}s")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+class ExponentialBackoff:
+    """
+    Exponential backoff with jitter. The delay for an attempt is drawn uniformly
+    from the upper half of base * factor ** attempt, capped at max_delay.
+    """
+
+    def __init__(self, base: float = BACKOFF_BASE_SECONDS, factor: float = 2.0, max_delay: float = BACKOFF_MAX_SECONDS, rng: Optional[random.Random] = None):
+        self.base = base
+        self.factor = factor
+        self.max_delay = max_delay
+        self.rng = rng or random.Random()
+
+    def delay(self, attempt: int) -> float:
+        ceiling = min(self.max_delay, self.base * self.factor ** attempt)
+        return ceiling / 2 + self.rng.uniform(0, ceiling / 2)
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker.
+
+    After failure_threshold consecutive transport or API failures the circuit opens and calls are
+    rejected for a backoff delay that grows with every re-open. Once the delay has
+    passed a single probe call is let through (half-open); its outcome closes or
+    re-opens the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, backoff: Optional[ExponentialBackoff] = None, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.backoff = backoff or ExponentialBackoff()
+        self.clock = clock
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.consecutive_opens = 0
+        self.opened_until = 0.0
+        self._probe_in_flight = False
+        self._publish(0.0)
+
+    def _publish(self, delay: float) -> None:
+        CIRCUIT_STATE.set(_STATE_VALUES[self.state], provider=self.name)
+        BACKOFF_SECONDS.set(delay, provider=self.name)
+
+    def is_open(self) -> bool:
+        """True while calls are being rejected without being attempted."""
+        return self.state == OPEN and self.clock() < self.opened_until
+
+    def next_retry_delay(self) -> float:
+        """Seconds a caller should wait before trying this provider again."""
+        if self.state == OPEN:
+            return self.retry_after()
+        if self.consecutive_failures:
+            return self.backoff.delay(self.consecutive_failures - 1)
+        return 0.0
+
+    def retry_after(self) -> float:
+        """Seconds until the next call will be let through."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_until - self.clock())
+
+    def allow_request(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and self.clock() >= self.opened_until:
+            self.state = HALF_OPEN
+            self._publish(0.0)
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.consecutive_opens = 0
+        self._probe_in_flight = False
+        self._publish(0.0)
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            delay = self.backoff.delay(self.consecutive_opens)
+            self.consecutive_opens += 1
+            self.state = OPEN
+            self.opened_until = self.clock() + delay
+            CIRCUIT_OPENED_TOTAL.inc(provider=self.name)
+            self._publish(delay)
+
+    async def call(self, func: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+        """Call func through the breaker, raising CircuitOpenError while the circuit is open."""
+        if not self.allow_request():
+            CIRCUIT_REJECTED_TOTAL.inc(provider=self.name)
+            raise CircuitOpenError(self.name, self.retry_after())
+        try:
+            result = await func(*args, **kwargs)
+        except LocalRejection:
+            raise
+        except ValueError:
+            # The provider answered, its output just didn't parse or validate
+            self.record_success()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        finally:
+            # A cancelled probe must not keep the circuit half-open forever
+            self._probe_in_flight = False
+        self.record_success()
+        return result
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+
+
+def breaker_for(provider: str) -> CircuitBreaker:
+    """Returns the shared circuit breaker for a provider, creating it on first use."""
+    if provider not in _BREAKERS:
+        _BREAKERS[provider] = CircuitBreaker(provider)
+    return _BREAKERS[provider]
+
+
+class StaleWhileRevalidate(Generic[T]):
+    """
+    Serves the result of fetch within a hard deadline.
+
+    Every read starts a refresh (unless one is already running) and waits at
+    most deadline_seconds for it. If the refresh misses the deadline or fails,
+    the last good value is served with its age and the refresh carries on in
+    the background. While the breaker is open the last good value is served
+    without trying. With nothing cached yet the failure or a TimeoutError is
+    raised instead.
+    """
+
+    def __init__(self, name: str, fetch: Callable[[], Awaitable[T]], deadline_seconds: float,
+                 breaker: Optional[CircuitBreaker] = None, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.fetch = fetch
+        self.deadline_seconds = deadline_seconds
+        self.breaker = breaker
+        self.clock = clock
+        self.value: Optional[T] = None
+        self.fetched_at: Optional[float] = None
+        self._refresh: Optional[asyncio.Task] = None
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._fetch())
+            # Failures are reported by get(); a refresh nobody waited for must not log "never retrieved"
+            self._refresh.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return self._refresh
+
+    async def _fetch(self) -> T:
+        value = await (self.breaker.call(self.fetch) if self.breaker is not None else self.fetch())
+        self.value = value
+        self.fetched_at = self.clock()
+        return value
+
+    def _stale(self) -> Tuple[T, float]:
+        age = self.clock() - self.fetched_at
+        SWR_SERVED_TOTAL.inc(cache=self.name, source="stale")
+        SWR_AGE_SECONDS.set(age, cache=self.name)
+        return self.value, age
+
+    async def get(self) -> Tuple[T, float]:
+        """The value and its age in seconds; the age is 0 when it was fetched within the deadline."""
+        if self.breaker is not None and self.breaker.is_open() and self.fetched_at is not None:
+            return self._stale()
+
+        task = self._start_refresh()
+        await asyncio.wait({task}, timeout=self.deadline_seconds)
+        error = None
+        if task.done():
+            error = asyncio.CancelledError() if task.cancelled() else task.exception()
+            if error is None:
+                SWR_SERVED_TOTAL.inc(cache=self.name, source="fresh")
+                SWR_AGE_SECONDS.set(0, cache=self.name)
+                return task.result(), 0.0
+            print(f"Refreshing {self.name} failed: {error!r}")
+
+        if self.fetched_at is not None:
+            return self._stale()
+        SWR_SERVED_TOTAL.inc(cache=self.name, source="none")
+        if error is not None:
+            raise error
+        raise asyncio.TimeoutError(f"{self.name} was not ready within {self.deadline_seconds * 1000:.0f} ms")
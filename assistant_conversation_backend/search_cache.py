@@ -0,0 +1,144 @@
+import os
+import re
+import json
+import time
+import asyncio
+import unicodedata
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Tuple
+from .metrics import REGISTRY
+
+WEB_SEARCH_CACHE_SIZE = int(os.getenv("WEB_SEARCH_CACHE_SIZE", "256"))
+# Seconds a result stays fresh per topic; 0 disables caching for that topic
+WEB_SEARCH_CACHE_TTLS = {
+    "weather": 600,
+    "markets": 300,
+    "news": 900,
+    "general": 6 * 3600,
+    # Overrides, e.g. {"weather": 300, "general": 86400}
+    **json.loads(os.getenv("WEB_SEARCH_CACHE_TTLS", "{}")),
+}
+
+# The first matching topic decides the TTL; questions about "now" go stale fastest
+TOPICS = [
+    ("weather", re.compile(r"\b(weather|forecast|temperature|rain|snow|wind|sunrise|sunset)\b")),
+    ("markets", re.compile(r"\b(price|prices|stock|stocks|shares|bitcoin|crypto|exchange rate|score|scores)\b")),
+    ("news", re.compile(r"\b(news|headlines?|latest|today|tonight|currently|right now|live)\b")),
+]
+# Politeness and search verbs that don't change what is being asked
+FILLER = re.compile(r"^(?:(?:please|hey|can you|could you|would you|search(?: the web)? for|look up|find|tell me|google)\s+)+")
+
+WEB_SEARCH_CACHE_TOTAL = REGISTRY.counter(
+    "assistant_web_search_cache_total",
+    "Web searches by how they were answered: hit (cache), joined (an identical search in flight) or miss (upstream).",
+    ["result"],
+)
+WEB_SEARCH_SECONDS = REGISTRY.histogram(
+    "assistant_web_search_seconds",
+    "Upstream web search latency.",
+    buckets=(0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 60),
+)
+WEB_SEARCH_SAVED_SECONDS = REGISTRY.counter(
+    "assistant_web_search_saved_seconds_total",
+    "Upstream latency avoided by answering web searches from the cache.",
+)
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: case, punctuation, spacing and leading filler words don't matter."""
+    text = unicodedata.normalize("NFKC", query).lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    text = " ".join(text.split())
+    return FILLER.sub("", text)
+
+
+def query_topic(normalized: str) -> str:
+    for topic, pattern in TOPICS:
+        if pattern.search(normalized):
+            return topic
+    return "general"
+
+
+class SearchCache:
+    """
+    Result cache for web searches keyed by the normalized query.
+
+    Fresh results are served without an upstream call, with a TTL chosen by
+    the query's topic. Identical queries that arrive while a search is
+    running wait for that search instead of starting another. Failed
+    searches are not cached.
+    """
+
+    def __init__(self, ttls: Dict[str, float] = WEB_SEARCH_CACHE_TTLS, capacity: int = WEB_SEARCH_CACHE_SIZE,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttls = ttls
+        self.capacity = capacity
+        self.clock = clock
+        # key -> (result, expires at, seconds the upstream search took)
+        self._entries: "OrderedDict[str, Tuple[str, float, float]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.counts = {"hit": 0, "joined": 0, "miss": 0}
+        self.upstream_searches = 0
+        self.upstream_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    async def get(self, query: str, search: Callable[[str], Awaitable[str]]) -> str:
+        key = normalize_query(query)
+        entry = self._entries.get(key)
+        if entry is not None:
+            result, expires_at, cost = entry
+            if self.clock() < expires_at:
+                self._entries.move_to_end(key)
+                self._count("hit")
+                self.saved_seconds += cost
+                WEB_SEARCH_SAVED_SECONDS.inc(cost)
+                return result
+            del self._entries[key]
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self._count("joined")
+        else:
+            self._count("miss")
+            task = asyncio.create_task(self._search(key, query, search))
+            self._in_flight[key] = task
+        # Shielded, so a caller that gives up doesn't cancel the search for the others
+        return await asyncio.shield(task)
+
+    async def _search(self, key: str, query: str, search: Callable[[str], Awaitable[str]]) -> str:
+        start = time.monotonic()
+        try:
+            result = await search(query)
+        finally:
+            self._in_flight.pop(key, None)
+        cost = time.monotonic() - start
+        self.upstream_searches += 1
+        self.upstream_seconds += cost
+        WEB_SEARCH_SECONDS.observe(cost)
+
+        ttl = self.ttls.get(query_topic(key), self.ttls.get("general", 0))
+        if ttl > 0:
+            self._entries[key] = (result, self.clock() + ttl, cost)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        return result
+
+    def _count(self, result: str) -> None:
+        self.counts[result] += 1
+        WEB_SEARCH_CACHE_TOTAL.inc(result=result)
+
+    def report(self) -> dict:
+        requests = sum(self.counts.values())
+        return {
+            **self.counts,
+            "hit_rate": self.counts["hit"] / requests if requests else 0.0,
+            # Joined searches still wait, but don't cost an upstream call
+            "upstream_calls_saved": requests - self.counts["miss"],
+            "mean_upstream_seconds": self.upstream_seconds / self.upstream_searches if self.upstream_searches else 0.0,
+            "saved_seconds": self.saved_seconds,
+            "entries": len(self._entries),
+        }
+
+
+SEARCH_CACHE = SearchCache()
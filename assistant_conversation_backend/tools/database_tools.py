@@ -2,6 +2,7 @@ from typing import Optional, List, Union
 from pydantic import BaseModel
 from ulid import ULID
 from ..database import DSN
+from ..home_assistant.shopping_list import SHOPPING_LIST
 import psycopg
 from datetime import datetime
 
@@ -375,62 +376,27 @@ async def get_shopping_list(is_purchased: Optional[bool] = None) -> list[dict]:
     
     """Fetch shopping items from the shopping list based on the provided filters."""
     
-    params = []
-    where_clauses = []
-    if is_purchased is not None:
-        where_clauses.append("is_purchased = %s")
-        params.append(is_purchased)
-        
-    async with await get_connection() as conn:
-        async with conn.cursor() as cur:
-            query = "SELECT * FROM shopping_list"
-            if where_clauses:
-                query += " WHERE " + " AND ".join(where_clauses)
-            await cur.execute(query, params)
-            shopping_list = await cur.fetchall()
-            return shopping_list
+    # Served from the local copy of the Home Assistant shopping list
+    items = await SHOPPING_LIST.get(is_purchased)
+    return [
+        {"item_id": item.item_id, "item_name": item.item_name, "quantity": item.quantity, "is_purchased": item.is_purchased}
+        for item in items
+    ]
 
 async def add_shopping_item(item_name: str, quantity: int) -> str:
 
     """Add a new item to the shopping list."""
 
-    async with await get_connection() as conn:
-        async with conn.cursor() as cur:
-            await cur.execute("""
-            INSERT INTO shopping_list (item_id, item_name, quantity, is_purchased)
-            VALUES (%s, %s, %s, FALSE)
-            RETURNING item_id;
-            """, (str(ULID()), item_name, quantity))
-            result = await cur.fetchone()
-            item_id = result[0]
-            await conn.commit()
-            return f"Shopping item added with ID: {item_id}"
+    # Stored locally at once; Home Assistant is updated in the background
+    item = await SHOPPING_LIST.add(item_name, quantity)
+    return f"Shopping item added with ID: {item.item_id}"
 
 async def update_shopping_item(item_id: str, item_name: Optional[str]=None, 
                          quantity: Optional[int]=None, is_purchased: Optional[bool]=None) -> str:
     
     """Update a shopping item in the shopping list."""
     
-    updates = []
-    params = []
-    if item_name is not None:
-        updates.append("item_name = %s")
-        params.append(item_name)
-    if quantity is not None:
-        updates.append("quantity = %s")
-        params.append(quantity)
-    if is_purchased is not None:
-        updates.append("is_purchased = %s")
-        params.append(is_purchased)
-        
-    params.append(item_id)
-    
-    async with await get_connection() as conn:
-        async with conn.cursor() as cur:
-            await cur.execute(f"""
-            UPDATE shopping_list
-            SET {', '.join(updates)}
-            WHERE item_id = %s;
-            """, params)
-            await conn.commit()
-            return "Shopping item updated successfully"
+    item = await SHOPPING_LIST.update(item_id, item_name=item_name, quantity=quantity, is_purchased=is_purchased)
+    if item is None:
+        return f"Shopping item {item_id} not found"
+    return "Shopping item updated successfully"
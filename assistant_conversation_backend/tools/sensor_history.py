@@ -0,0 +1,45 @@
+from .base_tool import BaseTool
+from ..home_assistant.history import HISTORY
+import inspect
+
+class SensorHistory(BaseTool):
+    """
+    Sensor history tool for the assistant conversation.
+    This class summarizes how a numeric Home Assistant sensor changed over a period:
+    min, max and mean per time slice and the overall trend.
+    """
+
+    async def history(self, arguments: str):
+        """
+        Summarize a sensor's history.
+        :param arguments: The entity ID and optionally the number of hours to look back (default 24), e.g. "sensor.living_room_temperature, 6".
+        """
+        parts = [part.strip() for part in arguments.split(",") if part.strip()]
+        if not parts:
+            raise ValueError("An entity ID is required, e.g. sensor.living_room_temperature, 6")
+        hours = float(parts[1]) if len(parts) > 1 else 24
+        return await HISTORY.summary(parts[0], hours)
+
+    def __str__(self) -> str:
+        """
+        String representation of the SensorHistory tool.
+        Includes the tool description and available functions.
+        """
+        # Get class docstring
+        description = self.__class__.__doc__.strip()
+
+        # Get available functions (excluding special methods)
+        methods = []
+        for name, method in inspect.getmembers(self, predicate=inspect.ismethod):
+            if not name.startswith('_'):
+                signature = str(inspect.signature(method))
+                doc = method.__doc__.strip() if method.__doc__ else "No description"
+                methods.append(f"- {name}{signature}: {doc}")
+
+        functions_str = "\n".join(methods)
+
+        return (
+            f"Tool: {self.__class__.__name__}\n"
+            f"Description: {description}\n\n"
+            f"Available Functions:\n{functions_str}"
+        )
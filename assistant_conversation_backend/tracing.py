@@ -0,0 +1,119 @@
+import os
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import List, Optional
+from ulid import ULID
+
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")
+TRACE_HISTORY_SIZE = int(os.getenv("TRACE_HISTORY_SIZE", "200"))
+
+
+@dataclass
+class Span:
+    name: str
+    start_ms: float  # Offset from the start of the turn
+    duration_ms: float
+
+
+@dataclass
+class TurnTrace:
+    turn_id: str
+    started_at: str
+    from_user: str
+    location: Optional[str]
+    queue_wait_ms: float = 0.0
+    total_ms: float = 0.0
+    spans: List[Span] = field(default_factory=list)
+    attributes: dict = field(default_factory=dict)
+    _start: float = field(default=0.0, repr=False)
+    _finished: bool = field(default=False, repr=False)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        del data["_start"]
+        del data["_finished"]
+        return data
+
+    def slowest_span(self) -> Optional[Span]:
+        return max(self.spans, key=lambda span: span.duration_ms, default=None)
+
+
+# The turn currently being processed by the agent loop. Tasks spawned while a
+# turn is active inherit it, but spans recorded after the turn finished are dropped.
+_current_turn: ContextVar[Optional[TurnTrace]] = ContextVar("current_turn", default=None)
+
+
+class TurnTracer:
+    """
+    Records per-stage latency spans for every turn of the agent loop.
+    Finished turns are kept in memory for the API and optionally appended
+    to a JSON lines file.
+    """
+
+    def __init__(self, max_turns: int = TRACE_HISTORY_SIZE, export_path: Optional[str] = TRACE_EXPORT_PATH):
+        self.turns = deque(maxlen=max_turns)
+        self.export_path = export_path
+
+    def start_turn(self, from_user: str, location: Optional[str] = None, enqueued_at: Optional[float] = None) -> TurnTrace:
+        now = time.monotonic()
+        turn = TurnTrace(
+            turn_id=str(ULID()),
+            started_at=datetime.now().isoformat(),
+            from_user=from_user,
+            location=location,
+            queue_wait_ms=(now - enqueued_at) * 1000 if enqueued_at else 0.0,
+            _start=now,
+        )
+        _current_turn.set(turn)
+        return turn
+
+    @contextmanager
+    def span(self, name: str):
+        """Time the enclosed block and attach it to the current turn, if any."""
+        turn = _current_turn.get()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            if turn is not None and not turn._finished:
+                end = time.monotonic()
+                turn.spans.append(
+                    Span(
+                        name=name,
+                        start_ms=round((start - turn._start) * 1000, 3),
+                        duration_ms=round((end - start) * 1000, 3),
+                    )
+                )
+
+    def annotate(self, **attributes) -> None:
+        """Attach extra per-turn data, such as token counts, to the current turn."""
+        turn = _current_turn.get()
+        if turn is not None and not turn._finished:
+            turn.attributes.update(attributes)
+
+    def finish_turn(self, turn: TurnTrace) -> None:
+        turn.total_ms = round((time.monotonic() - turn._start) * 1000, 3)
+        turn.queue_wait_ms = round(turn.queue_wait_ms, 3)
+        turn._finished = True
+        _current_turn.set(None)
+        self.turns.append(turn)
+
+        if self.export_path:
+            try:
+                with open(self.export_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(turn.to_dict()) + "\n")
+            except OSError as e:
+                print(f"Error exporting turn trace: {e}")
+
+    def last_turns(self, n: int = 20) -> List[dict]:
+        """Return the breakdowns of the last n finished turns, newest first."""
+        turns = list(self.turns)[-n:] if n > 0 else []
+        return [turn.to_dict() for turn in reversed(turns)]
+
+
+TRACER = TurnTracer()
@@ -0,0 +1,248 @@
+import asyncio
+from datetime import datetime
+from aiohttp import web, WSMsgType
+
+TOKEN = "test-token"
+
+
+def make_state(entity_id, state, **attributes):
+    return {"entity_id": entity_id, "state": state, "attributes": attributes}
+
+
+class FakeHomeAssistant:
+    """
+    A local Home Assistant stand-in serving the REST and websocket APIs the
+    backend uses, so the integration can be tested without a real instance.
+    Start it with `await server.start()` and point clients at `server.api_url`.
+    """
+
+    def __init__(self, states=None, areas=None):
+        self.states = {state["entity_id"]: state for state in states or []}
+        self.areas = areas or {}  # entity_id -> area name, served through the registries
+        self.shopping_list = []
+        self.requests = []
+        self.conversation_reply = "Done"
+        self.history = {}  # entity_id -> [(iso timestamp, state)]
+        self.delay = 0.0  # Added to every REST response
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.subscribers = []  # (websocket, subscription id)
+        self.websockets = set()
+        self.app = web.Application(middlewares=[self.track])
+        self.app.router.add_get("/api/", self.api_root)
+        self.app.router.add_get("/api/websocket", self.websocket)
+        self.app.router.add_get("/api/states", self.get_states)
+        self.app.router.add_get("/api/states/{entity_id}", self.get_state)
+        self.app.router.add_post("/api/states/{entity_id}", self.post_state)
+        self.app.router.add_get("/api/shopping_list", self.get_shopping_list)
+        self.app.router.add_post("/api/shopping_list", self.add_shopping_item)
+        self.app.router.add_post("/api/shopping_list/item/{item_id}", self.update_shopping_item)
+        self.app.router.add_post("/api/conversation/process", self.process_conversation)
+        self.app.router.add_post("/api/services/{domain}/{service}", self.call_service)
+        self.app.router.add_get("/api/history/period/{start}", self.get_history)
+        self.runner = None
+        self.api_url = None
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.api_url = f"http://127.0.0.1:{port}/api"
+        return self
+
+    async def stop(self):
+        for ws in list(self.websockets):
+            await ws.close()
+        await self.runner.cleanup()
+
+    async def drop_connections(self):
+        """Close every websocket, as a Home Assistant restart would."""
+        for ws in list(self.websockets):
+            await ws.close()
+
+    def authorized(self, request):
+        return request.headers.get("Authorization") == f"Bearer {TOKEN}"
+
+    @web.middleware
+    async def track(self, request, handler):
+        if request.path == "/api/websocket":
+            return await handler(request)
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            return await handler(request)
+        finally:
+            self.in_flight -= 1
+
+    async def set_state(self, entity_id, state, **attributes):
+        """Change an entity and push the state_changed event to subscribers."""
+        old = self.states.get(entity_id)
+        new = make_state(entity_id, state, **attributes) if state is not None else None
+        if new is None:
+            self.states.pop(entity_id, None)
+        else:
+            self.states[entity_id] = new
+        for ws, subscription_id in list(self.subscribers):
+            if ws.closed:
+                continue
+            await ws.send_json({
+                "id": subscription_id,
+                "type": "event",
+                "event": {"event_type": "state_changed", "data": {"entity_id": entity_id, "old_state": old, "new_state": new}},
+            })
+
+    async def websocket(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.websockets.add(ws)
+        try:
+            await ws.send_json({"type": "auth_required"})
+            auth = await ws.receive_json()
+            if auth.get("access_token") != TOKEN:
+                await ws.send_json({"type": "auth_invalid", "message": "Invalid access token"})
+                return ws
+            await ws.send_json({"type": "auth_ok"})
+
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    break
+                data = msg.json()
+                self.requests.append(("ws", data.get("type")))
+                if data["type"] == "subscribe_events":
+                    self.subscribers.append((ws, data["id"]))
+                    await ws.send_json({"id": data["id"], "type": "result", "success": True, "result": None})
+                elif data["type"] == "get_states":
+                    await ws.send_json({"id": data["id"], "type": "result", "success": True, "result": list(self.states.values())})
+                elif data["type"] in self.registries():
+                    await ws.send_json({"id": data["id"], "type": "result", "success": True, "result": self.registries()[data["type"]]})
+                else:
+                    await ws.send_json({"id": data["id"], "type": "result", "success": False, "error": {"code": "unknown_command"}})
+        finally:
+            self.websockets.discard(ws)
+            self.subscribers = [(s, i) for s, i in self.subscribers if s is not ws]
+        return ws
+
+    def registries(self):
+        area_ids = {name: name.lower().replace(" ", "_") for name in set(self.areas.values())}
+        return {
+            "config/area_registry/list": [{"area_id": area_id, "name": name} for name, area_id in area_ids.items()],
+            "config/device_registry/list": [],
+            "config/entity_registry/list": [
+                {"entity_id": entity_id, "area_id": area_ids.get(self.areas.get(entity_id)), "device_id": None}
+                for entity_id in self.states
+            ],
+        }
+
+    async def api_root(self, request):
+        if not self.authorized(request):
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        return web.json_response({"message": "API running."})
+
+    async def get_states(self, request):
+        if not self.authorized(request):
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        self.requests.append(("GET", "/states"))
+        return web.json_response(list(self.states.values()))
+
+    async def get_state(self, request):
+        if not self.authorized(request):
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        entity_id = request.match_info["entity_id"]
+        self.requests.append(("GET", f"/states/{entity_id}"))
+        if entity_id not in self.states:
+            return web.json_response({"message": "Entity not found."}, status=404)
+        return web.json_response(self.states[entity_id])
+
+    async def post_state(self, request):
+        if not self.authorized(request):
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        entity_id = request.match_info["entity_id"]
+        self.requests.append(("POST", f"/states/{entity_id}"))
+        body = await request.json()
+        await self.set_state(entity_id, body["state"], **body.get("attributes", {}))
+        return web.json_response(self.states[entity_id])
+
+    async def get_shopping_list(self, request):
+        if not self.authorized(request):
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        self.requests.append(("GET", "/shopping_list"))
+        return web.json_response(self.shopping_list)
+
+    async def set_shopping_list(self, items):
+        """Replace the shopping list, as an edit in the Home Assistant app would, and update its todo entity."""
+        self.shopping_list = items
+        await self.set_state("todo.shopping_list", str(sum(1 for item in items if not item["complete"])))
+
+    async def add_shopping_item(self, request):
+        if not self.authorized(request):
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        body = await request.json()
+        self.requests.append(("POST", "/shopping_list", body))
+        item = {"id": f"ha{len(self.shopping_list) + 1}", "name": body["name"], "complete": False}
+        await self.set_shopping_list(self.shopping_list + [item])
+        return web.json_response(item)
+
+    async def update_shopping_item(self, request):
+        if not self.authorized(request):
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        item_id = request.match_info["item_id"]
+        body = await request.json()
+        self.requests.append(("POST", f"/shopping_list/item/{item_id}", body))
+        item = next((item for item in self.shopping_list if item.get("id") == item_id), None)
+        if item is None:
+            return web.json_response({"message": "Item not found"}, status=404)
+        item.update(body)
+        await self.set_shopping_list(self.shopping_list)
+        return web.json_response(item)
+
+    async def process_conversation(self, request):
+        if not self.authorized(request):
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        body = await request.json()
+        self.requests.append(("POST", "/conversation/process", body["text"]))
+        return web.json_response({"response": {"speech": {"plain": {"speech": self.conversation_reply}}}})
+
+    async def call_service(self, request):
+        if not self.authorized(request):
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        domain, service = request.match_info["domain"], request.match_info["service"]
+        body = await request.json()
+        self.requests.append(("POST", f"/services/{domain}/{service}", body))
+        entity_ids = body.get("entity_id", [])
+        entity_ids = [entity_ids] if isinstance(entity_ids, str) else entity_ids
+        new_state = {"turn_on": "on", "turn_off": "off", "open_cover": "open", "close_cover": "closed",
+                     "lock": "locked", "unlock": "unlocked"}.get(service)
+        changed = []
+        for entity_id in entity_ids:
+            if entity_id in self.states and new_state is not None:
+                await self.set_state(entity_id, new_state, **self.states[entity_id]["attributes"])
+                changed.append(self.states[entity_id])
+        return web.json_response(changed)
+
+    async def get_history(self, request):
+        if not self.authorized(request):
+            return web.json_response({"message": "Unauthorized"}, status=401)
+        start = datetime.fromisoformat(request.match_info["start"])
+        end = datetime.fromisoformat(request.query["end_time"])
+        entity_id = request.query["filter_entity_id"]
+        self.requests.append(("GET", "/history/period", entity_id))
+        points = [
+            {"state": state, "last_changed": timestamp}
+            for timestamp, state in self.history.get(entity_id, [])
+            if start <= datetime.fromisoformat(timestamp) < end
+        ]
+        if points:
+            points[0]["entity_id"] = entity_id
+        return web.json_response([points] if points else [])
+
+
+async def wait_for(condition, timeout=2.0):
+    """Poll until condition() is true; the mirror applies events asynchronously."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.005)
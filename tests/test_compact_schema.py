@@ -0,0 +1,98 @@
+import os
+import json
+import time
+import unittest
+from assistant_conversation_backend.models.base_model import Actions, UserAction, AIAgentAction, ToolAction
+from assistant_conversation_backend.models.compact_schema import CompactActions, compact_from
+from assistant_conversation_backend.models.openai_compatible import OpenAICompatibleModel, output_tool
+from assistant_conversation_backend.models.fake import FakeModel, output_json, estimate_tokens
+from assistant_conversation_backend.models.repair import repair_json_actions
+
+SAMPLES = [
+    Actions(
+        user_actions=[UserAction(message="Dinner is ready in ten minutes.", recipient="Sam", device="kitchen")],
+        ai_agent_actions=[],
+        tools_actions=[],
+    ),
+    Actions(
+        thought="Sam asked about the weather, ask the search agent.",
+        user_actions=[UserAction(message="Let me check that for you.", recipient="Sam", device="living_room")],
+        ai_agent_actions=[AIAgentAction(message="What is the weather in Stockholm today?", recipient="WebSearchAgent")],
+        tools_actions=[],
+    ),
+    Actions(
+        user_actions=[],
+        ai_agent_actions=[AIAgentAction(message="Turn off the kitchen lights.", recipient="HomeAssistantAgent")],
+        tools_actions=[ToolAction(command="/complete_task", arguments="42")],
+    ),
+    Actions(user_actions=[], ai_agent_actions=[], tools_actions=[]),
+]
+
+
+def make_model(compact: bool) -> OpenAICompatibleModel:
+    return OpenAICompatibleModel("test-model", base_url="http://llm.test/v1", api_key="test", compact=compact)
+
+
+class TestCompactSchema(unittest.IsolatedAsyncioTestCase):
+    def test_compact_round_trip(self):
+        """Test that actions survive the compact wire format unchanged."""
+        for actions in SAMPLES:
+            with self.subTest(actions=actions):
+                wire = output_json(actions, compact=True)
+
+                self.assertEqual(make_model(compact=True).parse_output(wire), actions)
+
+    def test_empty_lists_may_be_left_out(self):
+        """Test that missing compact lists read as empty."""
+        actions = make_model(compact=True).parse_output('{"u": [{"r": "Sam", "m": "Hi"}]}')
+
+        self.assertEqual(actions.user_actions, [UserAction(message="Hi", recipient="Sam")])
+        self.assertEqual((actions.ai_agent_actions, actions.tools_actions), ([], []))
+
+    def test_compact_output_is_repaired(self):
+        """Test that truncated compact output is repaired like the full schema."""
+        actions = repair_json_actions('{"a": [{"r": "WebSearchAgent", "m": "Weather?"}], "c": [{"a": "no command"}', compact=True)
+
+        self.assertEqual(actions.ai_agent_actions[0].recipient, "WebSearchAgent")
+        self.assertEqual(actions.tools_actions, [])
+
+    def test_compact_tool_schema_is_smaller(self):
+        """Test that the compact tool definition is shorter than the full one."""
+        full = json.dumps(output_tool(Actions))
+        compact = json.dumps(output_tool(CompactActions))
+
+        self.assertEqual(make_model(compact=True).tool["function"]["name"], "return_compactactions")
+        self.assertLess(len(compact), len(full))
+
+    def test_compact_output_needs_fewer_tokens(self):
+        """Test that the compact schema cuts the output tokens of representative turns by over 40%."""
+        average_tokens = {
+            compact: sum(estimate_tokens(output_json(actions, compact)) for actions in SAMPLES) / len(SAMPLES)
+            for compact in [False, True]
+        }
+
+        self.assertLess(average_tokens[True], average_tokens[False] * 0.6)
+        self.assertEqual(compact_from(SAMPLES[0]).u[0].d, "kitchen")
+
+    @unittest.skipUnless(os.getenv("RUN_BENCHMARKS", "0") == "1", "Set RUN_BENCHMARKS=1 to run the benchmarks")
+    async def test_compact_schema_benchmark(self):
+        """Average output tokens and simulated generation time of both schemas on representative turns."""
+        tokens_per_second = 5000
+        results = {}
+        for compact in [False, True]:
+            tokens = [estimate_tokens(output_json(actions, compact)) for actions in SAMPLES]
+            model = FakeModel(script=SAMPLES, tokens_per_second=tokens_per_second, compact=compact)
+            start = time.perf_counter()
+            for _ in SAMPLES:
+                await model.generate("prompt")
+            results[compact] = (sum(tokens) / len(tokens), (time.perf_counter() - start) / len(SAMPLES))
+
+        for compact, (average_tokens, average_seconds) in results.items():
+            print(f"\n{'compact' if compact else 'full'} schema: {average_tokens:.1f} output tokens, "
+                  f"{average_seconds * 1000:.2f} ms per generation at {tokens_per_second} tokens/s")
+
+        self.assertLess(results[True][1], results[False][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
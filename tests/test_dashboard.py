@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import tempfile
+import unittest
+from unittest.mock import patch
+from assistant_conversation_backend import misc_functions
+from assistant_conversation_backend.home_assistant.client import HomeAssistantClient
+from assistant_conversation_backend.home_assistant.dashboard import DashboardRenderer, load_dashboard_spec, section_entities
+from assistant_conversation_backend.resilience import StaleWhileRevalidate, CircuitBreaker
+from .fake_home_assistant import FakeHomeAssistant, make_state, TOKEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+SPEC = {
+    "title": "Home",
+    "sections": [
+        {"title": "Climate", "lines": [
+            "- Living room: {sensor.living_temperature}°C",
+            "- Outside: {weather.home:temperature}°C, wind {weather.home:wind_speed|int} m/s",
+        ]},
+        {"title": "People", "lines": ["- {person.alex:friendly_name?Someone} is {person.alex?unknown}"]},
+        {"title": "Shopping List", "type": "shopping_list"},
+    ],
+}
+
+
+def state_dict(*states):
+    return {state["entity_id"]: state for state in states}
+
+
+class TestDashboardRenderer(unittest.TestCase):
+    def test_renders_the_spec(self):
+        """Test rendering every section of a spec to markdown."""
+        renderer = DashboardRenderer(SPEC)
+        states = state_dict(
+            make_state("sensor.living_temperature", "21.5"),
+            make_state("weather.home", "sunny", temperature=12, wind_speed="3.7"),
+        )
+
+        dashboard = renderer.render(states, [{"name": "milk", "complete": False}])
+
+        self.assertEqual(dashboard, (
+            "# Home\n\n"
+            "### Climate\n- Living room: 21.5°C\n- Outside: 12°C, wind 3 m/s\n\n"
+            "### People\n- Someone is unknown\n\n"
+            "### Shopping List\n**Items to buy:**\n- milk\n"
+        ))
+        self.assertEqual(renderer.last_render["bytes"], len(dashboard.encode("utf-8")))
+
+    def test_only_changed_sections_are_rendered_again(self):
+        """Test that only sections whose inputs changed are rendered again until the TTL passes."""
+        clock = FakeClock()
+        renderer = DashboardRenderer(SPEC, ttl=60, clock=clock)
+        states = state_dict(make_state("sensor.living_temperature", "21.5"), make_state("person.alex", "home"))
+        shopping = []
+
+        renderer.render(states, shopping)
+        self.assertEqual(renderer.last_render["rendered_sections"], 3)
+
+        # Same inputs, or an entity no section reads, changed
+        states["light.hall"] = make_state("light.hall", "on")
+        renderer.render(states, list(shopping))
+        self.assertEqual(renderer.last_render["rendered_sections"], 0)
+
+        states["person.alex"] = make_state("person.alex", "away")
+        self.assertIn("- Someone is away", renderer.render(states, shopping))
+        self.assertEqual(renderer.last_render["rendered_sections"], 1)
+
+        # Past the TTL everything is rendered again
+        clock.now = 61
+        renderer.render(states, shopping)
+        self.assertEqual(renderer.last_render["rendered_sections"], 3)
+
+    @unittest.skipUnless(os.getenv("RUN_BENCHMARKS", "0") == "1", "Set RUN_BENCHMARKS=1 to run the benchmarks")
+    def test_cached_render_benchmark(self):
+        """Test that a turn where nothing relevant changed costs a fraction of a full render."""
+        renderer = DashboardRenderer(load_dashboard_spec())
+        states = state_dict(*(make_state(f"sensor.noise_{i}", str(i)) for i in range(500)),
+                            make_state("weather.forecast_home", "rainy", temperature=8,
+                                       forecast=[{"datetime": f"day{i}", "condition": "rain"} for i in range(5)]))
+        shopping = [{"name": f"item {i}", "complete": i % 3 == 0} for i in range(20)]
+        rounds = 200
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            renderer.invalidate()
+            renderer.render(states, shopping)
+        full_seconds = (time.perf_counter() - start) / rounds
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            dashboard = renderer.render(states, shopping)
+        cached_seconds = (time.perf_counter() - start) / rounds
+
+        print(f"\nDashboard {len(dashboard.encode('utf-8'))} bytes: full render {full_seconds * 1e6:.0f} µs, "
+              f"cached {cached_seconds * 1e6:.0f} µs")
+        self.assertEqual(renderer.last_render["rendered_sections"], 0)
+        self.assertLess(cached_seconds, full_seconds)
+
+
+class TestDashboardSpec(unittest.TestCase):
+    def test_default_spec_loads(self):
+        """Test that the bundled spec loads and declares the entities its sections read."""
+        spec = load_dashboard_spec()
+        titles = [section["title"] for section in spec["sections"]]
+
+        self.assertIn("Shopping List", titles)
+        self.assertIn("Weather Forecast (Next Days)", titles)
+        forecast = next(section for section in spec["sections"] if section.get("type") == "forecast")
+        self.assertEqual(section_entities(forecast), ["weather.forecast_home"])
+
+    def test_unknown_formatter_is_rejected(self):
+        """Test that a spec using an unknown formatter is rejected on load."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "dashboard.json")
+            with open(path, "w") as f:
+                json.dump({"sections": [{"title": "Bad", "lines": ["{sensor.x|fahrenheit}"]}]}, f)
+
+            with self.assertRaisesRegex(ValueError, "fahrenheit"):
+                load_dashboard_spec(path)
+
+
+class TestDashboardSummary(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.home_assistant = await FakeHomeAssistant([make_state("person.samuel", "home", friendly_name="Samuel")]).start()
+        self.client = HomeAssistantClient(self.home_assistant.api_url, TOKEN)
+        # Open the connection up front; the test loop runs in debug mode, where connecting can exceed the deadline
+        await self.client.get_states()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.home_assistant.stop()
+
+    async def test_slow_home_assistant_serves_the_last_snapshot(self):
+        """Test that past the deadline the last dashboard snapshot is served with its age."""
+        dashboard_data = StaleWhileRevalidate(
+            "test_dashboard", misc_functions.fetch_dashboard_data, deadline_seconds=0.05, breaker=CircuitBreaker("test_home_assistant"),
+        )
+        with patch.object(misc_functions, "HOME_ASSISTANT", self.client), \
+                patch.object(misc_functions, "DASHBOARD_DATA", dashboard_data):
+            fresh = await misc_functions.get_dashboard_summary()
+            self.assertIn("Samuel is home", fresh)
+            self.assertNotIn("not responding", fresh)
+
+            self.home_assistant.delay = 0.2
+            await self.home_assistant.set_state("person.samuel", "away", friendly_name="Samuel")
+            start = time.perf_counter()
+            stale = await misc_functions.get_dashboard_summary()
+
+            self.assertLess(time.perf_counter() - start, 0.15)
+            self.assertTrue(stale.startswith("(Home Assistant is not responding; this data is 0 seconds old.)"))
+            self.assertIn("Samuel is home", stale)
+
+
+if __name__ == '__main__':
+    unittest.main()
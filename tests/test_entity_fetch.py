@@ -0,0 +1,93 @@
+import os
+import time
+import unittest
+from assistant_conversation_backend.home_assistant.client import HomeAssistantClient
+from assistant_conversation_backend.home_assistant.entity_fetch import EntityStateFetcher
+from .fake_home_assistant import FakeHomeAssistant, make_state, TOKEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def rest_calls(server):
+    return [r for r in server.requests if r[0] == "GET"]
+
+
+class TestEntityStateFetcher(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.home_assistant = await FakeHomeAssistant([
+            make_state(f"sensor.s{i}", str(i), friendly_name=f"Sensor {i}", unit_of_measurement="W") for i in range(400)
+        ]).start()
+        self.client = HomeAssistantClient(self.home_assistant.api_url, TOKEN, max_concurrency=4)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.home_assistant.stop()
+
+    async def test_small_requests_fetch_entities_concurrently(self):
+        """Test that a few entities are fetched with one concurrent request each, duplicates once."""
+        self.home_assistant.delay = 0.01
+        fetcher = EntityStateFetcher(self.client, crossover=10)
+
+        states = await fetcher.fetch(["sensor.s1", "sensor.missing", "sensor.s2", "sensor.s1"])
+
+        self.assertEqual([s.get("state") for s in states], ["1", None, "2", "1"])
+        self.assertEqual(states[1], {"message": "Entity not found."})
+        self.assertEqual(len(rest_calls(self.home_assistant)), 3)
+        self.assertEqual(self.home_assistant.peak_in_flight, 3)
+
+    async def test_large_requests_pull_all_states_once(self):
+        """Test that past the crossover a single /states request is made."""
+        fetcher = EntityStateFetcher(self.client, crossover=10)
+
+        states = await fetcher.fetch([f"sensor.s{i}" for i in range(50)])
+
+        self.assertEqual([s["state"] for s in states], [str(i) for i in range(50)])
+        self.assertEqual(rest_calls(self.home_assistant), [("GET", "/states")])
+
+    async def test_cache_expires_after_the_ttl(self):
+        """Test that cached states are served until the TTL passes."""
+        clock = FakeClock()
+        fetcher = EntityStateFetcher(self.client, crossover=10, ttl=2, clock=clock)
+
+        await fetcher.fetch(["sensor.s1"])
+        self.home_assistant.states["sensor.s1"] = make_state("sensor.s1", "changed")
+        self.assertEqual((await fetcher.fetch(["sensor.s1"]))[0]["state"], "1")
+
+        clock.now = 2.5
+        self.assertEqual((await fetcher.fetch(["sensor.s1"]))[0]["state"], "changed")
+        self.assertEqual(len(rest_calls(self.home_assistant)), 2)
+
+    @unittest.skipUnless(os.getenv("RUN_BENCHMARKS", "0") == "1", "Set RUN_BENCHMARKS=1 to run the benchmarks")
+    async def test_crossover_benchmark(self):
+        """Test where one /states pull starts beating concurrent per-entity requests."""
+        self.home_assistant.delay = 0.005
+        single = EntityStateFetcher(self.client, crossover=10 ** 6, ttl=0)
+        bulk = EntityStateFetcher(self.client, crossover=0, ttl=0)
+        crossover = None
+
+        print("\nentities  per-entity ms  /states ms")
+        for count in [1, 2, 4, 8, 16, 32, 64]:
+            entity_ids = [f"sensor.s{i}" for i in range(count)]
+            timings = []
+            for fetcher in (single, bulk):
+                start = time.perf_counter()
+                for _ in range(3):
+                    await fetcher.fetch(entity_ids)
+                timings.append((time.perf_counter() - start) / 3 * 1000)
+            print(f"{count:8d}  {timings[0]:13.1f}  {timings[1]:10.1f}")
+            if crossover is None and timings[1] < timings[0]:
+                crossover = count
+
+        print(f"/states is faster from {crossover} entities")
+        # With four requests in flight, 64 entities take 16 round trips against a single pull
+        self.assertLess(timings[1], timings[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import time
+import unittest
+from assistant_conversation_backend.models.fake import FakeModel, FakeModelError
+from assistant_conversation_backend.models.registry import build_model
+
+PROMPT = """Base prompt
+Conversation latest 30 messages:
+10:00:00 SYSTEM [kitchen]:  Device Kitchen speaker connected.
+10:00:05 Sam [kitchen]:  What's for dinner?"""
+
+
+class TestFakeModel(unittest.IsolatedAsyncioTestCase):
+    async def test_default_rule_replies_to_the_last_user_message(self):
+        """Test that without a script the model echoes the last user message back to its device."""
+        actions = await FakeModel().generate(PROMPT)
+
+        [reply] = actions.user_actions
+        self.assertEqual((reply.recipient, reply.device, reply.message), ("Sam", "kitchen", "You said: What's for dinner?"))
+        self.assertEqual(actions._usage.input_tokens, len(PROMPT) // 4)
+
+    async def test_system_and_agent_turns_get_no_reply(self):
+        """Test that SYSTEM and agent messages are not answered."""
+        system_turn = PROMPT + "\n10:00:06 SYSTEM [SYSTEM]:  Tool executed"
+        agent_turn = PROMPT + "\n10:00:06 WebSearchAgent: @Keeva It will rain"
+
+        for prompt in [system_turn, agent_turn]:
+            with self.subTest(prompt=prompt.splitlines()[-1]):
+                actions = await FakeModel().generate(prompt)
+                self.assertEqual((actions.user_actions, actions.ai_agent_actions), ([], []))
+
+    async def test_script_is_cycled_and_can_inject_errors(self):
+        """Test that scripted responses repeat in order and error entries raise."""
+        model = FakeModel(script=[
+            {"user_actions": [{"message": "first", "recipient": "Sam"}]},
+            {"error": "rate limited"},
+        ])
+
+        self.assertEqual((await model.generate("p")).user_actions[0].message, "first")
+        with self.assertRaisesRegex(FakeModelError, "rate limited"):
+            await model.generate("p")
+        self.assertEqual((await model.generate("p")).user_actions[0].message, "first")
+
+    async def test_error_injection_is_reproducible_with_a_seed(self):
+        """Test that the same seed injects errors on the same calls."""
+        async def outcomes(seed):
+            model = FakeModel(error_rate=0.5, seed=seed)
+            results = []
+            for _ in range(20):
+                try:
+                    await model.generate(PROMPT)
+                    results.append(True)
+                except FakeModelError:
+                    results.append(False)
+            return results
+
+        first = await outcomes(seed=7)
+        self.assertEqual(first, await outcomes(seed=7))
+        self.assertTrue(0 < first.count(False) < 20)
+
+    async def test_latency_includes_token_throughput(self):
+        """Test that a response takes the base latency plus its output tokens at tokens_per_second."""
+        model = FakeModel(latency_seconds=0.02, tokens_per_second=1000)
+        start = time.monotonic()
+        actions = await model.generate(PROMPT)
+        elapsed = time.monotonic() - start
+
+        self.assertGreaterEqual(elapsed, 0.02 + actions._usage.output_tokens / 1000)
+
+    def test_fake_model_is_selectable_by_name(self):
+        """Test that LLM_MODEL can select the fake model."""
+        self.assertIsInstance(build_model("FakeModel"), FakeModel)
+        with self.assertRaises(ValueError):
+            build_model("NoSuchModel")
+
+
+if __name__ == '__main__':
+    unittest.main()
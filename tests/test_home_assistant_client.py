@@ -0,0 +1,95 @@
+import asyncio
+import httpx
+import unittest
+from unittest.mock import patch
+from assistant_conversation_backend.home_assistant.client import HomeAssistantClient, HomeAssistantError
+from .fake_home_assistant import FakeHomeAssistant, make_state, TOKEN
+
+
+class TestHomeAssistantClient(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.home_assistant = await FakeHomeAssistant([make_state("light.kitchen", "off")]).start()
+        self.client = HomeAssistantClient(self.home_assistant.api_url, TOKEN, max_concurrency=2)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.home_assistant.stop()
+
+    async def test_state_round_trip(self):
+        """Test reading all states, setting one and reading it back."""
+        self.assertEqual([s["entity_id"] for s in await self.client.get_states()], ["light.kitchen"])
+
+        await self.client.set_state("light.kitchen", "on", {"brightness": 200})
+        state = await self.client.get_state("light.kitchen")
+
+        self.assertEqual(state["state"], "on")
+        self.assertEqual(state["attributes"], {"brightness": 200})
+
+    async def test_conversation(self):
+        """Test sending a request to the conversation API."""
+        self.home_assistant.conversation_reply = "Turned on the kitchen light"
+
+        data = await self.client.process_conversation("turn on the kitchen light", agent_id="agent")
+
+        self.assertEqual(data["response"]["speech"]["plain"]["speech"], "Turned on the kitchen light")
+
+    async def test_errors_are_raised_as_home_assistant_error(self):
+        """Test that error statuses, connection failures and unreadable bodies raise HomeAssistantError."""
+        with self.assertRaises(HomeAssistantError) as missing:
+            await self.client.get_state("light.missing")
+        self.assertEqual(missing.exception.status, 404)
+        self.assertIn("Entity not found", str(missing.exception))
+
+        unauthorized = HomeAssistantClient(self.home_assistant.api_url, "wrong")
+        with self.assertRaises(HomeAssistantError) as denied:
+            await unauthorized.get_states()
+        self.assertEqual(denied.exception.status, 401)
+        await unauthorized.close()
+
+        unreachable = HomeAssistantClient("http://127.0.0.1:1/api")
+        with self.assertRaises(HomeAssistantError) as down:
+            await unreachable.get_states()
+        self.assertIsNone(down.exception.status)
+        await unreachable.close()
+
+        # A reverse proxy answering in front of Home Assistant
+        proxied = HomeAssistantClient("http://ha/api", TOKEN, http_client=httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, text="<html>Bad gateway</html>"))))
+        with self.assertRaises(HomeAssistantError) as unreadable:
+            await proxied.get_states()
+        self.assertEqual(unreadable.exception.status, 200)
+        await proxied.close()
+
+    async def test_concurrency_is_capped_and_connections_are_reused(self):
+        """Test that at most max_concurrency requests are in flight over reused connections."""
+        self.home_assistant.delay = 0.02
+
+        await asyncio.gather(*(self.client.get_state("light.kitchen") for _ in range(6)))
+
+        self.assertEqual(self.home_assistant.peak_in_flight, 2)
+        # Six requests over a pool capped at two concurrent calls need at most two connections
+        pool = self.client.http_client._transport._pool
+        self.assertLessEqual(len(pool.connections), 2)
+
+    async def test_agent_uses_the_shared_client(self):
+        """Test that the Home Assistant agent and its tools go through the shared client."""
+        from assistant_conversation_backend.agents import home_assistant_agent
+        from assistant_conversation_backend.state import MAIN_AI_QUEUE
+
+        with patch.object(home_assistant_agent, "HOME_ASSISTANT", self.client), \
+                patch.object(home_assistant_agent.ENTITY_FETCHER, "client", self.client), \
+                patch.object(home_assistant_agent, "RESOLVER", None):
+            await home_assistant_agent.HomeAssistantAgent().ask("turn on the kitchen light", "alice")
+            reply = MAIN_AI_QUEUE.get_nowait()
+
+            self.assertTrue(reply.message.startswith("Done"))
+            self.assertEqual(reply.to_user, "alice")
+            self.assertEqual(await home_assistant_agent.get_entity_states(["light.kitchen", "light.missing"]), [
+                make_state("light.kitchen", "off"),
+                {"message": "Entity not found."},
+            ])
+            self.assertTrue(await home_assistant_agent.set_entity_state("light.kitchen", "on"))
+
+
+if __name__ == '__main__':
+    unittest.main()
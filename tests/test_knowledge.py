@@ -0,0 +1,103 @@
+import unittest
+import numpy as np
+from assistant_conversation_backend.embeddings import HashingEmbedder, make_embedder, words
+from assistant_conversation_backend.knowledge import KnowledgeBase, format_age
+
+
+class MemoryKnowledgeStore:
+    """Stands in for the articles tables, scoring candidates the way the SQL query does."""
+
+    def __init__(self):
+        self.articles = []
+        self.age = 0.0
+
+    async def candidates(self, question, embedding, embedding_model, limit):
+        lexemes = set(words(question))
+        rows = []
+        for article in self.articles:
+            if article["model"] != embedding_model:
+                continue
+            text = set(words(f"{article['title']} {article['content']}"))
+            similarity = max(float(np.dot(embedding, article["question_embedding"])), float(np.dot(embedding, article["embedding"])))
+            rows.append({
+                "article_id": article["id"], "title": article["title"], "content": article["content"],
+                "age_seconds": self.age, "similarity": similarity,
+                "coverage": len(lexemes & text) / max(len(lexemes), 1),
+            })
+        return sorted(rows, key=lambda row: -row["similarity"])[:limit]
+
+    async def add(self, question, question_embedding, title, content, content_embedding, embedding_model):
+        self.articles.append({"id": len(self.articles) + 1, "title": title, "content": content, "model": embedding_model,
+                              "question_embedding": question_embedding, "embedding": content_embedding})
+        return len(self.articles)
+
+
+class TestEmbeddings(unittest.IsolatedAsyncioTestCase):
+    async def test_hashing_embedder_is_deterministic_and_normalized(self):
+        """Test that equal wording gives equal unit vectors and unrelated text is far apart."""
+        embedder = HashingEmbedder()
+        first, second, other = await embedder.embed(["Weather in Stockholm", "weather in stockholm?", "Who wrote Dune"])
+
+        self.assertEqual(len(first), 1536)
+        self.assertEqual(first, second)
+        self.assertAlmostEqual(np.linalg.norm(first), 1.0)
+        self.assertLess(abs(np.dot(first, other)), 0.2)
+        with self.assertRaisesRegex(ValueError, "unknown"):
+            make_embedder("unknown")
+
+
+class TestKnowledgeBase(unittest.IsolatedAsyncioTestCase):
+    async def test_rephrased_question_is_answered_locally(self):
+        """Test that a rephrased question finds the stored article and a different one doesn't."""
+        store = MemoryKnowledgeStore()
+        knowledge = KnowledgeBase(store, HashingEmbedder())
+        await knowledge.remember("Who wrote the novel Dune?", "Dune was written by Frank Herbert and published in 1965.")
+
+        hit = await knowledge.lookup("who wrote novel Dune in 1965")
+
+        self.assertIsNotNone(hit)
+        self.assertEqual(hit.article_id, 1)
+        self.assertIn("Frank Herbert", hit.content)
+        self.assertIsNone(await knowledge.lookup("who wrote the novel Emma?"))
+
+    async def test_other_city_does_not_match(self):
+        """Test that a question differing in a single key word doesn't match."""
+        store = MemoryKnowledgeStore()
+        knowledge = KnowledgeBase(store, HashingEmbedder())
+        await knowledge.remember("weather in Stockholm today", "Cloudy, 12°C in Stockholm.")
+
+        self.assertIsNotNone(await knowledge.lookup("What's the weather in Stockholm today?"))
+        self.assertIsNone(await knowledge.lookup("What's the weather in Oslo today?"))
+
+    async def test_freshness_depends_on_the_topic(self):
+        """Test that articles older than their topic's maximum age are not served."""
+        store = MemoryKnowledgeStore()
+        knowledge = KnowledgeBase(store, HashingEmbedder(), max_age={"weather": 3600, "general": 30 * 86400})
+        await knowledge.remember("weather in Stockholm today", "Cloudy, 12°C in Stockholm.")
+        await knowledge.remember("who wrote the novel Dune", "Frank Herbert.")
+
+        store.age = 2 * 3600
+        self.assertIsNone(await knowledge.lookup("weather in Stockholm today"))
+        self.assertIsNotNone(await knowledge.lookup("who wrote the novel Dune"))
+
+    async def test_other_embedders_vectors_are_ignored(self):
+        """Test that vectors stored by a different embedder are not compared."""
+        store = MemoryKnowledgeStore()
+        await KnowledgeBase(store, HashingEmbedder()).remember("who wrote Dune", "Frank Herbert.")
+
+        class OtherEmbedder(HashingEmbedder):
+            name = "other"
+
+        self.assertIsNone(await KnowledgeBase(store, OtherEmbedder()).lookup("who wrote Dune"))
+
+
+class TestFormatAge(unittest.TestCase):
+    def test_format_age(self):
+        """Test describing an article's age in words."""
+        self.assertEqual(format_age(30), "less than a minute")
+        self.assertEqual(format_age(3 * 3600 + 5), "3 hours")
+        self.assertEqual(format_age(86400), "1 day")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import asyncio
+import unittest
+from assistant_conversation_backend.limits import ProviderLimiter, TokenBucket, QueueTimeout, USER_FACING, BACKGROUND
+from assistant_conversation_backend.resilience import CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_token_bucket(self):
+        """Test the wait for tokens as the bucket refills, and for requests larger than the bucket."""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, capacity=20, clock=clock)
+
+        self.assertEqual(bucket.delay(20), 0)
+        bucket.take(20)
+        self.assertAlmostEqual(bucket.delay(5), 0.5)
+        clock.now = 0.5
+        self.assertEqual(bucket.delay(5), 0)
+        # Larger than the bucket: wait for a full one instead of forever
+        self.assertAlmostEqual(bucket.delay(1000), 1.5)
+
+
+class TestProviderLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrency_cap(self):
+        """Test that no more than `concurrency` calls run at once."""
+        limiter = ProviderLimiter("test", concurrency=2)
+        running, peak = 0, 0
+
+        async def call():
+            nonlocal running, peak
+            async with limiter.acquire():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(call() for _ in range(6)))
+
+        self.assertEqual(peak, 2)
+        self.assertEqual(limiter.stats()["admitted"], 6)
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_user_facing_calls_jump_the_queue(self):
+        """Test that a waiting user-facing call is admitted before queued background calls."""
+        limiter = ProviderLimiter("test", concurrency=1)
+        order = []
+
+        async def call(name, priority):
+            async with limiter.acquire(priority=priority):
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        first = asyncio.create_task(call("first", BACKGROUND))
+        await asyncio.sleep(0.001)
+        background = [asyncio.create_task(call(f"background{i}", BACKGROUND)) for i in range(2)]
+        await asyncio.sleep(0.001)
+        user = asyncio.create_task(call("user", USER_FACING))
+        await asyncio.sleep(0.001)
+
+        self.assertEqual(limiter.stats()["queued"], {"user": 1, "background": 2})
+        await asyncio.gather(first, user, *background)
+
+        self.assertEqual(order, ["first", "user", "background0", "background1"])
+
+    async def test_waiting_past_the_deadline_raises(self):
+        """Test that a call queued longer than deadline_seconds raises QueueTimeout."""
+        limiter = ProviderLimiter("test", concurrency=1, deadline_seconds=0.02)
+
+        async with limiter.acquire():
+            with self.assertRaises(QueueTimeout):
+                async with limiter.acquire():
+                    pass
+
+        self.assertEqual(limiter.stats()["timeouts"], 1)
+        self.assertEqual(limiter.queued(), 0)
+
+    async def test_request_rate_limit(self):
+        """Test that requests beyond the burst are spaced out to requests_per_minute."""
+        limiter = ProviderLimiter("test", concurrency=10, requests_per_minute=600)
+
+        # The burst is one second's worth of requests
+        for _ in range(10):
+            async with limiter.acquire():
+                pass
+        start = asyncio.get_running_loop().time()
+        async with limiter.acquire():
+            pass
+
+        # Then 600 requests per minute leaves 0.1s between requests
+        self.assertGreaterEqual(asyncio.get_running_loop().time() - start, 0.08)
+
+    async def test_queue_timeout_does_not_trip_the_circuit(self):
+        """Test that a local queue timeout isn't counted as a provider failure."""
+        breaker = CircuitBreaker("limited", failure_threshold=1)
+
+        async def rejected():
+            raise QueueTimeout("limited", 1.0)
+
+        with self.assertRaises(QueueTimeout):
+            await breaker.call(rejected)
+
+        self.assertFalse(breaker.is_open())
+        self.assertEqual(breaker.consecutive_failures, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
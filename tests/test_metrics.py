@@ -0,0 +1,72 @@
+import unittest
+from assistant_conversation_backend.metrics import Registry, REGISTRY, LLM_REQUESTS_TOTAL, LLM_TOKENS_TOTAL, LLM_LATENCY_SECONDS
+from assistant_conversation_backend.models.base_model import BaseAIModel, Actions, TokenUsage
+
+
+class UsageModel(BaseAIModel):
+    async def _generate(self, prompt_text) -> Actions:
+        actions = Actions(user_actions=[], ai_agent_actions=[], tools_actions=[])
+        actions._usage = TokenUsage(input_tokens=120, output_tokens=30)
+        return actions
+
+
+class BrokenModel(BaseAIModel):
+    async def _generate(self, prompt_text) -> Actions:
+        raise RuntimeError("provider down")
+
+
+class TestRegistry(unittest.TestCase):
+    def test_render_prometheus_text_format(self):
+        """Test rendering counters, gauges and histograms in the Prometheus text format."""
+        registry = Registry()
+        requests = registry.counter("test_requests_total", "Requests.", ["route"])
+        registry.gauge("test_depth", "Depth.", callback=lambda: 3)
+        latency = registry.histogram("test_latency_seconds", "Latency.", buckets=(0.1, 1.0))
+
+        requests.inc(route="/event")
+        requests.inc(2, route="/event")
+        latency.observe(0.05)
+        latency.observe(0.5)
+        latency.observe(5)
+
+        text = registry.render()
+
+        self.assertIn("# TYPE test_requests_total counter", text)
+        self.assertIn('test_requests_total{route="/event"} 3', text)
+        self.assertIn("test_depth 3", text)
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('test_latency_seconds_bucket{le="1"} 2', text)
+        self.assertIn('test_latency_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn("test_latency_seconds_count 3", text)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_label_values_are_escaped_and_validated(self):
+        """Test that label values are escaped and unknown labels or duplicate names are rejected."""
+        registry = Registry()
+        counter = registry.counter("test_escape_total", "Escape.", ["query"])
+        counter.inc(query='say "hi"\n')
+
+        self.assertIn('test_escape_total{query="say \\"hi\\"\\n"} 1', registry.render())
+        with self.assertRaises(ValueError):
+            counter.inc(wrong="label")
+        with self.assertRaises(ValueError):
+            registry.counter("test_escape_total", "Duplicate.")
+
+
+class TestModelMetrics(unittest.IsolatedAsyncioTestCase):
+    async def test_generate_records_llm_metrics_per_model_class(self):
+        """Test that every generation records its outcome, tokens and latency by model."""
+        await UsageModel().generate("prompt")
+        with self.assertRaises(RuntimeError):
+            await BrokenModel().generate("prompt")
+
+        self.assertEqual(LLM_REQUESTS_TOTAL.value(model="UsageModel", outcome="success"), 1)
+        self.assertEqual(LLM_REQUESTS_TOTAL.value(model="BrokenModel", outcome="error"), 1)
+        self.assertEqual(LLM_TOKENS_TOTAL.value(model="UsageModel", kind="input"), 120)
+        self.assertEqual(LLM_TOKENS_TOTAL.value(model="UsageModel", kind="output"), 30)
+        self.assertEqual(LLM_LATENCY_SECONDS.count(model="BrokenModel"), 1)
+        self.assertIn('assistant_llm_tokens_total{model="UsageModel",kind="input"} 120', REGISTRY.render())
+
+
+if __name__ == '__main__':
+    unittest.main()
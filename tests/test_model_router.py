@@ -0,0 +1,135 @@
+import asyncio
+import unittest
+from assistant_conversation_backend.models.base_model import BaseAIModel, Actions, UserAction
+from assistant_conversation_backend.models.router import ModelRouter
+from assistant_conversation_backend.resilience import breaker_for, CircuitOpenError
+
+
+class FakeBackend(BaseAIModel):
+    """Local backend with a fixed latency that can be told to fail."""
+
+    def __init__(self, name: str, latency: float, fail: bool = False):
+        self._name = name
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    async def _generate(self, prompt_text) -> Actions:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise RuntimeError(f"{self._name} failed")
+        return Actions(
+            user_actions=[UserAction(message=self._name, recipient="Sam")],
+            ai_agent_actions=[],
+            tools_actions=[],
+        )
+
+
+def winner(actions: Actions) -> str:
+    return actions.user_actions[0].message
+
+
+class TestModelRouter(unittest.IsolatedAsyncioTestCase):
+    async def test_prefers_fastest_backend_after_measuring_all(self):
+        """Test that every backend is measured once, then the fastest one is used."""
+        slow = FakeBackend("RouterSlow", latency=0.03)
+        fast = FakeBackend("RouterFast", latency=0.001)
+        router = ModelRouter([slow, fast])
+
+        # Unmeasured backends rank first, so both get sampled
+        await router._generate("prompt")
+        await router._generate("prompt")
+        results = [winner(await router._generate("prompt")) for _ in range(5)]
+
+        self.assertEqual(results, ["RouterFast"] * 5)
+        self.assertEqual(slow.calls, 1)
+
+    async def test_fails_over_and_skips_unhealthy_backends(self):
+        """Test failing over to the next backend and excluding one over the error rate."""
+        broken = FakeBackend("RouterBroken", latency=0, fail=True)
+        healthy = FakeBackend("RouterHealthy", latency=0.01)
+        router = ModelRouter([broken, healthy], max_error_rate=0.4)
+
+        self.assertEqual(winner(await router._generate("prompt")), "RouterHealthy")
+        self.assertEqual(router.stats["RouterBroken"].error_rate, 1.0)
+
+        # The broken backend is now excluded by its error rate
+        await router._generate("prompt")
+        self.assertEqual(broken.calls, 1)
+
+    async def test_raises_circuit_open_when_no_backend_is_available(self):
+        """Test that the router raises CircuitOpenError once every breaker is open."""
+        down = FakeBackend("RouterDown", latency=0, fail=True)
+        breaker = breaker_for("RouterDown")
+        breaker.failure_threshold = 1
+        router = ModelRouter([down])
+
+        with self.assertRaises(RuntimeError):
+            await router._generate("prompt")
+        with self.assertRaises(CircuitOpenError):
+            await router._generate("prompt")
+
+
+class TestHedging(unittest.IsolatedAsyncioTestCase):
+    async def test_takes_whichever_backend_finishes_first(self):
+        """Test that a stalled primary is hedged, and cancelled once the runner-up answers."""
+        stalled = FakeBackend("HedgeStalled", latency=0.5)
+        backup = FakeBackend("HedgeBackup", latency=0.01)
+        router = ModelRouter([stalled, backup], hedge=True, hedge_after_seconds=0.02)
+
+        actions = await router._hedged(stalled, backup, "prompt")
+
+        self.assertEqual(winner(actions), "HedgeBackup")
+        await asyncio.sleep(0)
+        self.assertEqual(stalled.cancelled, 1)
+
+    async def test_a_cancelled_primary_is_ranked_by_its_elapsed_time(self):
+        """Test that a primary losing the hedge records its elapsed time, so it stops ranking first."""
+        slow = FakeBackend("HedgeSlowPrimary", latency=0.5)
+        fast = FakeBackend("HedgeFastRunnerUp", latency=0.02)
+        router = ModelRouter([slow, fast], hedge=True, hedge_after_seconds=0.03)
+        # A few quick answers earlier made the slow backend look fastest
+        for _ in range(2):
+            router.stats["HedgeSlowPrimary"].record(0.001, ok=True)
+        router.stats["HedgeFastRunnerUp"].record(0.02, ok=True)
+
+        for _ in range(3):
+            self.assertEqual(winner(await router._hedged(slow, fast, "prompt")), "HedgeFastRunnerUp")
+
+        # At least the hedge delay plus the runner-up's time
+        self.assertGreaterEqual(min(list(router.stats["HedgeSlowPrimary"].latencies)[2:]), 0.05)
+        self.assertEqual(router.rank()[0], fast)
+
+    async def test_fails_over_when_the_primary_fails_early(self):
+        """Test that a primary failing before the hedge deadline falls through to the runner-up."""
+        failing = FakeBackend("HedgeFailing", latency=0, fail=True)
+        healthy = FakeBackend("HedgeHealthy", latency=0.01)
+        router = ModelRouter([failing, healthy], hedge=True, hedge_after_seconds=1)
+
+        self.assertEqual(winner(await router._generate("prompt")), "HedgeHealthy")
+        self.assertEqual((failing.calls, healthy.calls), (1, 1))
+
+    def test_deadline_follows_primary_p95(self):
+        """Test that the hedge deadline is the default until enough samples give a p95."""
+        primary = FakeBackend("HedgeP95", latency=0)
+        router = ModelRouter([primary], hedge=True, hedge_after_seconds=9)
+        self.assertEqual(router.hedge_deadline(primary), 9)
+
+        for latency in [0.1, 0.1, 0.2, 0.2, 0.3, 0.3, 0.4, 0.4, 0.5, 1.0]:
+            router.stats["HedgeP95"].record(latency, ok=True)
+
+        self.assertEqual(router.hedge_deadline(primary), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
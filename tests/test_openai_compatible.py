@@ -0,0 +1,113 @@
+import json
+import httpx
+import unittest
+from assistant_conversation_backend.models.openai_compatible import OpenAICompatibleModel
+from assistant_conversation_backend.models.repair import LLM_RETRIES_AVOIDED_TOTAL
+
+
+def chat_completion(arguments: str) -> dict:
+    return {
+        "id": "chatcmpl-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "test-model",
+        "choices": [{
+            "index": 0,
+            "finish_reason": "tool_calls",
+            "message": {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{
+                    "id": "call_1",
+                    "type": "function",
+                    "function": {"name": "return_actions", "arguments": arguments},
+                }],
+            },
+        }],
+        "usage": {
+            "prompt_tokens": 900,
+            "completion_tokens": 40,
+            "total_tokens": 940,
+            "prompt_tokens_details": {"cached_tokens": 768},
+        },
+    }
+
+
+def make_model(arguments, requests: list) -> OpenAICompatibleModel:
+    """arguments is either one tool call reused for every request or a list consumed in order."""
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path.endswith("/models"):
+            return httpx.Response(200, json={"object": "list", "data": []})
+        return httpx.Response(200, json=chat_completion(arguments if isinstance(arguments, str) else arguments.pop(0)))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return OpenAICompatibleModel("test-model", base_url="http://llm.test/v1", api_key="test", http_client=client)
+
+
+class TestOpenAICompatibleModel(unittest.IsolatedAsyncioTestCase):
+    async def test_generate_reuses_client_and_tool_schema(self):
+        """Test that the client and tool schema are built once and the usage is reported."""
+        arguments = json.dumps({
+            "user_actions": [{"message": "Hi Sam", "recipient": "Sam", "device": "kitchen"}],
+            "ai_agent_actions": [],
+            "tools_actions": [],
+        })
+        requests = []
+        model = make_model(arguments, requests)
+        client, tool = model.client, model.tool
+
+        await model.warm_up()
+        first = await model._generate("prompt with {braces}")
+        await model._generate("another prompt")
+
+        self.assertIs(model.client, client)
+        self.assertIs(model.tool, tool)
+        self.assertEqual(first.user_actions[0].device, "kitchen")
+        self.assertEqual((first._usage.input_tokens, first._usage.output_tokens), (900, 40))
+        self.assertEqual(first._usage.cached_tokens, 768)
+
+        body = json.loads(requests[1].content)
+        self.assertEqual(body["messages"], [{"role": "user", "content": "prompt with {braces}"}])
+        self.assertEqual(body["tool_choice"]["function"]["name"], "return_actions")
+
+    async def test_invalid_tool_arguments_raise_parse_error(self):
+        """Test that arguments not matching the schema raise the parse error."""
+        model = make_model('{"user_actions": "not a list"}', [])
+
+        with self.assertRaisesRegex(ValueError, "Failed to parse the LLM output into the tool schema"):
+            await model._generate("prompt")
+
+
+class TestOutputRepair(unittest.IsolatedAsyncioTestCase):
+    async def test_truncated_output_is_repaired_without_another_request(self):
+        """Test that cut-off JSON is closed locally instead of retried."""
+        requests = []
+        model = make_model('{"user_actions": [{"message": "Hi Sam", "recipient": "Sam", "device": "kit', requests)
+        avoided = LLM_RETRIES_AVOIDED_TOTAL.value(model=model.name)
+
+        actions = await model._generate("prompt")
+
+        self.assertEqual(actions.user_actions[0].device, "kit")
+        self.assertEqual((actions.ai_agent_actions, actions.tools_actions), ([], []))
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(LLM_RETRIES_AVOIDED_TOTAL.value(model=model.name), avoided + 1)
+
+    async def test_unrepairable_output_gets_a_short_continuation(self):
+        """Test that output that can't be fixed locally is corrected without resending the prompt."""
+        corrected = json.dumps({"user_actions": [{"message": "Hi", "recipient": "Sam"}], "ai_agent_actions": [], "tools_actions": []})
+        requests = []
+        model = make_model(['{"user_actions": [{"text": "Hi"}]}', corrected], requests)
+
+        actions = await model._generate("a very long prompt " * 100)
+
+        self.assertEqual(actions.user_actions[0].recipient, "Sam")
+        continuation = json.loads(requests[1].content)
+        self.assertNotIn("a very long prompt", continuation["messages"][0]["content"])
+        self.assertGreater(continuation["max_tokens"], 0)
+        # Usage of both requests is reported
+        self.assertEqual(actions._usage.input_tokens, 1800)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import json
+import httpx
+import unittest
+from assistant_conversation_backend.models.base_model import TurnPrompt
+from assistant_conversation_backend.models.openai_responses import OpenAIResponses
+
+ARGUMENTS = json.dumps({"user_actions": [], "ai_agent_actions": [], "tools_actions": []})
+STABLE = "Base prompt and tool docs\n" * 50
+
+
+def response(number: int, input_tokens: int) -> dict:
+    return {
+        "id": f"resp_{number}",
+        "object": "response",
+        "created_at": 0,
+        "model": "test-model",
+        "status": "completed",
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "output": [{
+            "type": "function_call",
+            "id": f"fc_{number}",
+            "call_id": f"call_{number}",
+            "name": "return_actions",
+            "arguments": ARGUMENTS,
+            "status": "completed",
+        }],
+        "usage": {
+            "input_tokens": input_tokens,
+            "output_tokens": 10,
+            "total_tokens": input_tokens + 10,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens_details": {"reasoning_tokens": 0},
+        },
+    }
+
+
+def make_model(bodies: list, fail_chained: bool = False, refresh_turns: int = 10) -> OpenAIResponses:
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        bodies.append(body)
+        if fail_chained and body.get("previous_response_id"):
+            return httpx.Response(404, json={"error": {"message": "Previous response not found", "type": "invalid_request_error"}})
+        text = body["input"][-1]["content"]
+        return httpx.Response(200, json=response(len(bodies), len(text) // 4))
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return OpenAIResponses("test-model", base_url="http://llm.test/v1", api_key="test", http_client=client,
+                           refresh_turns=refresh_turns)
+
+
+def prompt(history, time="10:00"):
+    return TurnPrompt(STABLE, ["Connected devices are: kitchen", f"Current date and time: {time}"], history)
+
+
+class TestOpenAIResponses(unittest.IsolatedAsyncioTestCase):
+    async def test_later_turns_send_only_the_delta(self):
+        """Test that a chained turn sends the tool output and the new messages, not the whole prompt."""
+        bodies = []
+        model = make_model(bodies)
+
+        first = await model._generate(prompt(["10:00:00 Sam [kitchen]: Hi"]))
+        second = await model._generate(prompt(["10:00:00 Sam [kitchen]: Hi", "10:01:00 Sam [kitchen]: Lights off"], time="10:01"))
+
+        self.assertIsNone(bodies[0].get("previous_response_id"))
+        self.assertEqual(bodies[1]["previous_response_id"], "resp_1")
+        call_output, message = bodies[1]["input"]
+        self.assertEqual(call_output, {"type": "function_call_output", "call_id": "call_1", "output": "ok"})
+        self.assertEqual(message["content"], "Updated state:\nCurrent date and time: 10:01\nNew messages:\n10:01:00 Sam [kitchen]: Lights off")
+        self.assertLess(second._usage.input_tokens, first._usage.input_tokens / 10)
+
+    async def test_full_prompt_when_the_stable_context_changes_or_refresh_is_due(self):
+        """Test that a new chain starts after refresh_turns deltas or when the stable prompt changes."""
+        bodies = []
+        model = make_model(bodies, refresh_turns=1)
+        history = ["10:00:00 Sam [kitchen]: Hi"]
+
+        await model._generate(prompt(history))
+        await model._generate(prompt(history + ["a"]))
+        await model._generate(prompt(history + ["a", "b"]))
+        await model._generate(TurnPrompt("Other base prompt\n", [], history + ["a", "b", "c"]))
+
+        self.assertEqual([bool(body.get("previous_response_id")) for body in bodies], [False, True, False, False])
+
+    async def test_failed_chain_falls_back_to_the_full_prompt(self):
+        """Test that an expired chain is retried with the full prompt and starts a new chain."""
+        bodies = []
+        model = make_model(bodies, fail_chained=True)
+        history = ["10:00:00 Sam [kitchen]: Hi"]
+
+        await model._generate(prompt(history))
+        await model._generate(prompt(history + ["10:01:00 Sam [kitchen]: Still there?"]))
+
+        self.assertIsNone(bodies[-1].get("previous_response_id"))
+        self.assertEqual(bodies[-1]["input"][-1]["content"], str(prompt(history + ["10:01:00 Sam [kitchen]: Still there?"])))
+        self.assertEqual(model.session.previous_response_id, f"resp_{len(bodies)}")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import unittest
+from unittest.mock import patch
+from assistant_conversation_backend.models.base_model import TokenUsage
+from assistant_conversation_backend.models.groq_thinker import GroqThinker
+from assistant_conversation_backend.models.repair import (
+    repair_tagged, repair_json_actions, close_json, REPAIR_MAX_TOKENS, LLM_REPAIRS_TOTAL, LLM_RETRIES_AVOIDED_TOTAL,
+)
+
+
+class TestRepairTagged(unittest.TestCase):
+    def test_unterminated_tag_is_closed(self):
+        """Test that a truncated closing tag is completed."""
+        actions = repair_tagged("<chat><user_message user=Sam device=kitchen>Dinner is ready</user_mess")
+
+        self.assertEqual(actions.user_actions[0].message, "Dinner is ready")
+
+    def test_unterminated_tag_ends_where_the_next_element_starts(self):
+        """Test that an element missing its closing tag ends at the next element."""
+        actions = repair_tagged(
+            "<chat><user_message user=Sam device=kitchen>Dinner is ready"
+            "<agent_message agent=WebSearchAgent>Find a recipe</agent_message></chat>"
+        )
+
+        self.assertEqual(actions.user_actions[0].message, "Dinner is ready")
+        self.assertEqual(actions.ai_agent_actions[0].message, "Find a recipe")
+
+    def test_lenient_attributes(self):
+        """Test that misnamed and unbalanced attributes are still read."""
+        actions = repair_tagged('<user_message to="Sam room: kitchen>Hi</user_message>')
+
+        self.assertEqual((actions.user_actions[0].recipient, actions.user_actions[0].device), ("Sam", "kitchen"))
+
+    def test_valid_actions_are_salvaged_from_malformed_ones(self):
+        """Test that malformed elements are dropped and the valid ones kept."""
+        actions = repair_tagged(
+            "<user_message user=Sam>No device</user_message>"
+            "<tool_command command=/timer arguments=10m>Start a timer</tool_command>"
+        )
+
+        self.assertEqual(actions.user_actions, [])
+        self.assertEqual(actions.tools_actions[0].arguments, "10m")
+
+    def test_nothing_salvageable_raises(self):
+        """Test that output without a single valid element raises."""
+        with self.assertRaisesRegex(ValueError, "missing user or device"):
+            repair_tagged("<user_message user=Sam>No device</user_message>")
+
+    def test_prose_or_an_empty_chat_raises(self):
+        """Test that output with no actions at all is not treated as repaired."""
+        for response in ["Sure, I'll turn the lights on.", "<chat></chat>", ""]:
+            with self.subTest(response=response):
+                with self.assertRaisesRegex(ValueError, "No actions found"):
+                    repair_tagged(response)
+
+
+class TestRepairJson(unittest.TestCase):
+    def test_close_json(self):
+        """Test closing truncated JSON and extracting it from surrounding text."""
+        for text, expected in [
+            ('{"a": [1, 2', '{"a": [1, 2]}'),
+            ('{"a": "cut', '{"a": "cut"}'),
+            ('{"a": 1, "b":', '{"a": 1}'),
+            ('{"a": 1, "b', '{"a": 1}'),
+            ('```json\n{"a": 1}\n```', '{"a": 1}'),
+            ('Here you go: {"a": "}"} thanks', '{"a": "}"}'),
+        ]:
+            with self.subTest(text=text):
+                self.assertEqual(close_json(text), expected)
+
+    def test_missing_lists_default_to_empty_and_invalid_entries_are_dropped(self):
+        """Test that absent action lists become empty and invalid entries are skipped."""
+        actions = repair_json_actions('{"user_actions": [{"message": "Hi"}, {"message": "Hi", "recipient": "Sam"}]}')
+
+        self.assertEqual([action.recipient for action in actions.user_actions], ["Sam"])
+        self.assertEqual((actions.ai_agent_actions, actions.tools_actions), ([], []))
+
+    def test_unreadable_json_raises(self):
+        """Test that output without JSON raises."""
+        with self.assertRaises(ValueError):
+            repair_json_actions("I can't help with that")
+
+
+class ScriptedThinker(GroqThinker):
+    """Answers each completion request with the next scripted response."""
+
+    def __init__(self, responses):
+        with patch.dict(os.environ, {"GROQ_API_KEY": "dummy_key"}):
+            super().__init__()
+        self.responses = list(responses)
+        self.requests = []
+
+    async def _complete(self, messages, max_tokens=None):
+        self.requests.append((messages, max_tokens))
+        return self.responses.pop(0), TokenUsage()
+
+
+class TestGroqThinkerRepair(unittest.IsolatedAsyncioTestCase):
+    async def test_prose_goes_to_the_continuation_and_the_retry(self):
+        """Test that a response without actions is neither repaired locally nor delivered empty."""
+        ok = "<chat><user_message user=Sam device=kitchen>The lights are on</user_message></chat>"
+        thinker = ScriptedThinker(["Sure, I'll turn the lights on.", "<chat></chat>", ok])
+        name = thinker.name
+        local_before = LLM_REPAIRS_TOTAL.value(model=name, stage="local")
+        avoided_before = LLM_RETRIES_AVOIDED_TOTAL.value(model=name)
+
+        actions = await thinker._generate("turn on the lights")
+
+        self.assertEqual(actions.user_actions[0].message, "The lights are on")
+        # The original request, a short continuation, then a full retry
+        self.assertEqual([max_tokens for _, max_tokens in thinker.requests], [None, REPAIR_MAX_TOKENS, None])
+        self.assertEqual(LLM_REPAIRS_TOTAL.value(model=name, stage="local"), local_before)
+        self.assertEqual(LLM_RETRIES_AVOIDED_TOTAL.value(model=name), avoided_before)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import random
+import asyncio
+import unittest
+from assistant_conversation_backend.resilience import (
+    CircuitBreaker, CircuitOpenError, ExponentialBackoff, StaleWhileRevalidate, CLOSED, HALF_OPEN, OPEN, CIRCUIT_STATE,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+async def fail():
+    raise RuntimeError("provider down")
+
+
+async def succeed():
+    return "ok"
+
+
+class FlakySource:
+    def __init__(self):
+        self.value = 0
+        self.delay = 0.0
+        self.error = None
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        self.value += 1
+        return self.value
+
+
+class TestExponentialBackoff(unittest.TestCase):
+    def test_backoff_grows_exponentially_with_bounded_jitter(self):
+        """Test that delays double per attempt up to max_delay, jittered within the upper half."""
+        backoff = ExponentialBackoff(base=1.0, factor=2.0, max_delay=10.0, rng=random.Random(1))
+
+        for attempt, ceiling in [(0, 1.0), (1, 2.0), (2, 4.0), (3, 8.0), (6, 10.0)]:
+            delay = backoff.delay(attempt)
+            self.assertTrue(ceiling / 2 <= delay <= ceiling)
+
+
+class TestCircuitBreaker(unittest.IsolatedAsyncioTestCase):
+    async def test_circuit_opens_after_threshold_and_rejects_without_calling(self):
+        """Test that the circuit opens after failure_threshold failures and rejects calls while open."""
+        clock = FakeClock()
+        breaker = CircuitBreaker("TestProviderA", failure_threshold=2, backoff=ExponentialBackoff(base=4, rng=random.Random(0)), clock=clock)
+
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                await breaker.call(fail)
+
+        self.assertEqual(breaker.state, OPEN)
+        self.assertTrue(breaker.is_open())
+        self.assertTrue(2 <= breaker.retry_after() <= 4)
+        self.assertEqual(CIRCUIT_STATE.value(provider="TestProviderA"), 2)
+
+        with self.assertRaises(CircuitOpenError) as raised:
+            await breaker.call(succeed)
+        self.assertEqual(raised.exception.provider, "TestProviderA")
+
+    async def test_half_open_probe_closes_or_reopens_with_longer_backoff(self):
+        """Test that a single probe is let through after the backoff and decides the next state."""
+        clock = FakeClock()
+        breaker = CircuitBreaker("TestProviderB", failure_threshold=1, backoff=ExponentialBackoff(base=4, max_delay=100, rng=random.Random(0)), clock=clock)
+
+        with self.assertRaises(RuntimeError):
+            await breaker.call(fail)
+        first_delay = breaker.retry_after()
+
+        # After the backoff a single probe is allowed; a failure re-opens for longer
+        clock.now += first_delay
+        self.assertTrue(breaker.allow_request())
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertFalse(breaker.allow_request())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, OPEN)
+        self.assertGreaterEqual(breaker.retry_after(), 4)
+
+        clock.now += breaker.retry_after()
+        self.assertEqual(await breaker.call(succeed), "ok")
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.next_retry_delay(), 0.0)
+        self.assertEqual(CIRCUIT_STATE.value(provider="TestProviderB"), 0)
+
+    async def test_unparseable_output_does_not_open_the_circuit(self):
+        """Test that a ValueError, the provider answering with bad output, isn't counted as a failure."""
+        breaker = CircuitBreaker("TestProviderParse", failure_threshold=2)
+
+        async def malformed():
+            raise ValueError("No actions found in the response")
+
+        for _ in range(3):
+            with self.assertRaises(ValueError):
+                await breaker.call(malformed)
+
+        self.assertEqual(breaker.state, CLOSED)
+        self.assertEqual(breaker.consecutive_failures, 0)
+
+
+class TestStaleWhileRevalidate(unittest.IsolatedAsyncioTestCase):
+    async def test_serves_the_last_good_value_past_the_deadline(self):
+        """Test that a slow or failing refresh serves the last good value with its age."""
+        clock = FakeClock()
+        source = FlakySource()
+        cache = StaleWhileRevalidate("test", source, deadline_seconds=0.02, clock=clock)
+
+        self.assertEqual(await cache.get(), (1, 0.0))
+
+        source.delay = 0.05
+        clock.now = 10
+        self.assertEqual(await cache.get(), (1, 10))
+        # The refresh that missed the deadline finishes in the background
+        await asyncio.sleep(0.06)
+        self.assertEqual(cache.value, 2)
+
+        source.delay = 0
+        source.error = RuntimeError("down")
+        clock.now = 15
+        self.assertEqual(await cache.get(), (2, 5))
+
+    async def test_without_a_value_raises(self):
+        """Test that with nothing cached the timeout or the failure is raised."""
+        source = FlakySource()
+        cache = StaleWhileRevalidate("test", source, deadline_seconds=0.01)
+
+        source.delay = 0.05
+        with self.assertRaises(asyncio.TimeoutError):
+            await cache.get()
+        # A second read joins the refresh already running instead of starting another
+        with self.assertRaises(asyncio.TimeoutError):
+            await cache.get()
+        await asyncio.sleep(0.06)
+        self.assertEqual(source.calls, 1)
+        self.assertEqual(cache.value, 1)
+
+        failing = StaleWhileRevalidate("test", FlakySource(), deadline_seconds=0.01)
+        failing.fetch.error = RuntimeError("down")
+        with self.assertRaises(RuntimeError):
+            await failing.get()
+
+    async def test_stops_calling_while_the_circuit_is_open(self):
+        """Test that the last good value is served without a fetch while the breaker is open."""
+        clock = FakeClock()
+        source = FlakySource()
+        breaker = CircuitBreaker("TestSWR", failure_threshold=2, backoff=ExponentialBackoff(base=30, rng=random.Random(0)), clock=clock)
+        cache = StaleWhileRevalidate("test", source, deadline_seconds=0.05, breaker=breaker, clock=clock)
+        await cache.get()
+
+        source.error = RuntimeError("down")
+        for _ in range(2):
+            await cache.get()
+        self.assertTrue(breaker.is_open())
+
+        calls = source.calls
+        clock.now = 5
+        self.assertEqual(await cache.get(), (1, 5))
+        self.assertEqual(source.calls, calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+from unittest.mock import patch
+from assistant_conversation_backend.home_assistant.client import HomeAssistantClient
+from assistant_conversation_backend.home_assistant.resolver import EntityResolver, parse_intent, HA_COMMAND_SECONDS
+from assistant_conversation_backend.home_assistant.state_mirror import StateMirror
+from .fake_home_assistant import FakeHomeAssistant, make_state, TOKEN
+
+STATES = [
+    make_state("light.kitchen_ceiling", "off", friendly_name="Kitchen Ceiling"),
+    make_state("light.kitchen_counter", "off", friendly_name="Kitchen Counter"),
+    make_state("light.bedroom_lamp_left", "off", friendly_name="Bedroom Lamp Left"),
+    make_state("light.bedroom_lamp_right", "off", friendly_name="Bedroom Lamp Right"),
+    make_state("switch.coffee_maker", "off", friendly_name="Coffee Maker"),
+    make_state("cover.living_room_blinds", "closed", friendly_name="Living Room Blinds"),
+    make_state("scene.movie_night", "scening", friendly_name="Movie Night"),
+    make_state("sensor.kitchen_temperature", "21", friendly_name="Kitchen Temperature"),
+]
+AREAS = {
+    "light.kitchen_ceiling": "Kitchen",
+    "light.kitchen_counter": "Kitchen",
+    "light.bedroom_lamp_left": "Bedroom",
+    "light.bedroom_lamp_right": "Bedroom",
+}
+
+
+def loaded_mirror():
+    mirror = StateMirror(api_url=None)
+    mirror._load_snapshot(STATES)
+    mirror.areas = dict(AREAS)
+    mirror._set_connected(True)
+    return mirror
+
+
+class TestParseIntent(unittest.TestCase):
+    def test_parse_intent(self):
+        """Test reading the service, target and data from a command."""
+        self.assertEqual(parse_intent("Please turn the coffee maker on.").service, "turn_on")
+        self.assertEqual(parse_intent("switch off all the lights").target, "lights")
+        brightness = parse_intent("Dim the kitchen counter to 30%")
+        self.assertEqual(brightness.domains, ("light",))
+        self.assertEqual(brightness.data, {"brightness_pct": 30})
+        self.assertIsNone(parse_intent("What's the temperature in the kitchen?"))
+
+
+class TestEntityResolver(unittest.IsolatedAsyncioTestCase):
+    async def test_resolves_commands(self):
+        """Test resolving clear commands to a service call on the matching entities."""
+        resolver = EntityResolver(mirror=loaded_mirror(), client=None)
+
+        for message, expected in [
+            ("Turn on the kitchen ceiling light", ("light", "turn_on", ["light.kitchen_ceiling"])),
+            ("turn off the kitchen lights", ("light", "turn_off", ["light.kitchen_ceiling", "light.kitchen_counter"])),
+            ("toggle the coffe maker", ("switch", "toggle", ["switch.coffee_maker"])),
+            ("open the living room blinds", ("cover", "open_cover", ["cover.living_room_blinds"])),
+            ("activate movie night", ("scene", "turn_on", ["scene.movie_night"])),
+        ]:
+            with self.subTest(message=message):
+                resolution = await resolver.resolve(message)
+
+                self.assertEqual((resolution.domain, resolution.service, resolution.entity_ids), expected)
+
+    async def test_leaves_unclear_requests_to_the_conversation_api(self):
+        """Test that ambiguous, unknown or qualified requests are not resolved."""
+        resolver = EntityResolver(mirror=loaded_mirror(), client=None)
+
+        for message in [
+            "turn on the bedroom lamp",  # Left or right
+            "turn on the garage light",  # No such entity
+            "what is the temperature in the kitchen",  # Not a command
+            "turn off all the lights except the kitchen",  # Exception
+            "turn on the living room lamp when I get home",  # Condition
+            "open the bedroom blinds halfway",  # Partial amount
+            "turn off the lights in 10 minutes",  # Delay
+            "turn on the kitchen ceiling light by the window",  # Only part of the target matches
+            "toggle coffee machine",  # Not the coffee maker's name
+        ]:
+            with self.subTest(message=message):
+                self.assertIsNone(await resolver.resolve(message))
+
+    async def test_index_follows_the_mirror(self):
+        """Test that entities added to the mirror become resolvable."""
+        mirror = loaded_mirror()
+        resolver = EntityResolver(mirror=mirror, client=None)
+        self.assertIsNone(await resolver.resolve("turn on the garage light"))
+
+        mirror._apply({"entity_id": "light.garage", "new_state": make_state("light.garage", "off", friendly_name="Garage")})
+
+        self.assertEqual((await resolver.resolve("turn on the garage light")).entity_ids, ["light.garage"])
+
+
+class TestHomeAssistantAgentResolver(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.home_assistant = await FakeHomeAssistant(STATES, AREAS).start()
+        self.client = HomeAssistantClient(self.home_assistant.api_url, TOKEN)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.home_assistant.stop()
+
+    async def test_agent_calls_services_directly_and_falls_back(self):
+        """Test that resolved commands call the service and the rest go to the conversation API."""
+        from assistant_conversation_backend.agents import home_assistant_agent
+        from assistant_conversation_backend.state import MAIN_AI_QUEUE
+        # Without the mirror the index is built from /states
+        resolver = EntityResolver(mirror=StateMirror(api_url=None), client=self.client)
+        direct_before = HA_COMMAND_SECONDS.count(path="direct")
+
+        with patch.object(home_assistant_agent, "HOME_ASSISTANT", self.client), \
+                patch.object(home_assistant_agent, "RESOLVER", resolver):
+            agent = home_assistant_agent.HomeAssistantAgent()
+            await agent.ask("Turn off the kitchen counter light", "alice")
+            self.assertTrue(MAIN_AI_QUEUE.get_nowait().message.startswith("Turned off Kitchen Counter."))
+            await agent.ask("Turn on the bedroom lamp", "alice")
+            self.assertTrue(MAIN_AI_QUEUE.get_nowait().message.startswith("Done"))
+
+        calls = [r[:2] for r in self.home_assistant.requests if r[0] == "POST"]
+        self.assertEqual(calls, [("POST", "/services/light/turn_off"), ("POST", "/conversation/process")])
+        self.assertEqual(self.home_assistant.states["light.kitchen_counter"]["state"], "off")
+        self.assertEqual(HA_COMMAND_SECONDS.count(path="direct"), direct_before + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import time
+import asyncio
+import unittest
+from assistant_conversation_backend.search_cache import SearchCache, normalize_query, query_topic
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeSearch:
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.queries = []
+
+    async def __call__(self, query):
+        self.queries.append(query)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("search failed")
+        return f"results for {query}"
+
+
+class TestNormalizeQuery(unittest.TestCase):
+    def test_normalize_query(self):
+        """Test that phrasing, case and punctuation are normalised and topics detected."""
+        self.assertEqual(normalize_query("  Please search for: the Weather   TODAY?! "), "the weather today")
+        self.assertEqual(normalize_query("What's new?"), normalize_query("what s new"))
+        self.assertEqual(query_topic(normalize_query("weather today")), "weather")
+        self.assertEqual(query_topic(normalize_query("latest headlines")), "news")
+        self.assertEqual(query_topic(normalize_query("who wrote dune")), "general")
+
+
+class TestSearchCache(unittest.IsolatedAsyncioTestCase):
+    async def test_hits_until_the_topic_ttl_expires(self):
+        """Test that normalised repeats are served from the cache until their topic's TTL expires."""
+        clock = FakeClock()
+        cache = SearchCache(ttls={"weather": 600, "general": 3600}, clock=clock)
+        search = FakeSearch()
+
+        self.assertEqual(await cache.get("Weather today?", search), "results for Weather today?")
+        self.assertEqual(await cache.get("weather  today", search), "results for Weather today?")
+        clock.now = 601
+        await cache.get("weather today", search)
+        clock.now = 1200
+        await cache.get("Who wrote Dune", search)
+        clock.now = 4000
+        await cache.get("who wrote dune?", search)
+
+        self.assertEqual(search.queries, ["Weather today?", "weather today", "Who wrote Dune"])
+        report = cache.report()
+        self.assertEqual((report["hit"], report["miss"], report["hit_rate"]), (2, 3, 0.4))
+
+    async def test_identical_concurrent_queries_share_one_search(self):
+        """Test that concurrent identical queries join the search already running."""
+        cache = SearchCache(ttls={"general": 0})
+        search = FakeSearch(delay=0.05)
+
+        results = await asyncio.gather(*(cache.get(q, search) for q in ["Who is Ada Lovelace", "who is ada lovelace?", "WHO IS ADA LOVELACE"]))
+
+        self.assertEqual(len(search.queries), 1)
+        self.assertEqual(set(results), {"results for Who is Ada Lovelace"})
+        self.assertEqual(cache.report()["joined"], 2)
+        # Nothing is kept with a TTL of 0
+        self.assertEqual(cache.report()["entries"], 0)
+
+    async def test_failures_reach_every_waiter_and_are_not_cached(self):
+        """Test that a failed search raises for every waiter and the next call searches again."""
+        cache = SearchCache()
+        search = FakeSearch(delay=0.01, fail=True)
+
+        results = await asyncio.gather(cache.get("q", search), cache.get("q", search), return_exceptions=True)
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+        search.fail = False
+        self.assertEqual(await cache.get("q", search), "results for q")
+        self.assertEqual(len(search.queries), 2)
+
+    async def test_hits_count_the_search_time_they_save(self):
+        """Test that each hit is credited with the time its upstream search took."""
+        cache = SearchCache()
+        search = FakeSearch(delay=0.01)
+
+        for _ in range(4):
+            await cache.get("weather in Stockholm today", search)
+
+        report = cache.report()
+        self.assertEqual(report["upstream_calls_saved"], 3)
+        self.assertAlmostEqual(report["saved_seconds"], 3 * report["mean_upstream_seconds"])
+
+    @unittest.skipUnless(os.getenv("RUN_BENCHMARKS", "0") == "1", "Set RUN_BENCHMARKS=1 to run the benchmarks")
+    async def test_search_cache_benchmark(self):
+        """Test that a repeated question costs a dictionary lookup instead of a full search."""
+        cache = SearchCache()
+        search = FakeSearch(delay=0.05)
+
+        start = time.perf_counter()
+        await cache.get("weather in Stockholm today", search)
+        miss_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(100):
+            await cache.get("Weather in Stockholm today?", search)
+        hit_seconds = (time.perf_counter() - start) / 100
+
+        report = cache.report()
+        print(f"\nmiss {miss_seconds * 1000:.1f} ms, hit {hit_seconds * 1e6:.0f} µs, "
+              f"hit rate {report['hit_rate']:.2f}, saved {report['saved_seconds']:.2f} s")
+        self.assertLess(hit_seconds, miss_seconds / 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
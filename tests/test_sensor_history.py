@@ -0,0 +1,124 @@
+import os
+import time
+from datetime import datetime, timezone
+import unittest
+import numpy as np
+from assistant_conversation_backend.home_assistant.client import HomeAssistantClient
+from assistant_conversation_backend.home_assistant.history import RingBuffer, SensorHistoryStore, downsample
+from assistant_conversation_backend.home_assistant.state_mirror import StateMirror
+from .fake_home_assistant import FakeHomeAssistant, TOKEN
+
+NOW = datetime(2026, 1, 15, 12, 0, tzinfo=timezone.utc).timestamp()
+
+
+def iso(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def change(value, timestamp, unit="°C"):
+    return {"state": str(value), "last_changed": iso(timestamp),
+            "attributes": {"friendly_name": "Living Room", "unit_of_measurement": unit}}
+
+
+class TestDownsample(unittest.TestCase):
+    def test_downsample(self):
+        """Test bucketing samples into count, min, mean and max per bucket with a trend."""
+        times = np.array([0, 10, 20, 35, 90, 95], dtype=float)
+        values = np.array([1, 3, 2, 7, 5, 9], dtype=float)
+
+        stats = downsample(times, values, 0, 100, 4)
+
+        self.assertEqual(stats["count"].tolist(), [3, 1, 0, 2])
+        self.assertEqual((stats["min"][0], stats["max"][0], stats["mean"][0]), (1, 3, 2))
+        self.assertTrue(np.isnan(stats["mean"][2]))
+        self.assertEqual(stats["max"][3], 9)
+        self.assertGreater(stats["trend"], 0)
+
+    def test_ring_buffer_keeps_the_newest_samples_in_order(self):
+        """Test that a full buffer drops the oldest samples and keeps them sorted by time."""
+        buffer = RingBuffer(4)
+        for t in range(6):
+            buffer.append(float(t), float(t * 10))
+        buffer.append(4.5, 45.0)
+
+        times, values = buffer.arrays()
+
+        self.assertEqual(times.tolist(), [3.0, 4.0, 4.5, 5.0])
+        self.assertEqual(values.tolist(), [30.0, 40.0, 45.0, 50.0])
+
+    @unittest.skipUnless(os.getenv("RUN_BENCHMARKS", "0") == "1", "Set RUN_BENCHMARKS=1 to run the benchmarks")
+    def test_downsample_benchmark(self):
+        """Test bucketing a week of one-second samples with NumPy against a plain Python loop."""
+        for count in [24 * 5_000, 24 * 50_000]:
+            times = np.arange(count, dtype=float)
+            values = np.sin(times / 3600) * 10 + 20
+
+            start = time.perf_counter()
+            stats = downsample(times, values, 0, count, 24)
+            numpy_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            width = count / 24
+            buckets = [[] for _ in range(24)]
+            for t, v in zip(times.tolist(), values.tolist()):
+                buckets[int(t // width)].append(v)
+            python = [(min(b), sum(b) / len(b), max(b)) for b in buckets]
+            python_seconds = time.perf_counter() - start
+
+            self.assertTrue(np.allclose(stats["mean"], [p[1] for p in python]))
+            print(f"\n{count} samples: numpy {numpy_seconds * 1000:.1f} ms, python {python_seconds * 1000:.1f} ms")
+
+        self.assertLess(numpy_seconds, python_seconds)
+
+
+class TestSensorHistoryStore(unittest.IsolatedAsyncioTestCase):
+    async def test_summary_from_state_changes(self):
+        """Test summarising the state changes the mirror recorded over a window."""
+        mirror = StateMirror(api_url=None)
+        store = SensorHistoryStore(mirror=mirror, client=None, buckets=4)
+        mirror._load_snapshot([{"entity_id": "sensor.temperature", **change(18, NOW - 5 * 3600)}])
+        for hour, value in [(4, 19), (3, 21), (2, 23), (1, 22)]:
+            mirror._apply({"entity_id": "sensor.temperature", "new_state": {"entity_id": "sensor.temperature", **change(value, NOW - hour * 3600)}})
+        mirror._apply({"entity_id": "sensor.temperature", "new_state": {"entity_id": "sensor.temperature", "state": "unavailable"}})
+
+        summary = await store.summary("sensor.temperature", 4, now=NOW)
+
+        lines = summary.splitlines()
+        self.assertEqual(lines[0], "Living Room (sensor.temperature) over the last 4 hours, 4 samples, unit °C:")
+        self.assertTrue(lines[1].startswith("latest 22, min 19 at "))
+        self.assertIn("max 23", lines[1])
+        self.assertIn("(rising)", lines[2])
+        self.assertEqual(len(lines), 3 + 4)
+
+        # 19 carries into a window that starts after it was measured
+        lines = (await store.summary("sensor.temperature", 3.5, now=NOW)).splitlines()
+        three_hours_ago = datetime.fromtimestamp(NOW - 3 * 3600).strftime("%H:%M")
+        self.assertIn("3 samples", lines[0])
+        self.assertTrue(lines[1].startswith(f"latest 22, min 21 at {three_hours_ago}, max 23"))
+        self.assertIn("min 19", "\n".join(lines[3:]))
+
+        lines = (await store.summary("sensor.temperature", 0.5, now=NOW)).splitlines()
+        self.assertIn("0 samples", lines[0])
+        self.assertEqual(lines[1], "unchanged at 22 since before the window")
+
+    async def test_backfills_once_from_home_assistant(self):
+        """Test that history missing from the mirror is fetched from Home Assistant once."""
+        server = await FakeHomeAssistant().start()
+        self.addAsyncCleanup(server.stop)
+        server.history["sensor.pm25"] = [(iso(NOW - hours * 3600), str(value)) for hours, value in [(20, 4), (12, 30), (6, 12)]]
+        client = HomeAssistantClient(server.api_url, TOKEN)
+        self.addAsyncCleanup(client.close)
+        store = SensorHistoryStore(mirror=StateMirror(api_url=None), client=client)
+
+        summary = await store.summary("sensor.pm25", 24, now=NOW)
+        await store.summary("sensor.pm25", 24, now=NOW)
+
+        self.assertIn("3 samples", summary)
+        self.assertIn("max 30", summary)
+        self.assertIn("latest 12", summary)
+        self.assertEqual(server.requests.count(("GET", "/history/period", "sensor.pm25")), 1)
+        self.assertIn("No numeric history", await store.summary("sensor.missing", 24, now=NOW))
+
+
+if __name__ == '__main__':
+    unittest.main()
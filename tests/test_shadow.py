@@ -0,0 +1,77 @@
+import os
+import json
+import random
+import asyncio
+import tempfile
+import unittest
+from assistant_conversation_backend.models.base_model import Actions, UserAction, ToolAction
+from assistant_conversation_backend.models.fake import FakeModel
+from assistant_conversation_backend.models.shadow import ShadowRunner, diff_actions
+
+PROMPT = "Conversation latest 30 messages:\n10:00:05 Sam [kitchen]:  What's for dinner?"
+
+
+def reply(message: str, device: str = "kitchen", tools=()) -> Actions:
+    return Actions(
+        user_actions=[UserAction(message=message, recipient="Sam", device=device)],
+        ai_agent_actions=[],
+        tools_actions=[ToolAction(command=command) for command in tools],
+    )
+
+
+class TestShadowRunner(unittest.IsolatedAsyncioTestCase):
+    def test_diff_actions(self):
+        """Test comparing recipients, tools and message text of two responses."""
+        diff = diff_actions(reply("Pasta tonight"), reply("Pasta tonight!", device="hallway", tools=["/timer"]))
+
+        self.assertTrue(diff["comparable"])
+        self.assertFalse(diff["same_users"])
+        self.assertFalse(diff["same_tools"])
+        self.assertTrue(diff["same_agents"])
+        self.assertTrue(0.9 < diff["message_similarity"] < 1)
+        self.assertEqual(diff_actions(reply("Hi"), None), {"comparable": False})
+
+    async def test_sampled_turns_are_compared_side_by_side(self):
+        """Test that a sampled turn is logged with both models' latency, tokens and the diff."""
+        with tempfile.TemporaryDirectory() as directory:
+            log_path = os.path.join(directory, "shadow.jsonl")
+            candidate = FakeModel(script=[reply("Pasta tonight")], latency_seconds=0.01)
+            runner = ShadowRunner(candidate, sample_rate=1.0, log_path=log_path)
+
+            task = runner.start(PROMPT)
+            primary = await FakeModel(script=[reply("We're having pasta")]).generate(PROMPT)
+            runner.compare(task, "Primary", primary, 0.5)
+            await asyncio.gather(*runner._tasks)
+
+            with open(log_path) as f:
+                record = json.loads(f.read().strip())
+        self.assertEqual(record["primary"]["latency_ms"], 500.0)
+        self.assertEqual(record["primary"]["model"], "Primary")
+        self.assertEqual(record["candidate"]["model"], "FakeModel")
+        self.assertGreater(record["candidate"]["output_tokens"], 0)
+        self.assertTrue(record["diff"]["same_users"])
+
+        report = runner.report()
+        self.assertEqual(report["turns"], 1)
+        self.assertEqual(report["agreement"], 1.0)
+        self.assertLess(report["candidate_p50_ms"], report["primary_p50_ms"])
+
+    async def test_candidate_errors_are_recorded_not_raised(self):
+        """Test that a failing candidate is counted without affecting the turn."""
+        runner = ShadowRunner(FakeModel(script=[{"error": "boom"}]), sample_rate=1.0)
+
+        runner.compare(runner.start(PROMPT), "Primary", reply("Hi"), 0.1)
+        await asyncio.gather(*runner._tasks)
+
+        self.assertEqual(runner.report()["candidate_errors"], 1)
+        self.assertEqual(runner.records[0]["candidate"]["error"], "boom")
+
+    def test_sample_rate(self):
+        """Test that turns outside the sample start no candidate request."""
+        runner = ShadowRunner(FakeModel(), sample_rate=0.0, rng=random.Random(1))
+
+        self.assertIsNone(runner.start(PROMPT))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,212 @@
+import sys
+import types
+import unittest
+import dataclasses
+from unittest.mock import patch
+from assistant_conversation_backend.data_models import ShoppingItem
+from assistant_conversation_backend.home_assistant.client import HomeAssistantClient
+from assistant_conversation_backend.home_assistant.shopping_list import ShoppingList, PostgresShoppingStore
+from assistant_conversation_backend.home_assistant.state_mirror import StateMirror
+from assistant_conversation_backend.resilience import ExponentialBackoff
+from .fake_home_assistant import FakeHomeAssistant, make_state, wait_for, TOKEN
+
+
+class MemoryStore:
+    """Stands in for the shopping_list table."""
+
+    def __init__(self, items=()):
+        self.rows = {item.item_id: dataclasses.replace(item) for item in items}
+        self.writes = 0
+
+    async def load(self):
+        return [dataclasses.replace(item) for item in self.rows.values()]
+
+    async def save(self, items):
+        self.writes += len(items)
+        self.rows.update({item.item_id: dataclasses.replace(item) for item in items})
+
+    async def delete(self, item_ids):
+        self.writes += len(item_ids)
+        for item_id in item_ids:
+            self.rows.pop(item_id, None)
+
+
+class FailingStore(MemoryStore):
+    """Fails the first few saves, like a database that is briefly unreachable."""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    async def save(self, items):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("database unavailable")
+        await super().save(items)
+
+
+class FakeConnection:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakeDatabase(types.ModuleType):
+    """Stands in for the database module, whose helpers log errors and return False."""
+
+    def __init__(self, failures):
+        super().__init__("assistant_conversation_backend.database")
+        self.failures = failures
+        self.rows = {}
+        self.saves = 0
+
+    async def get_shopping_items(self, conn):
+        return []
+
+    async def upsert_shopping_items(self, conn, items):
+        self.saves += 1
+        if self.failures:
+            self.failures -= 1
+            return False
+        self.rows.update({item.item_id: dataclasses.replace(item) for item in items})
+        return True
+
+    async def delete_shopping_items(self, conn, item_ids):
+        for item_id in item_ids:
+            self.rows.pop(item_id, None)
+        return True
+
+
+class FakePostgresStore(PostgresShoppingStore):
+    async def _connect(self):
+        return FakeConnection()
+
+
+def make_list(client, store, mirror=None):
+    return ShoppingList(client=client, mirror=mirror or StateMirror(api_url=None), store=store,
+                        backoff=ExponentialBackoff(base=0.01, max_delay=0.05))
+
+
+class TestShoppingList(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.home_assistant = await FakeHomeAssistant([make_state("todo.shopping_list", "2")]).start()
+        self.home_assistant.shopping_list = [
+            {"id": "ha1", "name": "milk", "complete": False},
+            {"id": "ha2", "name": "eggs", "complete": False},
+        ]
+        self.addAsyncCleanup(self.home_assistant.stop)
+        self.client = HomeAssistantClient(self.home_assistant.api_url, TOKEN)
+        # Cleanups run last in, first out, so the lists and mirrors a test starts stop before these
+        self.addAsyncCleanup(self.client.close)
+
+    def start_list(self, store, mirror=None):
+        shopping = make_list(self.client, store, mirror)
+        shopping.start()
+        self.addAsyncCleanup(shopping.stop)
+        return shopping
+
+    async def test_sync_stores_only_what_changed(self):
+        """Test that a sync writes only the items added, updated or removed in Home Assistant."""
+        store = MemoryStore()
+        shopping = make_list(self.client, store)
+
+        self.assertEqual(await shopping.sync(), {"added": 2, "updated": 0, "removed": 0})
+        self.assertEqual(await shopping.sync(), {"added": 0, "updated": 0, "removed": 0})
+        self.assertEqual(store.writes, 2)
+
+        await self.home_assistant.set_shopping_list([
+            {"id": "ha1", "name": "milk", "complete": True},
+            {"id": "ha3", "name": "bread", "complete": False},
+        ])
+        self.assertEqual(await shopping.sync(), {"added": 1, "updated": 1, "removed": 1})
+        self.assertEqual(store.writes, 5)
+        self.assertEqual(sorted(item.item_name for item in store.rows.values()), ["bread", "milk"])
+
+    async def test_reads_are_served_from_the_cache(self):
+        """Test that reads after the first sync don't call Home Assistant."""
+        shopping = make_list(self.client, MemoryStore())
+        await shopping.get()
+        fetches = self.home_assistant.requests.count(("GET", "/shopping_list"))
+
+        for _ in range(5):
+            open_items = await shopping.get(is_purchased=False)
+
+        self.assertEqual([item.item_name for item in open_items], ["milk", "eggs"])
+        self.assertEqual(fetches, 1)
+        self.assertEqual(self.home_assistant.requests.count(("GET", "/shopping_list")), 1)
+
+    async def test_edits_are_written_back_in_the_background(self):
+        """Test that edits are visible at once and written to Home Assistant in the background."""
+        store = MemoryStore()
+        shopping = self.start_list(store)
+
+        await wait_for(lambda: shopping.ready)
+        item = await shopping.add("coffee", quantity=2)
+        # Visible locally before Home Assistant has it
+        self.assertTrue(store.rows[item.item_id].needs_sync)
+        self.assertIn("coffee", [i.item_name for i in await shopping.get(is_purchased=False)])
+
+        await wait_for(lambda: not item.needs_sync)
+        self.assertIn({"id": item.ha_item_id, "name": "coffee", "complete": False}, self.home_assistant.shopping_list)
+
+        await shopping.update(item.item_id, is_purchased=True)
+        await wait_for(lambda: not item.needs_sync)
+        self.assertIs(next(i for i in self.home_assistant.shopping_list if i["id"] == item.ha_item_id)["complete"], True)
+        self.assertEqual(store.rows[item.item_id], item)
+        self.assertEqual(item.quantity, 2)
+
+    async def test_unsent_edits_survive_a_restart(self):
+        """Test that items stored but never sent are written to Home Assistant on start."""
+        store = MemoryStore([ShoppingItem("01J0000000000000000000TEA0", "tea", needs_sync=True)])
+        shopping = self.start_list(store)
+
+        await wait_for(lambda: not store.rows["01J0000000000000000000TEA0"].needs_sync)
+
+        self.assertIn("tea", [item["name"] for item in self.home_assistant.shopping_list])
+        # The item created by the write-back is not added a second time by the next sync
+        await shopping.sync()
+        self.assertEqual([item.item_name for item in await shopping.get()].count("tea"), 1)
+
+    async def test_background_loops_survive_store_errors(self):
+        """Test that failing store writes are retried without stopping the background loops."""
+        store = FailingStore(failures=2)
+        shopping = self.start_list(store)
+
+        await wait_for(lambda: len(store.rows) == 2)
+        store.failures = 2
+        item = await shopping.add("coffee")
+
+        await wait_for(lambda: store.rows.get(item.item_id) is not None and not store.rows[item.item_id].needs_sync)
+        self.assertTrue(all(not task.done() for task in shopping._tasks))
+
+    async def test_failed_database_writes_are_retried(self):
+        """Test that a database helper returning False keeps the items for the next write."""
+        database = FakeDatabase(failures=1)
+        with patch.dict(sys.modules, {"assistant_conversation_backend.database": database}):
+            self.start_list(FakePostgresStore())
+
+            await wait_for(lambda: len(database.rows) == 2)
+
+        self.assertEqual(sorted(item.item_name for item in database.rows.values()), ["eggs", "milk"])
+        self.assertEqual(database.saves, 2)
+
+    async def test_changes_in_home_assistant_trigger_a_sync(self):
+        """Test that a shopping list change seen by the state mirror triggers a sync."""
+        mirror = StateMirror(self.home_assistant.api_url, TOKEN, backoff=ExponentialBackoff(base=0.01, max_delay=0.05))
+        mirror.start()
+        self.addAsyncCleanup(mirror.stop)
+        shopping = self.start_list(MemoryStore(), mirror=mirror)
+
+        self.assertTrue(await mirror.wait_ready(2))
+        await wait_for(lambda: len(shopping.items) == 2)
+
+        await self.home_assistant.set_shopping_list(
+            self.home_assistant.shopping_list + [{"id": "ha9", "name": "apples", "complete": False}])
+
+        await wait_for(lambda: "apples" in [item.item_name for item in shopping.items.values()])
+
+
+if __name__ == '__main__':
+    unittest.main()
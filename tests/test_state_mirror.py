@@ -0,0 +1,91 @@
+import unittest
+from assistant_conversation_backend.home_assistant.state_mirror import StateMirror, websocket_url
+from assistant_conversation_backend.resilience import ExponentialBackoff
+from .fake_home_assistant import FakeHomeAssistant, make_state, wait_for, TOKEN
+
+
+def make_mirror(server, token=TOKEN):
+    return StateMirror(server.api_url, token, backoff=ExponentialBackoff(base=0.01, max_delay=0.05))
+
+
+class TestStateMirror(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.home_assistant = await FakeHomeAssistant([
+            make_state("light.kitchen", "off", friendly_name="Kitchen"),
+            make_state("sensor.temperature", "21.5", unit_of_measurement="°C"),
+        ], areas={"light.kitchen": "Kitchen"}).start()
+        # Cleanups run last in, first out, so the mirrors a test starts stop before the server
+        self.addAsyncCleanup(self.home_assistant.stop)
+
+    def start_mirror(self, token=TOKEN):
+        mirror = make_mirror(self.home_assistant, token)
+        mirror.start()
+        self.addAsyncCleanup(mirror.stop)
+        return mirror
+
+    async def test_loads_snapshot_and_follows_changes(self):
+        """Test loading every state and area on connect, then following state_changed events."""
+        mirror = make_mirror(self.home_assistant)
+        changes = []
+        mirror.add_listener(lambda entity_id, old, new: changes.append((entity_id, new and new["state"])))
+        mirror.start()
+        self.addAsyncCleanup(mirror.stop)
+
+        self.assertTrue(await mirror.wait_ready(2))
+        self.assertEqual(mirror.get("light.kitchen")["state"], "off")
+        self.assertEqual(len(mirror.all()), 2)
+        await wait_for(lambda: mirror.areas == {"light.kitchen": "Kitchen"})
+
+        await self.home_assistant.set_state("light.kitchen", "on", friendly_name="Kitchen")
+        await self.home_assistant.set_state("sensor.temperature", None)
+        await wait_for(lambda: "sensor.temperature" not in mirror.states)
+
+        self.assertEqual(mirror.get("light.kitchen")["state"], "on")
+        self.assertIn(("light.kitchen", "on"), changes)
+        self.assertIn(("sensor.temperature", None), changes)
+        # One snapshot and a subscription; no REST polling
+        self.assertEqual([r for r in self.home_assistant.requests if r[0] == "GET"], [])
+
+    async def test_reconnects_and_reloads_the_snapshot(self):
+        """Test that a dropped connection is re-established and changes made meanwhile are picked up."""
+        mirror = self.start_mirror()
+
+        self.assertTrue(await mirror.wait_ready(2))
+        await self.home_assistant.drop_connections()
+        await wait_for(lambda: not mirror.connected)
+        # Still holds the last snapshot, but it no longer follows Home Assistant
+        self.assertTrue(mirror.ready)
+        self.assertFalse(mirror.is_fresh())
+
+        # Changed while the mirror was disconnected
+        self.home_assistant.states["light.kitchen"] = make_state("light.kitchen", "on")
+        await wait_for(lambda: mirror.connected)
+
+        self.assertEqual(mirror.get("light.kitchen")["state"], "on")
+        self.assertEqual(self.home_assistant.requests.count(("ws", "get_states")), 2)
+
+    async def test_bad_token_never_becomes_ready(self):
+        """Test that a rejected token leaves the mirror empty and not ready."""
+        mirror = self.start_mirror(token="wrong")
+
+        self.assertFalse(await mirror.wait_ready(0.1))
+        self.assertEqual(mirror.states, {})
+
+
+class TestStateMirrorConfiguration(unittest.TestCase):
+    def test_websocket_url(self):
+        """Test deriving the websocket URL from the REST API URL."""
+        self.assertEqual(websocket_url("http://hass:8123/api"), "ws://hass:8123/api/websocket")
+        self.assertEqual(websocket_url("https://hass.local/api/"), "wss://hass.local/api/websocket")
+        self.assertEqual(websocket_url("http://hass:8123"), "ws://hass:8123/api/websocket")
+
+    def test_without_url_the_mirror_stays_off(self):
+        """Test that without HOME_ASSISTANT_URL the mirror never starts."""
+        mirror = StateMirror(api_url=None)
+        mirror.start()
+        self.assertFalse(mirror.ready)
+        self.assertIsNone(mirror._task)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch, AsyncMock
+from assistant_conversation_backend.models.groq_thinker import GroqThinker
+from assistant_conversation_backend.models.tag_parser import IncrementalTagParser
+from assistant_conversation_backend.models.base_model import UserAction, AIAgentAction, ToolAction, TokenUsage
+
+RESPONSE = """<think>Maybe <user_message user=Nobody device=none>ignored</user_message></think>
+<chat>
+    <user_message user="Jennifer" device='living_room'>Hey Jennifer, how's it going?</user_message>
+    <agent_message agent=HomeAssistant>Checking the temperature</agent_message>
+    <tool_command command="/search" arguments="weather forecast for today">Use search</tool_command>
+</chat>"""
+
+
+def parse_in_chunks(text: str, size: int):
+    parser = IncrementalTagParser()
+    for i in range(0, len(text), size):
+        parser.feed(text[i:i + size])
+    return parser.close()
+
+
+class TestIncrementalTagParser(unittest.TestCase):
+    def test_whole_response(self):
+        """Test parsing every action kind, with quoted attributes and a <think> block ignored."""
+        user, agent, tool = parse_in_chunks(RESPONSE, len(RESPONSE))
+
+        self.assertEqual(user, UserAction(message="Hey Jennifer, how's it going?", recipient="Jennifer", device="living_room"))
+        self.assertEqual(agent, AIAgentAction(message="Checking the temperature", recipient="HomeAssistant"))
+        self.assertEqual(tool, ToolAction(command="/search", arguments="weather forecast for today"))
+
+    def test_chunked_feeding_matches_whole_parse(self):
+        """Test that chunk boundaries anywhere give the same actions."""
+        for size in [1, 2, 3, 7, 16]:
+            with self.subTest(size=size):
+                self.assertEqual(parse_in_chunks(RESPONSE, size), parse_in_chunks(RESPONSE, len(RESPONSE)))
+
+    def test_action_is_emitted_as_soon_as_its_closing_tag_arrives(self):
+        """Test that feed() returns an action once its closing tag is complete."""
+        parser = IncrementalTagParser()
+
+        self.assertEqual(parser.feed("<chat><user_message user=Sam device=kitchen>Din"), [])
+        self.assertEqual(parser.feed("ner is ready</user_mess"), [])
+        [action] = parser.feed("age><agent_message agent=WebSearchAgent>")
+        self.assertEqual(action.message, "Dinner is ready")
+
+    def test_unterminated_tag_raises_on_close(self):
+        """Test that close() raises for an element that was never closed."""
+        parser = IncrementalTagParser()
+        parser.feed("<chat><user_message user=Sam device=kitchen>Dinner is")
+
+        with self.assertRaisesRegex(ValueError, "missing </user_message> closing tag"):
+            parser.close()
+
+    def test_missing_attributes_raise(self):
+        """Test that a user_message without a device raises."""
+        with self.assertRaisesRegex(ValueError, "missing user or device"):
+            IncrementalTagParser().feed("<user_message user=Sam>Hi</user_message>")
+
+    @unittest.skipUnless(os.getenv("RUN_BENCHMARKS", "0") == "1", "Set RUN_BENCHMARKS=1 to run the benchmarks")
+    def test_incremental_parse_benchmark(self):
+        """Parsing a long response in stream-sized chunks must stay linear, not rescan the buffer."""
+        element = '<user_message user=Sam device=kitchen>Some reasonably long message text here.</user_message>\n'
+        for count in [200, 800]:
+            response = "<chat>" + element * count + "</chat>"
+
+            start = time.perf_counter()
+            whole = parse_in_chunks(response, len(response))
+            whole_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            chunked = parse_in_chunks(response, 8)
+            chunked_seconds = time.perf_counter() - start
+
+            self.assertEqual(len(whole), count)
+            self.assertEqual(len(chunked), count)
+            print(f"\n{count} elements, {len(response)} chars: whole {whole_seconds * 1000:.2f} ms, "
+                  f"8-char chunks {chunked_seconds * 1000:.2f} ms")
+            if count == 200:
+                small_chunked_seconds = chunked_seconds
+
+        # Four times the input should take nowhere near sixteen times as long
+        self.assertLess(chunked_seconds, small_chunked_seconds * 12)
+
+
+def content_chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))], usage=None)
+
+
+async def stream_of(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+class TestGroqThinkerStreaming(unittest.IsolatedAsyncioTestCase):
+    async def test_streamed_actions_are_followed_by_the_usage(self):
+        """Test that streaming asks for usage and yields it after the actions."""
+        with patch.dict(os.environ, {"GROQ_API_KEY": "dummy_key"}):
+            thinker = GroqThinker(stream=True)
+        # With include_usage the last chunk carries the usage and no choices
+        usage = SimpleNamespace(prompt_tokens=900, completion_tokens=40, prompt_tokens_details=SimpleNamespace(cached_tokens=768))
+        chunks = [content_chunk(RESPONSE[i:i + 16]) for i in range(0, len(RESPONSE), 16)]
+        chunks.append(SimpleNamespace(choices=[], usage=usage))
+        create = AsyncMock(return_value=stream_of(chunks))
+
+        with patch.object(thinker.client.chat.completions, "create", create):
+            items = [item async for item in thinker._stream_actions("prompt")]
+
+        self.assertEqual(create.call_args.kwargs["stream_options"], {"include_usage": True})
+        self.assertEqual([type(item) for item in items], [UserAction, AIAgentAction, ToolAction, TokenUsage])
+        self.assertEqual(items[-1], TokenUsage(input_tokens=900, output_tokens=40, cached_tokens=768))
+
+
+if __name__ == '__main__':
+    unittest.main()
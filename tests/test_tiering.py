@@ -0,0 +1,48 @@
+import unittest
+from assistant_conversation_backend.data_models import AIMessage
+from assistant_conversation_backend.models.base_model import TokenUsage
+from assistant_conversation_backend.models.fake import FakeModel
+from assistant_conversation_backend.models.tiering import TierPolicy, FAST, STRONG, estimate_cost
+
+
+def make_policy() -> TierPolicy:
+    return TierPolicy(fast=FakeModel(), strong=FakeModel(), agent_names=["WebSearchAgent"])
+
+
+class TestTierPolicy(unittest.TestCase):
+    def test_classify(self):
+        """Test which turns go to the fast model and which to the strong one."""
+        for message, expected in [
+            (AIMessage("Device Kitchen speaker connected.", "SYSTEM", "", "kitchen"), (FAST, "system")),
+            (AIMessage("It will rain today, Remember to update Users on status.", "WebSearchAgent", "Keeva"), (FAST, "agent_result")),
+            (AIMessage("Turn off the lights", "Sam", "", "kitchen"), (FAST, "short_request")),
+            (AIMessage("Why is the heat pump running at night?", "Sam", "", "kitchen"), (STRONG, "reasoning")),
+            (AIMessage("Is it raining? Do I need an umbrella?", "Sam", "", "hallway"), (STRONG, "several_questions")),
+            (AIMessage(" ".join(["word"] * 30), "Sam", "", "kitchen"), (STRONG, "long_request")),
+        ]:
+            with self.subTest(message=message.message):
+                self.assertEqual(make_policy().classify(message), expected)
+
+    def test_report_fractions_latency_and_cost(self):
+        """Test the per-tier share of turns, latency percentiles and model names in the report."""
+        policy = make_policy()
+        for text in ["Hi", "Lights off", "Explain the electricity bill"]:
+            model, tier = policy.select(AIMessage(text, "Sam", "", "kitchen"))
+            policy.record(tier, 0.2 if tier == FAST else 1.5, TokenUsage(input_tokens=1000, output_tokens=100))
+
+        report = policy.report()
+
+        self.assertEqual(report[FAST]["turns"], 2)
+        self.assertEqual(report[FAST]["fraction"], 0.667)
+        self.assertEqual(report[STRONG]["p50_latency_ms"], 1500.0)
+        self.assertEqual(report[FAST]["model"], "FakeModel")
+
+    def test_estimate_cost(self):
+        """Test pricing known models and pricing unknown models or missing usage at zero."""
+        self.assertAlmostEqual(estimate_cost("OpenAI4oMini", TokenUsage(input_tokens=1_000_000, output_tokens=1_000_000)), 0.75)
+        self.assertEqual(estimate_cost("UnknownModel", TokenUsage(input_tokens=10)), 0.0)
+        self.assertEqual(estimate_cost("OpenAI4oMini", None), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
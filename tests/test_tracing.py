@@ -0,0 +1,78 @@
+import os
+import json
+import time
+import asyncio
+import tempfile
+import unittest
+from assistant_conversation_backend.tracing import TurnTracer
+
+
+class TestTurnTracer(unittest.IsolatedAsyncioTestCase):
+    def test_spans_are_recorded_per_turn(self):
+        """Test that each turn keeps its spans, queue wait and attributes, and is exported."""
+        with tempfile.TemporaryDirectory() as directory:
+            export_path = os.path.join(directory, "traces.jsonl")
+            tracer = TurnTracer(max_turns=10, export_path=export_path)
+
+            turn = tracer.start_turn(from_user="Sam", location="kitchen", enqueued_at=time.monotonic() - 0.05)
+            with tracer.span("store_message"):
+                time.sleep(0.01)
+            with tracer.span("llm_generate"):
+                time.sleep(0.02)
+            tracer.annotate(input_tokens=900, cached_tokens=768)
+            tracer.finish_turn(turn)
+
+            [breakdown] = tracer.last_turns(1)
+            self.assertEqual([span["name"] for span in breakdown["spans"]], ["store_message", "llm_generate"])
+            self.assertGreaterEqual(breakdown["queue_wait_ms"], 50)
+            self.assertGreaterEqual(breakdown["total_ms"], 30)
+            self.assertEqual(breakdown["attributes"], {"input_tokens": 900, "cached_tokens": 768})
+            self.assertEqual(turn.slowest_span().name, "llm_generate")
+
+            with open(export_path) as f:
+                exported = [json.loads(line) for line in f.read().splitlines()]
+            self.assertEqual(exported, [breakdown])
+
+    def test_spans_outside_a_turn_are_ignored(self):
+        """Test that spans before a turn starts or after it finishes are dropped."""
+        tracer = TurnTracer(max_turns=10, export_path=None)
+
+        with tracer.span("orphan"):
+            pass
+
+        turn = tracer.start_turn(from_user="SYSTEM")
+        tracer.finish_turn(turn)
+
+        # Spans recorded after a turn finished are dropped
+        with tracer.span("late"):
+            pass
+
+        self.assertEqual(tracer.last_turns(5)[0]["spans"], [])
+
+    def test_last_turns_is_newest_first_and_bounded(self):
+        """Test that only the newest max_turns turns are kept, newest first."""
+        tracer = TurnTracer(max_turns=3, export_path=None)
+        for i in range(5):
+            tracer.finish_turn(tracer.start_turn(from_user=f"user{i}"))
+
+        self.assertEqual([t["from_user"] for t in tracer.last_turns(10)], ["user4", "user3", "user2"])
+        self.assertEqual([t["from_user"] for t in tracer.last_turns(2)], ["user4", "user3"])
+        self.assertEqual(tracer.last_turns(0), [])
+
+    async def test_spawned_tasks_inherit_current_turn(self):
+        """Test that spans in tasks created during a turn belong to that turn."""
+        tracer = TurnTracer(max_turns=10, export_path=None)
+        turn = tracer.start_turn(from_user="Sam")
+
+        async def stage():
+            with tracer.span("background"):
+                await asyncio.sleep(0)
+
+        await asyncio.create_task(stage())
+        tracer.finish_turn(turn)
+
+        self.assertEqual([span.name for span in turn.spans], ["background"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+from assistant_conversation_backend.home_assistant.dashboard import load_dashboard_spec, section_entities
+from assistant_conversation_backend.home_assistant.state_mirror import StateMirror
+from assistant_conversation_backend.home_assistant.triggers import TriggerEngine, load_trigger_rules
+from .fake_home_assistant import make_state
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+RULES = [
+    {"name": "presence", "entities": ["person.*"], "min_interval": 300, "message": "{name} changed from {old} to {new}."},
+    {"name": "doors", "entities": ["binary_sensor.*door*"], "to": ["on"], "debounce": 0.05, "message": "{name} was opened."},
+    {"name": "air_quality", "entities": ["sensor.*pm25*"], "min_change": 10, "message": "{name} went from {old} to {new} {unit}."},
+]
+
+
+def make_engine(max_per_hour=0):
+    mirror = StateMirror(api_url=None)
+    mirror._load_snapshot([
+        make_state("person.alex", "home", friendly_name="Alex"),
+        make_state("binary_sensor.front_door", "off", friendly_name="Front door"),
+        make_state("sensor.pm25", "10", friendly_name="PM2.5", unit_of_measurement="µg/m³"),
+    ])
+    mirror.areas = {"binary_sensor.front_door": "Hall"}
+    queue = asyncio.Queue()
+    clock = FakeClock()
+    engine = TriggerEngine(RULES, mirror=mirror, queue=queue, max_per_hour=max_per_hour, clock=clock)
+    return engine, mirror, queue, clock
+
+
+def set_state(mirror, entity_id, state, **attributes):
+    mirror._apply({"entity_id": entity_id, "new_state": make_state(entity_id, state, **attributes)})
+
+
+def drain(queue):
+    messages = []
+    while not queue.empty():
+        messages.append(queue.get_nowait())
+    return messages
+
+
+class TestTriggerEngine(unittest.IsolatedAsyncioTestCase):
+    async def test_presence_is_delivered_then_rate_limited(self):
+        """Test that a rule fires again only after its minimum interval."""
+        engine, mirror, queue, clock = make_engine()
+
+        set_state(mirror, "person.alex", "not_home", friendly_name="Alex")
+        clock.now = 60
+        set_state(mirror, "person.alex", "home", friendly_name="Alex")
+        clock.now = 400
+        set_state(mirror, "person.alex", "not_home", friendly_name="Alex")
+
+        messages = drain(queue)
+        self.assertEqual([m.message for m in messages], [
+            "Home Assistant event: Alex changed from home to not_home.",
+            "Home Assistant event: Alex changed from home to not_home.",
+        ])
+        self.assertEqual(messages[0].from_user, "SYSTEM")
+        self.assertEqual(engine.report()["rules"]["presence"], {"delivered": 2, "suppressed": {"rate_limited": 1}})
+
+    async def test_debounce_drops_a_door_that_closes_again(self):
+        """Test that a change reverted within the debounce window is dropped."""
+        engine, mirror, queue, clock = make_engine()
+
+        set_state(mirror, "binary_sensor.front_door", "on", friendly_name="Front door")
+        set_state(mirror, "binary_sensor.front_door", "off", friendly_name="Front door")
+        await asyncio.sleep(0.1)
+        self.assertEqual(drain(queue), [])
+
+        set_state(mirror, "binary_sensor.front_door", "on", friendly_name="Front door")
+        await asyncio.sleep(0.1)
+        messages = drain(queue)
+
+        self.assertEqual([m.message for m in messages], ["Home Assistant event: Front door was opened."])
+        self.assertEqual(messages[0].location, "Hall")
+        self.assertEqual(engine.report()["rules"]["doors"], {"delivered": 1, "suppressed": {"debounced": 1}})
+
+    async def test_noisy_sensor_needs_a_real_change(self):
+        """Test that a numeric sensor fires only when it moves min_change from the last delivered value."""
+        engine, mirror, queue, clock = make_engine()
+
+        for value in ["12", "9", "15", "11"]:
+            set_state(mirror, "sensor.pm25", value, unit_of_measurement="µg/m³", friendly_name="PM2.5")
+        set_state(mirror, "sensor.pm25", "24", unit_of_measurement="µg/m³", friendly_name="PM2.5")
+        # Measured from the delivered 24, not from the previous sample
+        for value in ["30", "28", "35"]:
+            set_state(mirror, "sensor.pm25", value, unit_of_measurement="µg/m³", friendly_name="PM2.5")
+        set_state(mirror, "sensor.pm25", "unavailable")
+
+        messages = drain(queue)
+        self.assertEqual([m.message for m in messages], [
+            "Home Assistant event: PM2.5 went from 11 to 24 µg/m³.",
+            "Home Assistant event: PM2.5 went from 28 to 35 µg/m³.",
+        ])
+        report = engine.report()["rules"]["air_quality"]
+        self.assertEqual(report["delivered"], 2)
+        self.assertEqual(report["suppressed"]["below_threshold"], 7)
+
+    async def test_hourly_cap(self):
+        """Test that deliveries past max_per_hour are suppressed."""
+        engine, mirror, queue, clock = make_engine(max_per_hour=6)
+
+        for index in range(3):
+            set_state(mirror, f"person.guest_{index}", "home")
+            set_state(mirror, f"person.guest_{index}", "not_home")
+
+        self.assertEqual(len(drain(queue)), 1)
+        self.assertEqual(engine.report()["rules"]["presence"]["suppressed"], {"rate_limited": 2})
+
+
+class TestTriggerRules(unittest.TestCase):
+    def test_default_rules_load(self):
+        """Test that the bundled rules load."""
+        names = [rule["name"] for rule in load_trigger_rules()]
+        self.assertLessEqual({"presence", "doors", "air_quality"}, set(names))
+
+    def test_default_rules_cover_the_dashboard_sensors(self):
+        """Test that the bundled rules match the sensors the bundled dashboard shows."""
+        engine = TriggerEngine(load_trigger_rules(), mirror=StateMirror(api_url=None), queue=asyncio.Queue())
+        entity_ids = [entity_id for section in load_dashboard_spec()["sections"] for entity_id in section_entities(section)]
+        rules = {entity_id: (engine.rule_for(entity_id) or {}).get("name") for entity_id in entity_ids}
+
+        self.assertEqual(rules["sensor.particulate_matter_2_5mm_concentration"], "air_quality")
+        self.assertEqual(rules["person.samuel"], "presence")
+        # Battery levels, network speeds and the like stay quiet
+        self.assertIsNone(rules["sensor.fp3_battery_level"])
+        self.assertIsNone(rules["sensor.archera7v5_download_speed"])
+
+    def test_unknown_message_field_is_rejected(self):
+        """Test that a message template using an unknown field is rejected on load."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "triggers.json")
+            with open(path, "w") as f:
+                json.dump({"rules": [{"name": "x", "entities": ["light.*"], "message": "{name} is {colour}"}]}, f)
+
+            with self.assertRaisesRegex(ValueError, "colour"):
+                load_trigger_rules(path)
+
+
+if __name__ == '__main__':
+    unittest.main()